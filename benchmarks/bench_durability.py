@@ -0,0 +1,53 @@
+"""Commit throughput for different durability modes.
+
+Every commit writes small batch of keys into new transaction. Usage:
+
+    python benchmarks/bench_durability.py [--commits N] [--batch N]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from tkvdb import Tkvdb, Durability
+
+
+MODES = [
+    ('never', dict(durability=Durability.NEVER)),
+    ('commit', dict(durability=Durability.COMMIT)),
+    ('group-100', dict(durability=Durability.GROUP, sync_every=100)),
+    ('group-10ms', dict(durability=Durability.GROUP, sync_interval=10)),
+]
+
+
+def bench_mode(path, commits, batch, kwargs):
+    """Do commits, return elapsed time including final sync on close."""
+    start = time.perf_counter()
+    with Tkvdb(path, **kwargs) as db:
+        for i in range(commits):
+            with db.transaction() as tr:
+                tr.put_many(
+                    ('{:08d}-{:04d}'.format(i, j).encode('utf-8'), b'value')
+                    for j in range(batch)
+                )
+                tr.commit()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--commits', type=int, default=1000)
+    parser.add_argument('--batch', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, kwargs in MODES:
+            path = os.path.join(tmpdir, '{}.tkvdb'.format(name))
+            elapsed = bench_mode(path, args.commits, args.batch, kwargs)
+            print('{:<12} {:8.3f}s {:10.0f} commits/s'.format(
+                name, elapsed, args.commits / elapsed
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Import time and size of compiled tkvdb extensions.
+
+Every run imports module in fresh interpreter (as CLI tools and short
+lived workers do), time is measured inside the interpreter, so process
+startup isn't included. Usage:
+
+    python benchmarks/bench_import.py [--runs N] [--module NAME]
+"""
+import argparse
+import glob
+import os
+import statistics
+import subprocess
+import sys
+
+import tkvdb
+
+CODE = '''
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+'''
+
+
+def import_time(module):
+    """Import module in new interpreter, return time in seconds."""
+    output = subprocess.check_output(
+        [sys.executable, '-c', CODE.format(module=module)]
+    )
+    return float(output)
+
+
+def extensions():
+    """Return list of (name, size) of compiled tkvdb extensions."""
+    directory = os.path.dirname(tkvdb.__file__)
+    return sorted(
+        (os.path.basename(path).split('.')[0], os.path.getsize(path))
+        for path in glob.glob(os.path.join(directory, '*.so'))
+        + glob.glob(os.path.join(directory, '*.pyd'))
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--module', action='append',
+                        help='module to import (may be repeated)')
+    args = parser.parse_args()
+
+    import_time('tkvdb')  # Warm up file cache
+    for module in args.module or ['tkvdb', 'tkvdb.transaction']:
+        times = [import_time(module) * 1000 for _ in range(args.runs)]
+        print('import {:<20} min {:7.2f} ms  median {:7.2f} ms'.format(
+            module, min(times), statistics.median(times)
+        ))
+
+    total = 0
+    for name, size in extensions():
+        total += size
+        print('{:<12} {:10d} bytes'.format(name, size))
+    print('{:<12} {:10d} bytes'.format('total', total))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Hit-heavy and miss-heavy lookup microbenchmark.
+
+Compares `get`, `in` and `getvalue` with exception handling for
+lookups where most keys exist and where most keys are missing. Usage:
+
+    python benchmarks/bench_lookup.py [--keys N] [--repeat N]
+"""
+import argparse
+import timeit
+
+from tkvdb.errors import EmptyError, NotFoundError
+from tkvdb.transaction import Transaction
+
+
+def getvalue_except(tr, key):
+    """Lookup through exception handling (old way of doing get)."""
+    try:
+        return tr.getvalue(key)
+    except (EmptyError, NotFoundError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--keys', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    hits = ['hit-{:010d}'.format(i).encode('utf-8')
+            for i in range(args.keys)]
+    misses = ['miss-{:010d}'.format(i).encode('utf-8')
+              for i in range(args.keys)]
+    workloads = {
+        'hit-heavy': hits[:args.keys * 9 // 10] + misses[:args.keys // 10],
+        'miss-heavy': hits[:args.keys // 10] + misses[:args.keys * 9 // 10],
+    }
+
+    with Transaction() as tr:
+        tr.put_many((k, k) for k in hits)
+        methods = {
+            'get': lambda keys: [tr.get(k) for k in keys],
+            'contains': lambda keys: [k in tr for k in keys],
+            'getvalue+except': lambda keys: [getvalue_except(tr, k)
+                                             for k in keys],
+            'get_many': tr.get_many,
+        }
+        for workload, keys in workloads.items():
+            for name, method in methods.items():
+                best = min(timeit.repeat(lambda: method(keys),
+                                         number=1, repeat=args.repeat))
+                print('{:<11} {:<16} {:>12.0f} lookups/s'.format(
+                    workload, name, len(keys) / best))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Commit and read throughput from several threads.
+
+Every thread uses own transaction, database file is shared for reads
+and separate for commits. Usage:
+
+    python benchmarks/bench_threads.py [--threads N] [--keys N]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from tkvdb import Tkvdb
+
+
+def make_keys(prefix, num):
+    """Generate list of keys."""
+    return ['{}-{:010d}'.format(prefix, i).encode('utf-8')
+            for i in range(num)]
+
+
+def run_threads(target, num):
+    """Run target(n) in num threads, return elapsed time."""
+    threads = [threading.Thread(target=target, args=(n,))
+               for n in range(num)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start
+
+
+def bench_commit(tmpdir, threads, keys):
+    """Each thread writes and commits into own database file."""
+    data = [(k, k) for k in make_keys('commit', keys)]
+
+    def commit(n):
+        path = os.path.join(tmpdir, 'commit-{}.tkvdb'.format(n))
+        with Tkvdb(path) as db:
+            for chunk in range(0, len(data), 1000):
+                with db.transaction() as tr:
+                    tr.put_many(data[chunk:chunk + 1000])
+                    tr.commit()
+
+    return run_threads(commit, threads)
+
+
+def bench_read(path, threads, keys, shared):
+    """Each thread reads all keys through own transaction."""
+    key_list = make_keys('read', keys)
+    shared_db = Tkvdb(path) if shared else None
+
+    def read(n):
+        db = shared_db if shared else Tkvdb(path)
+        with db.transaction() as tr:
+            for key in key_list:
+                tr.getvalue(key)
+        if not shared:
+            db.close()
+
+    elapsed = run_threads(read, threads)
+    if shared_db is not None:
+        shared_db.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--keys', type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'read.tkvdb')
+        with Tkvdb(path) as db:
+            with db.transaction() as tr:
+                tr.put_many((k, k) for k in make_keys('read', args.keys))
+                tr.commit()
+
+        for num in sorted({1, args.threads}):
+            total = num * args.keys
+            elapsed = bench_commit(tmpdir, num, args.keys)
+            print('commit   threads={:<3} {:>12.0f} puts/s'.format(
+                num, total / elapsed))
+            elapsed = bench_read(path, num, args.keys, shared=False)
+            print('read     threads={:<3} {:>12.0f} gets/s (db per thread)'
+                  .format(num, total / elapsed))
+            elapsed = bench_read(path, num, args.keys, shared=True)
+            print('read     threads={:<3} {:>12.0f} gets/s (shared db)'
+                  .format(num, total / elapsed))
+
+
+if __name__ == '__main__':
+    main()
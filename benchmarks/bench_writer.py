@@ -0,0 +1,94 @@
+"""Durable write throughput of threads: own commits vs group writer.
+
+Every thread writes keys one by one, write is done after commit and
+fsync. Usage:
+
+    python benchmarks/bench_writer.py [--threads N] [--writes N]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from tkvdb import Tkvdb, Durability
+from tkvdb.errors import ModifiedError
+
+
+def run_threads(threads, func):
+    """Run func(n) in threads, return elapsed time."""
+    workers = [threading.Thread(target=func, args=(n,))
+               for n in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return time.perf_counter() - start
+
+
+def bench_commit(path, threads, writes):
+    """Every write is committed and synced by its thread.
+
+    Commit fails if other thread committed after begin, so write is
+    retried in new transaction.
+    """
+    commits = []
+    with Tkvdb(path, durability=Durability.COMMIT) as db:
+        def produce(n):
+            count = 0
+            with db.transaction() as tr:
+                for i in range(writes):
+                    while True:
+                        tr.begin()
+                        tr.put('{:04d}-{:08d}'.format(n, i).encode(),
+                               b'value')
+                        count += 1
+                        try:
+                            tr.commit()
+                            break
+                        except ModifiedError:
+                            pass
+            commits.append(count)
+
+        return run_threads(threads, produce), sum(commits)
+
+
+def bench_writer(path, threads, writes):
+    """Writes of all threads are committed by GroupWriter."""
+    with Tkvdb(path) as db:
+        writer = db.writer(max_delay=0)
+
+        def produce(n):
+            for i in range(writes):
+                writer.submit('{:04d}-{:08d}'.format(n, i).encode(),
+                              b'value').result()
+
+        elapsed = run_threads(threads, produce)
+        stats = writer.stats()
+        writer.close()
+        return elapsed, stats['commits']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--writes', type=int, default=200)
+    args = parser.parse_args()
+    total = args.threads * args.writes
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        elapsed, commits = bench_commit(os.path.join(tmpdir, 'commit.tkvdb'),
+                                        args.threads, args.writes)
+        print('{:<8} {:8.3f}s {:10.0f} writes/s {:8d} commits'.format(
+            'commit', elapsed, total / elapsed, commits
+        ))
+        elapsed, commits = bench_writer(os.path.join(tmpdir, 'writer.tkvdb'),
+                                        args.threads, args.writes)
+        print('{:<8} {:8.3f}s {:10.0f} writes/s {:8d} commits'.format(
+            'writer', elapsed, total / elapsed, commits
+        ))
+
+
+if __name__ == '__main__':
+    main()
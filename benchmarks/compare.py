@@ -0,0 +1,51 @@
+"""Compare two JSON results of benchmark suite.
+
+Prints relative change of minimal time per operation and exits with
+status 1 if some benchmark became slower than threshold. Usage:
+
+    python benchmarks/compare.py OLD.json NEW.json [--threshold 0.1]
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    """Load results as dict by benchmark name."""
+    with open(path) as f:
+        data = json.load(f)
+    return {r['name']: r for r in data['results']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='allowed slowdown (0.1 is 10%%)')
+    args = parser.parse_args()
+
+    old = load(args.old)
+    new = load(args.new)
+    regressions = 0
+    for name in sorted(set(old) & set(new)):
+        before = old[name]['ns_per_op_min']
+        after = new[name]['ns_per_op_min']
+        change = after / before - 1
+        mark = ''
+        if change > args.threshold:
+            mark = ' SLOWER'
+            regressions += 1
+        print('{:<28} {:12.1f} {:12.1f} {:+8.1%}{}'.format(
+            name, before, after, change, mark
+        ))
+    for name in sorted(set(old) ^ set(new)):
+        print('{:<28} only in {}'.format(
+            name, 'old' if name in old else 'new'
+        ))
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+"""Benchmark suite for regression checks between builds.
+
+Every benchmark is run for RAM-only and file-backed transactions and
+for several key/value sizes. Results are printed as table and
+optionally saved as JSON, which may be compared with compare.py.
+Usage:
+
+    python benchmarks/suite.py [--keys N] [--repeat N] [--output FILE]
+                               [--filter SUBSTRING]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from tkvdb import Tkvdb
+from tkvdb.transaction import Transaction
+
+
+SIZES = {
+    'small': (16, 16),
+    'medium': (32, 256),
+    'large': (64, 4096),
+}
+MODES = ('ram', 'file')
+
+
+def make_keys(prefix, num, size):
+    """Generate sorted list of keys of given size."""
+    return [
+        '{}{:0{}d}'.format(prefix, i, size - len(prefix)).encode('utf-8')
+        for i in range(num)
+    ]
+
+
+class Context:
+    """Benchmark data for one mode and size."""
+    def __init__(self, tmpdir, mode, keys, key_size, value_size):
+        self.tmpdir = tmpdir
+        self.mode = mode
+        self.keys = make_keys('k', keys, key_size)
+        self.misses = make_keys('m', keys, key_size)
+        self.value = b'v' * value_size
+        # Each prefix matches 10 keys
+        self.prefixes = sorted(set(k[:-1] for k in self.keys))[:100]
+        self.path = os.path.join(
+            tmpdir, '{}-{}-{}.tkvdb'.format(mode, key_size, value_size)
+        )
+        self.db = None
+
+    def new_transaction(self):
+        """Create started transaction for current mode."""
+        if self.mode == 'ram':
+            tr = Transaction()
+        else:
+            tr = self.db.transaction()
+        tr.begin()
+        return tr
+
+    def filled_transaction(self):
+        """Create transaction with all keys (committed for file mode)."""
+        if self.mode == 'file' and self.db is None:
+            self.db = Tkvdb(self.path)
+            with self.db.transaction() as tr:
+                tr.put_many((k, self.value) for k in self.keys)
+                tr.commit()
+        tr = self.new_transaction()
+        if self.mode == 'ram':
+            tr.put_many((k, self.value) for k in self.keys)
+        return tr
+
+    def close(self):
+        """Close database."""
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+def bench_put(ctx):
+    """Put all keys into new transaction."""
+    value = ctx.value
+    if ctx.mode == 'file':
+        ctx.filled_transaction().free()
+
+    def run():
+        tr = ctx.new_transaction()
+        put = tr.put
+        start = time.perf_counter()
+        for key in ctx.keys:
+            put(key, value)
+        elapsed = time.perf_counter() - start
+        tr.free()
+        return elapsed
+    return run, len(ctx.keys)
+
+
+def bench_lookup(name):
+    """Create lookup benchmark for transaction method name."""
+    def bench(ctx):
+        tr = ctx.filled_transaction()
+        keys = ctx.misses if name == 'get_miss' else ctx.keys
+        if name == 'contains':
+            method = tr.__contains__
+        elif name == 'getvalue':
+            method = tr.getvalue
+        else:
+            method = tr.get
+
+        def run():
+            start = time.perf_counter()
+            for key in keys:
+                method(key)
+            return time.perf_counter() - start
+        return run, len(keys)
+    return bench
+
+
+def bench_iter_full(ctx):
+    """Iterate over all items."""
+    tr = ctx.filled_transaction()
+
+    def run():
+        start = time.perf_counter()
+        for item in tr.items():
+            pass
+        return time.perf_counter() - start
+    return run, len(ctx.keys)
+
+
+def bench_iter_prefix(ctx):
+    """Iterate over keys with 100 different prefixes."""
+    tr = ctx.filled_transaction()
+    prefixes = set(ctx.prefixes)
+    count = sum(1 for k in ctx.keys if k[:-1] in prefixes)
+
+    def run():
+        start = time.perf_counter()
+        for prefix in ctx.prefixes:
+            for item in tr.items(prefix=prefix):
+                pass
+        return time.perf_counter() - start
+    return run, count
+
+
+def bench_commit(ctx):
+    """Commit transaction with 100 keys."""
+    value = ctx.value
+    if ctx.mode == 'file':
+        ctx.filled_transaction().free()
+    batches = [ctx.keys[i:i + 100] for i in range(0, len(ctx.keys), 100)]
+    batches = batches[:100]
+
+    def run():
+        elapsed = 0
+        for batch in batches:
+            tr = ctx.new_transaction()
+            tr.put_many((k, value) for k in batch)
+            start = time.perf_counter()
+            tr.commit()
+            elapsed += time.perf_counter() - start
+            tr.free()
+        return elapsed
+    return run, len(batches)
+
+
+def bench_open_close(ctx):
+    """Open and close database file."""
+    if ctx.mode != 'file':
+        return None
+    ctx.filled_transaction().free()
+    path = ctx.path
+
+    def run():
+        start = time.perf_counter()
+        for i in range(100):
+            Tkvdb(path).close()
+        return time.perf_counter() - start
+    return run, 100
+
+
+BENCHMARKS = [
+    ('put', bench_put),
+    ('getvalue', bench_lookup('getvalue')),
+    ('get_hit', bench_lookup('get_hit')),
+    ('get_miss', bench_lookup('get_miss')),
+    ('contains', bench_lookup('contains')),
+    ('iter_full', bench_iter_full),
+    ('iter_prefix', bench_iter_prefix),
+    ('commit', bench_commit),
+    ('open_close', bench_open_close),
+]
+
+
+def run_suite(keys, repeat, name_filter=None):
+    """Run all benchmarks, return list of result dicts."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for size_name, (key_size, value_size) in SIZES.items():
+            for mode in MODES:
+                for bench_name, bench in BENCHMARKS:
+                    name = '{}/{}/{}'.format(bench_name, mode, size_name)
+                    if name_filter and name_filter not in name:
+                        continue
+                    ctx = Context(tmpdir, mode, keys, key_size, value_size)
+                    try:
+                        prepared = bench(ctx)
+                        if prepared is None:
+                            continue
+                        run, ops = prepared
+                        run()  # Warmup
+                        times = [run() for i in range(repeat)]
+                    finally:
+                        ctx.close()
+                    result = {
+                        'name': name,
+                        'benchmark': bench_name,
+                        'mode': mode,
+                        'key_size': key_size,
+                        'value_size': value_size,
+                        'ops': ops,
+                        'ns_per_op_min': min(times) / ops * 1e9,
+                        'ns_per_op_median': (statistics.median(times)
+                                             / ops * 1e9),
+                    }
+                    results.append(result)
+                    print('{:<28} {:12.1f} ns/op {:12.1f} ns/op median'
+                          .format(name, result['ns_per_op_min'],
+                                  result['ns_per_op_median']),
+                          flush=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--keys', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='save results to JSON file')
+    parser.add_argument('--filter', help='run only matching benchmarks')
+    args = parser.parse_args()
+
+    results = run_suite(args.keys, args.repeat, args.filter)
+    if args.output:
+        data = {
+            'meta': {
+                'python': sys.version,
+                'platform': platform.platform(),
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'keys': args.keys,
+                'repeat': args.repeat,
+            },
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(data, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -9,13 +9,22 @@ except ImportError:
 
 USE_CYTHON = bool(int(os.getenv("USE_CYTHON", 0))) and cythonize is not None
 
+# Only tkvdb.core is linked with tkvdb C code, other modules use its
+# functions through cimport
 MODULES = (
+    {'mod': 'tkvdb.core', 'files': ["core"], 'sources': ['tkvdb/tkvdb.c']},
     {'mod': 'tkvdb.errors', 'files': ["errors"]},
     {'mod': 'tkvdb.params', 'files': ["params"]},
+    {'mod': 'tkvdb.codecs', 'files': ["codecs"]},
+    {'mod': 'tkvdb.cache', 'files': ["cache"]},
+    {'mod': 'tkvdb.stats', 'files': ["stats"]},
     {'mod': 'tkvdb.cursor', 'files': ["cursor"]},
     {'mod': 'tkvdb.iterators', 'files': ["iterators"]},
     {'mod': 'tkvdb.transaction', 'files': ["transaction"]},
-    {'mod': 'tkvdb.db', 'files': ["db"]}
+    {'mod': 'tkvdb.db', 'files': ["db"]},
+    {'mod': 'tkvdb.dump', 'files': ["dump"]},
+    {'mod': 'tkvdb.compact', 'files': ["compact"]},
+    {'mod': 'tkvdb.pool', 'files': ["pool"]}
 )
 
 
@@ -25,7 +34,7 @@ def get_modules():
     for module in MODULES:
         files = ['src/tkvdb/' + f + ext for f in module['files']]
         extensions.append(
-            Extension(module['mod'], files + ['tkvdb/tkvdb.c'],
+            Extension(module['mod'], files + module.get('sources', []),
                       include_dirs=['tkvdb/']),
         )
     if USE_CYTHON:
@@ -1,3 +1,6 @@
-from tkvdb.db import Tkvdb
+from tkvdb.db import Tkvdb, Durability
+from tkvdb.cache import ValueCache
+from tkvdb.bulk import bulkload
+from tkvdb.dump import restore
 
 
@@ -0,0 +1,227 @@
+"""Asyncio interface for tkvdb.
+
+Every database handle has single worker thread, all blocking calls
+(including calls of its transactions) are executed there in order, so
+event loop is never blocked by tkvdb. GIL is released by C calls of
+file-backed transactions, so event loop works in parallel with them.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from tkvdb.db import Tkvdb
+
+
+class AsyncTkvdb:
+    """Asyncio wrapper around Tkvdb with dedicated worker thread.
+
+    Constructor arguments are same as for Tkvdb.
+    """
+    def __init__(self, path, params=None, **kwargs):
+        self.db = Tkvdb(path, params, **kwargs)
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    @property
+    def path(self):
+        """Path to database file."""
+        return self.db.path
+
+    @property
+    def is_opened(self):
+        """Database is opened."""
+        return self.db.is_opened
+
+    def run(self, func, *args, **kwargs):
+        """Run func in worker thread, return awaitable future."""
+        loop = asyncio.get_event_loop()
+        return loop.run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs)
+        )
+
+    def transaction(self, params=None):
+        """Create AsyncTransaction."""
+        return AsyncTransaction(self, params)
+
+    async def sync(self):
+        """Flush database file to disk."""
+        await self.run(self.db.sync)
+
+    async def close(self):
+        """Close database and stop worker thread."""
+        try:
+            await self.run(self.db.close)
+        finally:
+            self.executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        """Async context manager enter."""
+        return self
+
+    async def __aexit__(self, *args):
+        """Async context manager exit."""
+        await self.close()
+
+
+class AsyncTransaction:
+    """Asyncio wrapper around Transaction using database worker.
+
+    Transaction itself is created by worker too, before any of its
+    queued calls.
+    """
+    def __init__(self, adb, params=None):
+        self.adb = adb
+        self.created = adb.executor.submit(adb.db.transaction, params)
+
+    @property
+    def tr(self):
+        """Wrapped transaction, waits until worker creates it."""
+        return self.created.result()
+
+    @property
+    def is_started(self):
+        """Transaction is started."""
+        return self.created.done() and self.tr.is_started
+
+    @property
+    def is_changed(self):
+        """Transaction has uncommitted changes."""
+        return self.created.done() and self.tr.is_changed
+
+    def run(self, func, *args, **kwargs):
+        """Run function in database worker."""
+        return self.adb.run(func, *args, **kwargs)
+
+    def call(self, method, *args):
+        """Run transaction method (by name) in database worker."""
+        return self.run(self.apply, method, args)
+
+    def apply(self, method, args):
+        """Call transaction method, runs in worker."""
+        return getattr(self.tr, method)(*args)
+
+    async def begin(self):
+        """Start transaction."""
+        await self.call('begin')
+
+    async def commit(self):
+        """Commit transaction."""
+        await self.call('commit')
+
+    async def rollback(self):
+        """Rollback transaction."""
+        await self.call('rollback')
+
+    async def free(self):
+        """Free transaction."""
+        await self.call('free')
+
+    async def getvalue(self, key):
+        """Get value by key, raise error if it doesn't exist."""
+        return await self.call('getvalue', key)
+
+    async def get(self, key, default=None):
+        """Get value by key with default value."""
+        return await self.call('get', key, default)
+
+    async def contains(self, key):
+        """Check if key exists."""
+        return await self.call('__contains__', key)
+
+    async def put(self, key, value):
+        """Put key-value pair."""
+        await self.call('put', key, value)
+
+    async def delete(self, key, prefix=False):
+        """Delete key (or all keys with prefix)."""
+        await self.call('delete', key, prefix)
+
+    async def put_many(self, pairs):
+        """Put multiple key-value pairs."""
+        await self.call('put_many', pairs)
+
+    async def get_many(self, keys, default=None):
+        """Get values for multiple keys."""
+        return await self.call('get_many', keys, default)
+
+    async def delete_many(self, keys, prefix=False):
+        """Delete multiple keys."""
+        await self.call('delete_many', keys, prefix)
+
+    def iter_chunks(self, chunk_size=1000, keys_only=False, prefix=None,
+                    start=None, stop=None, reverse=False):
+        """Async iterator returning lists of up to chunk_size items.
+
+        Cursor is created in worker on first iteration, after calls
+        queued before it.
+        """
+        return AsyncChunksIterator(self, 'keys' if keys_only else 'items',
+                                   (prefix, start, stop, reverse),
+                                   chunk_size)
+
+    def items(self, prefix=None, start=None, stop=None, reverse=False,
+              chunk_size=1000):
+        """Async items iterator, fetches items by chunks."""
+        return AsyncIterator(self.iter_chunks(chunk_size, False, prefix,
+                                              start, stop, reverse))
+
+    def keys(self, prefix=None, start=None, stop=None, reverse=False,
+             chunk_size=1000):
+        """Async keys iterator, fetches keys by chunks."""
+        return AsyncIterator(self.iter_chunks(chunk_size, True, prefix,
+                                              start, stop, reverse))
+
+    async def __aenter__(self):
+        """Async context manager enter, begins transaction."""
+        await self.begin()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        """Async context manager exit, rollback on exception."""
+        if exc_type is not None:
+            await self.rollback()
+        await self.free()
+
+
+class AsyncChunksIterator:
+    """Async iterator fetching chunks in database worker."""
+    def __init__(self, atr, method, args, chunk_size):
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be positive')
+        self.atr = atr
+        self.method = method
+        self.args = args
+        self.iterator = None
+        self.chunk_size = chunk_size
+
+    def fetch(self):
+        """Create iterator if needed and fetch chunk, runs in worker."""
+        if self.iterator is None:
+            self.iterator = self.atr.apply(self.method, self.args)
+        return self.iterator.fetch(self.chunk_size)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        chunk = await self.atr.run(self.fetch)
+        if not chunk:
+            raise StopAsyncIteration
+        return chunk
+
+
+class AsyncIterator:
+    """Async iterator returning single values from chunks."""
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.chunk = iter(())
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        for value in self.chunk:
+            return value
+        self.chunk = iter(await self.chunks.__anext__())
+        for value in self.chunk:
+            return value
+        raise StopAsyncIteration
@@ -0,0 +1,248 @@
+"""Bulk writing with automatic commits at memory budget."""
+import collections
+import itertools
+import operator
+import time
+
+from tkvdb.codecs import BytesCodec
+from tkvdb.db import Tkvdb
+from tkvdb.errors import EnomemError
+from tkvdb.files import atomic_file
+
+
+FlushStats = collections.namedtuple(
+    'FlushStats', ['records', 'bytes', 'mem', 'seconds']
+)
+FlushStats.__doc__ = """Statistics of single flush (commit).
+
+- records -- number of put/delete operations in transaction.
+- bytes -- total size of keys and values.
+- mem -- transaction memory before commit.
+- seconds -- commit duration.
+"""
+
+
+LoadStats = collections.namedtuple(
+    'LoadStats', ['records', 'bytes', 'commits', 'seconds',
+                  'records_per_second', 'bytes_per_second']
+)
+LoadStats.__doc__ = """Statistics of bulkload().
+
+- records -- number of loaded key-value pairs.
+- bytes -- total size of keys and values.
+- commits -- number of commits.
+- seconds -- total duration.
+- records_per_second, bytes_per_second -- throughput.
+"""
+
+
+# Pairs are encoded by BulkWriter, transaction gets them as is
+_RAW = BytesCodec()
+
+
+def _size(obj):
+    """Return size of bytes or buffer object."""
+    if type(obj) is bytes:
+        return len(obj)
+    return memoryview(obj).nbytes
+
+
+def _chunk_size(chunk):
+    """Return total size of keys and values of list of pairs."""
+    flat = list(itertools.chain.from_iterable(chunk))
+    if set(map(type, flat)) <= {bytes, bytearray}:
+        return sum(map(len, flat))
+    return sum(map(_size, flat))
+
+
+class BulkWriter:
+    """Writer committing transaction when it reaches memory budget.
+
+    Transaction is committed and started again when transaction memory
+    (`Transaction.mem()`) reaches `mem_limit` bytes. If transaction
+    memory is also limited by `Param.TrLimit` and put fails with
+    EnomemError, transaction is flushed and put is retried once. Keys
+    and values are encoded by database codecs once, both for writing
+    and for counting their size.
+    """
+    def __init__(self, db, mem_limit=64 * 1024 * 1024, params=None,
+                 on_flush=None):
+        if mem_limit <= 0:
+            raise ValueError('mem_limit must be positive')
+        self.db = db
+        self.mem_limit = mem_limit
+        self.on_flush = on_flush
+        self.key_codec = db.key_codec
+        self.value_codec = db.value_codec
+        self.tr = db.transaction(
+            params,
+            key_codec=None if self.key_codec is None else _RAW,
+            value_codec=None if self.value_codec is None else _RAW
+        )
+        self.tr.begin()
+        self.flushes = 0
+        self.total_records = 0
+        self.total_bytes = 0
+        self.records = 0
+        self.bytes = 0
+
+    def put(self, key, value):
+        """Put key-value pair, flush if memory budget is reached."""
+        if self.key_codec is not None:
+            key = self.key_codec.encode(key)
+        if self.value_codec is not None:
+            value = self.value_codec.encode(value)
+        try:
+            self.tr.put(key, value)
+        except EnomemError:
+            if not self.records:
+                raise
+            self.flush()
+            self.tr.put(key, value)
+        self.records += 1
+        self.bytes += _size(key) + _size(value)
+        if self.tr.mem() >= self.mem_limit:
+            self.flush()
+
+    def put_many(self, pairs, chunk_size=100):
+        """Put multiple key-value pairs.
+
+        Pairs are put by chunks with Transaction.put_many(), so memory
+        budget is checked once per chunk.
+        """
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be positive')
+        pairs = iter(pairs)
+        while True:
+            chunk = list(itertools.islice(pairs, chunk_size))
+            if not chunk:
+                break
+            self.put_chunk(chunk)
+
+    def put_chunk(self, chunk):
+        """Put list of key-value pairs, flush on memory budget."""
+        if self.key_codec is not None or self.value_codec is not None:
+            chunk = [(k if self.key_codec is None
+                      else self.key_codec.encode(k),
+                      v if self.value_codec is None
+                      else self.value_codec.encode(v))
+                     for k, v in chunk]
+        while chunk:
+            try:
+                self.tr.put_many(chunk)
+                done = len(chunk)
+            except EnomemError as e:
+                if not e.index and not self.records:
+                    raise
+                done = e.index
+            self.records += done
+            self.bytes += _chunk_size(chunk[:done])
+            if done < len(chunk) or self.tr.mem() >= self.mem_limit:
+                self.flush()
+            chunk = chunk[done:]
+
+    def delete(self, key, prefix=False):
+        """Delete key (or prefix), flush if memory budget is reached."""
+        if not prefix and self.key_codec is not None:
+            # Prefix is raw bytes
+            key = self.key_codec.encode(key)
+        self.tr.delete(key, prefix)
+        self.records += 1
+        self.bytes += _size(key)
+        if self.tr.mem() >= self.mem_limit:
+            self.flush()
+
+    def flush(self):
+        """Commit current transaction and begin new one.
+
+        Returns FlushStats or None if there was nothing to commit.
+        """
+        if not self.records:
+            return None
+        mem = self.tr.mem()
+        start = time.perf_counter()
+        self.tr.commit()
+        stats = FlushStats(self.records, self.bytes, mem,
+                           time.perf_counter() - start)
+        self.flushes += 1
+        self.total_records += self.records
+        self.total_bytes += self.bytes
+        self.records = self.bytes = 0
+        self.tr.begin()
+        if self.on_flush is not None:
+            self.on_flush(stats)
+        return stats
+
+    def close(self):
+        """Flush remaining data and free transaction."""
+        try:
+            self.flush()
+        finally:
+            self.tr.free()
+
+    def abort(self):
+        """Rollback data written after last flush and free transaction."""
+        self.tr.rollback()
+        self.records = self.bytes = 0
+        self.tr.free()
+
+    def __enter__(self):
+        """Context manager enter."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Context manager exit, unflushed data is dropped on exception."""
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
+def _check_order(chunk, last):
+    """Raise ValueError if keys of chunk aren't sorted after last key."""
+    keys = [pair[0] for pair in chunk]
+    if last is not None:
+        keys.insert(0, last)
+    if all(map(operator.lt, keys, keys[1:])):
+        return keys[-1]
+    for i, (prev, key) in enumerate(zip(keys, keys[1:])):
+        if not prev < key:
+            raise ValueError(
+                'Keys are not sorted: {!r} after {!r}'.format(key, prev)
+            )
+
+
+def bulkload(path, items, params=None, mem_limit=64 * 1024 * 1024,
+             chunk_size=1000, check_order=True, overwrite=False,
+             on_flush=None, **kwargs):
+    """Create new database file from iterable of key-sorted pairs.
+
+    Pairs are streamed by chunks into BulkWriter, so memory usage is
+    bounded by `mem_limit` (or `Param.TrLimit` of params) and one
+    chunk. Keys must be unique and sorted in ascending order, it is
+    checked unless `check_order` is False. Database is built in
+    temporary file which replaces `path` after it is synced, so
+    existing file is kept if loading fails. Existing non-empty file is
+    replaced only if `overwrite` is True. Other keyword arguments are
+    passed to Tkvdb. Returns LoadStats.
+    """
+    start = time.perf_counter()
+    items = iter(items)
+    last = None
+    with atomic_file(path, overwrite) as tmp:
+        with Tkvdb(tmp, params, **kwargs) as db:
+            with BulkWriter(db, mem_limit, on_flush=on_flush) as writer:
+                while True:
+                    chunk = list(itertools.islice(items, chunk_size))
+                    if not chunk:
+                        break
+                    if check_order:
+                        last = _check_order(chunk, last)
+                    writer.put_chunk(chunk)
+            db.sync()
+    seconds = time.perf_counter() - start
+    return LoadStats(
+        writer.total_records, writer.total_bytes, writer.flushes, seconds,
+        writer.total_records / seconds if seconds else 0.0,
+        writer.total_bytes / seconds if seconds else 0.0,
+    )
@@ -0,0 +1,15 @@
+cdef class ValueCache:
+    cdef object data
+    cdef readonly Py_ssize_t max_entries
+    cdef readonly Py_ssize_t max_bytes
+    cdef readonly Py_ssize_t nbytes
+    cdef readonly Py_ssize_t hits
+    cdef readonly Py_ssize_t misses
+    cdef readonly Py_ssize_t evictions
+
+    cdef object lookup(self, key)
+    cdef int store(self, key, bytes value) except -1
+    cdef int invalidate(self, key) except -1
+    cdef int invalidate_prefix(self, prefix) except -1
+    cpdef clear(self)
+    cpdef reset_stats(self)
@@ -0,0 +1,104 @@
+from collections import OrderedDict
+
+
+cdef inline bytes _as_bytes(obj):
+    """Convert key (any buffer object) to bytes."""
+    if type(obj) is bytes:
+        return obj
+    return bytes(memoryview(obj))
+
+
+cdef class ValueCache:
+    """Bounded LRU cache of transaction values.
+
+    Cache is limited by number of entries (`max_entries`) and/or by
+    total size of keys and values (`max_bytes`), zero means no limit.
+    Least recently used entries are evicted first. Cache is filled
+    and updated by transaction, it can't be shared by transactions.
+    """
+    def __init__(self, Py_ssize_t max_entries=0, Py_ssize_t max_bytes=0):
+        if max_entries < 0 or max_bytes < 0:
+            raise ValueError('Cache limits must not be negative')
+        if not max_entries and not max_bytes:
+            raise ValueError('max_entries or max_bytes must be set')
+        self.data = OrderedDict()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.reset_stats()
+
+    cdef object lookup(self, key):
+        """Return cached value or None, update counters."""
+        key = _as_bytes(key)
+        value = self.data.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.data.move_to_end(key)
+        return value
+
+    cdef int store(self, key, bytes value) except -1:
+        """Add value to cache, evict old entries if cache is full."""
+        cdef Py_ssize_t size
+        key = _as_bytes(key)
+        size = len(key) + len(value)
+        old = self.data.pop(key, None)
+        if old is not None:
+            self.nbytes -= len(key) + len(old)
+        if self.max_bytes and size > self.max_bytes:
+            return 0
+        self.data[key] = value
+        self.nbytes += size
+        while ((self.max_entries and len(self.data) > self.max_entries)
+               or (self.max_bytes and self.nbytes > self.max_bytes)):
+            key, value = self.data.popitem(last=False)
+            self.nbytes -= len(key) + len(value)
+            self.evictions += 1
+        return 0
+
+    cdef int invalidate(self, key) except -1:
+        """Remove key from cache."""
+        if not self.data:
+            return 0
+        key = _as_bytes(key)
+        value = self.data.pop(key, None)
+        if value is not None:
+            self.nbytes -= len(key) + len(value)
+        return 0
+
+    cdef int invalidate_prefix(self, prefix) except -1:
+        """Remove all keys with prefix from cache."""
+        if not self.data:
+            return 0
+        prefix = _as_bytes(prefix)
+        for key in [k for k in self.data if k.startswith(prefix)]:
+            self.invalidate(key)
+        return 0
+
+    cpdef clear(self):
+        """Remove all entries, counters are not changed."""
+        self.data.clear()
+        self.nbytes = 0
+
+    cpdef reset_stats(self):
+        """Reset hit, miss and eviction counters."""
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Return dict with cache counters and size."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self.data),
+            'bytes': self.nbytes,
+        }
+
+    def __len__(self):
+        """Number of cached entries."""
+        return len(self.data)
+
+    def __contains__(self, key):
+        """Check if key is cached, doesn't change counters and order."""
+        return _as_bytes(key) in self.data
@@ -0,0 +1,31 @@
+cdef class Codec:
+    cdef readonly Py_ssize_t size
+
+    cdef object c_encode(self, obj)
+    cdef object c_decode(self, const char *data, Py_ssize_t size)
+
+
+cdef class NativeCodec(Codec):
+    pass
+
+
+cdef class BytesCodec(NativeCodec):
+    pass
+
+
+cdef class IntCodec(NativeCodec):
+    cdef readonly bint signed
+    cdef unsigned long long mask
+    cdef unsigned long long offset
+
+
+cdef class StrCodec(NativeCodec):
+    pass
+
+
+cdef class StructCodec(NativeCodec):
+    cdef readonly object struct
+
+
+cdef class TupleCodec(NativeCodec):
+    cdef readonly tuple codecs
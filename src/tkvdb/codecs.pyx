@@ -0,0 +1,242 @@
+import struct
+
+from libc.string cimport memchr
+from cpython.bytes cimport PyBytes_FromStringAndSize, PyBytes_AS_STRING
+from cpython.unicode cimport PyUnicode_AsUTF8String, PyUnicode_DecodeUTF8
+
+
+cdef inline bytes _as_bytes(obj):
+    """Convert buffer object to bytes."""
+    if type(obj) is bytes:
+        return obj
+    return bytes(memoryview(obj))
+
+
+cdef class Codec:
+    """Base class of key and value codecs.
+
+    Codec converts Python objects to bytes stored in database and
+    back. Custom codecs are created by subclassing Codec and defining
+    `encode(obj) -> bytes` and `decode(data: bytes)` methods. Built-in
+    codecs are implemented in C and called by transactions, cursors
+    and iterators directly. `size` is size of encoded data for
+    fixed-size codecs and 0 for variable-size ones.
+    """
+    cdef object c_encode(self, obj):
+        """Encode object, called by transaction."""
+        return self.encode(obj)
+
+    cdef object c_decode(self, const char *data, Py_ssize_t size):
+        """Decode object from memory, called by transaction."""
+        return self.decode(PyBytes_FromStringAndSize(data, size))
+
+    def encode(self, obj):
+        """Encode object to bytes."""
+        raise NotImplementedError()
+
+    def decode(self, data):
+        """Decode object from bytes."""
+        raise NotImplementedError()
+
+
+cdef class NativeCodec(Codec):
+    """Base class of built-in codecs, Python methods call C ones."""
+    def encode(self, obj):
+        """Encode object to bytes."""
+        return self.c_encode(obj)
+
+    def decode(self, data):
+        """Decode object from bytes (or buffer object)."""
+        cdef bytes raw = _as_bytes(data)
+        return self.c_decode(PyBytes_AS_STRING(raw), len(raw))
+
+
+cdef class BytesCodec(NativeCodec):
+    """Codec passing bytes (and buffer objects) as is."""
+    cdef object c_encode(self, obj):
+        return obj
+
+    cdef object c_decode(self, const char *data, Py_ssize_t size):
+        return PyBytes_FromStringAndSize(data, size)
+
+
+cdef class IntCodec(NativeCodec):
+    """Big-endian integer of `size` bytes (1-8).
+
+    Byte order of encoded integers is same as numeric order, signed
+    integers are stored with inverted sign bit, so they are also
+    ordered correctly. OverflowError is raised for values out of range.
+    """
+    def __init__(self, Py_ssize_t size=8, bint signed=False):
+        if size < 1 or size > 8:
+            raise ValueError('size must be from 1 to 8')
+        self.size = size
+        self.signed = signed
+        if size == 8:
+            self.mask = 0xffffffffffffffffULL
+        else:
+            self.mask = (1ULL << (size * 8)) - 1
+        self.offset = (self.mask >> 1) + 1 if signed else 0
+
+    def __repr__(self):
+        return 'IntCodec(size={}, signed={})'.format(self.size, self.signed)
+
+    cdef object c_encode(self, obj):
+        cdef unsigned long long value
+        cdef long long signed_value
+        cdef unsigned char buf[8]
+        cdef Py_ssize_t i
+        if self.signed:
+            signed_value = obj
+            value = (<unsigned long long>signed_value) + self.offset
+            if self.size < 8 and value > self.mask:
+                raise OverflowError('int too big to encode')
+        else:
+            value = obj
+            if value > self.mask:
+                raise OverflowError('int too big to encode')
+        for i in range(self.size - 1, -1, -1):
+            buf[i] = value & 0xff
+            value >>= 8
+        return PyBytes_FromStringAndSize(<char *>buf, self.size)
+
+    cdef object c_decode(self, const char *data, Py_ssize_t size):
+        cdef unsigned long long value = 0
+        cdef Py_ssize_t i
+        if size != self.size:
+            raise ValueError(
+                'Invalid size of encoded int: {}'.format(size)
+            )
+        for i in range(size):
+            value = (value << 8) | <unsigned char>data[i]
+        if not self.signed:
+            return value
+        value = (value - self.offset) & self.mask
+        if value & self.offset:
+            # Negative, extend sign to 64 bits
+            value |= ~self.mask
+        return <long long>value
+
+
+cdef class StrCodec(NativeCodec):
+    """UTF-8 string codec."""
+    cdef object c_encode(self, obj):
+        if type(obj) is not str:
+            raise TypeError('str expected, got {}'.format(type(obj).__name__))
+        return PyUnicode_AsUTF8String(obj)
+
+    cdef object c_decode(self, const char *data, Py_ssize_t size):
+        return PyUnicode_DecodeUTF8(data, size, NULL)
+
+
+cdef class StructCodec(NativeCodec):
+    """Fixed-layout codec using `struct` format, values are tuples.
+
+    Big-endian byte order is used if format doesn't specify it, so
+    unsigned integer fields are ordered correctly.
+    """
+    def __init__(self, str fmt):
+        if fmt[:1] not in ('@', '=', '<', '>', '!'):
+            fmt = '>' + fmt
+        self.struct = struct.Struct(fmt)
+        self.size = self.struct.size
+
+    def __repr__(self):
+        return 'StructCodec({!r})'.format(self.struct.format)
+
+    cdef object c_encode(self, obj):
+        return self.struct.pack(*obj)
+
+    cdef object c_decode(self, const char *data, Py_ssize_t size):
+        if size != self.size:
+            raise ValueError(
+                'Invalid size of encoded struct: {}'.format(size)
+            )
+        return self.struct.unpack(PyBytes_FromStringAndSize(data, size))
+
+
+cdef class TupleCodec(NativeCodec):
+    """Codec for tuples, every item is encoded by its own codec.
+
+    Variable-size items (except last) are escaped (0x00 is replaced
+    with 0x00 0xff) and terminated by 0x00 0x00, so encoded tuples are
+    ordered as tuples if item codecs preserve order.
+    """
+    def __init__(self, *codecs):
+        cdef Codec codec
+        if not codecs:
+            raise ValueError('At least one codec is required')
+        for codec in codecs:
+            if codec is None:
+                raise TypeError('codec must be Codec instance')
+        self.codecs = codecs
+        self.size = 0
+        if all(c.size for c in codecs):
+            self.size = sum(c.size for c in codecs)
+
+    def __repr__(self):
+        return 'TupleCodec({})'.format(', '.join(map(repr, self.codecs)))
+
+    cdef object c_encode(self, obj):
+        cdef Codec codec
+        cdef Py_ssize_t i
+        cdef Py_ssize_t last = len(self.codecs) - 1
+        cdef list parts = []
+        if len(obj) != len(self.codecs):
+            raise ValueError(
+                'Tuple of {} items expected'.format(len(self.codecs))
+            )
+        for i, item in enumerate(obj):
+            codec = self.codecs[i]
+            part = _as_bytes(codec.c_encode(item))
+            if codec.size:
+                if len(part) != codec.size:
+                    raise ValueError('Invalid size of encoded item')
+            elif i != last:
+                part = part.replace(b'\x00', b'\x00\xff') + b'\x00\x00'
+            parts.append(part)
+        return b''.join(parts)
+
+    cdef object c_decode(self, const char *data, Py_ssize_t size):
+        cdef Codec codec
+        cdef Py_ssize_t i
+        cdef Py_ssize_t last = len(self.codecs) - 1
+        cdef Py_ssize_t pos = 0
+        cdef Py_ssize_t end
+        cdef const char *found
+        cdef bint escaped
+        cdef list result = []
+        for i in range(last + 1):
+            codec = self.codecs[i]
+            if codec.size:
+                end = pos + codec.size
+            elif i == last:
+                end = size
+            else:
+                # Find terminator, escaped zeros are followed by 0xff
+                end = pos
+                escaped = False
+                while True:
+                    found = <const char *>memchr(data + end, 0, size - end)
+                    if found == NULL or found - data + 1 >= size:
+                        raise ValueError('Unterminated tuple item')
+                    end = found - data
+                    if found[1] == 0:
+                        break
+                    escaped = True
+                    end += 2
+            if end > size:
+                raise ValueError('Encoded tuple is too short')
+            if codec.size or i == last or not escaped:
+                result.append(codec.c_decode(data + pos, end - pos))
+            else:
+                part = PyBytes_FromStringAndSize(data + pos, end - pos)
+                part = part.replace(b'\x00\xff', b'\x00')
+                result.append(codec.c_decode(PyBytes_AS_STRING(part),
+                                             len(part)))
+            pos = end
+            if not codec.size and i != last:
+                pos += 2
+        if pos != size:
+            raise ValueError('Encoded tuple is too long')
+        return tuple(result)
@@ -0,0 +1,174 @@
+"""Compaction of database file.
+
+tkvdb appends every commit to database file, so file of frequently
+updated database contains many obsolete nodes. Compaction copies
+committed state of database from snapshot transaction into new file
+and replaces original file with it.
+"""
+import collections
+import os
+import time
+
+cimport ctkvdb
+from tkvdb.db cimport Tkvdb
+from tkvdb.iterators cimport BaseIterator
+from tkvdb.transaction cimport Transaction
+from tkvdb.errors import make_error
+from tkvdb.files import atomic_file, temp_file
+from tkvdb.params import Params, Param
+
+
+cdef enum:
+    # Number of records copied between progress calls
+    PROGRESS_STEP = 65536
+
+
+CompactStats = collections.namedtuple(
+    'CompactStats', ['records', 'old_size', 'new_size', 'saved', 'seconds']
+)
+CompactStats.__doc__ = """Statistics of compaction.
+
+- records -- number of copied key-value pairs.
+- old_size -- size of original file.
+- new_size -- size of compacted file.
+- saved -- old_size - new_size.
+- seconds -- total duration.
+"""
+
+
+cdef ctkvdb.TKVDB_RES _copy(ctkvdb.tkvdb_cursor *c, ctkvdb.tkvdb_tr *dest,
+                            Py_ssize_t n, size_t mem_limit,
+                            Py_ssize_t *done, size_t *nbytes) noexcept nogil:
+    """Put up to n items starting from current one into dest.
+
+    Stops when dest memory reaches mem_limit. Returns TKVDB_OK if
+    current item isn't copied yet, otherwise tkvdb code of failed put
+    or cursor move (TKVDB_NOT_FOUND at the end).
+    """
+    cdef ctkvdb.TKVDB_RES ok
+    cdef ctkvdb.tkvdb_datum key
+    cdef ctkvdb.tkvdb_datum val
+    cdef Py_ssize_t i = 0
+    while i < n:
+        key = c.key_datum(c)
+        val = c.val_datum(c)
+        ok = dest.put(dest, &key, &val)
+        if ok != ctkvdb.TKVDB_RES.TKVDB_OK:
+            return ok
+        done[0] += 1
+        nbytes[0] += key.size + val.size
+        i += 1
+        ok = c.next(c)
+        if ok != ctkvdb.TKVDB_RES.TKVDB_OK:
+            return ok
+        if dest.mem(dest) >= mem_limit:
+            break
+    return ctkvdb.TKVDB_RES.TKVDB_OK
+
+
+cdef Py_ssize_t copy_items(Transaction src, Transaction dest,
+                           size_t mem_limit, progress) except -1:
+    """Copy all items of src transaction into dest transaction.
+
+    Items are copied by C loop with GIL released, dest is committed
+    when its memory reaches mem_limit or Param.TrLimit. Returns number
+    of copied items.
+    """
+    cdef BaseIterator it = src.items()
+    cdef ctkvdb.tkvdb_cursor *c
+    cdef ctkvdb.tkvdb_tr *dest_tr = dest.get_transaction()
+    cdef Py_ssize_t total = 0
+    cdef Py_ssize_t pending = 0
+    cdef Py_ssize_t done
+    cdef size_t nbytes = 0
+    cdef ctkvdb.TKVDB_RES ok
+    try:
+        if not it.step():
+            return 0
+        c = it.cursor.cursor
+        while True:
+            done = 0
+            src.release_views()
+            src.acquire()
+            dest.acquire()
+            with nogil:
+                src.lock_db()
+                dest.lock_db()
+                ok = _copy(c, dest_tr, PROGRESS_STEP, mem_limit, &done,
+                           &nbytes)
+                dest.unlock_db()
+                src.unlock_db()
+            dest.release()
+            src.release()
+            total += done
+            pending += done
+            if ok == ctkvdb.TKVDB_RES.TKVDB_ENOMEM and pending:
+                # Transaction limit is reached, retry in new one
+                dest.commit()
+                dest.begin()
+                pending = 0
+                continue
+            if ok != ctkvdb.TKVDB_RES.TKVDB_OK:
+                if (ok != ctkvdb.TKVDB_RES.TKVDB_NOT_FOUND
+                    and ok != ctkvdb.TKVDB_RES.TKVDB_EMPTY):
+                    raise make_error(ok)()
+                break
+            if dest.mem() >= mem_limit:
+                dest.commit()
+                dest.begin()
+                pending = 0
+            if progress is not None:
+                progress(total, nbytes)
+    finally:
+        it.cursor.free()
+    if progress is not None:
+        progress(total, nbytes)
+    return total
+
+
+def compact(Tkvdb db, dest_path=None, mem_limit=64 * 1024 * 1024,
+            progress=None):
+    """Copy committed state of database into new file.
+
+    Snapshot transaction is copied by cursor into new file in the same
+    directory, which then atomically replaces database file (database
+    is reopened and all its transactions are freed). If `dest_path`
+    is passed, compacted copy is written there and database is not
+    changed, existing non-empty `dest_path` isn't overwritten. Writes
+    are committed when transaction memory reaches `mem_limit`.
+    `progress(records, bytes)` is called periodically during copying.
+    RuntimeError is raised and file isn't replaced if database was
+    modified during compaction. Returns CompactStats.
+    """
+    cdef Transaction src
+    cdef Transaction dest
+    cdef Py_ssize_t records
+
+    if not db.is_opened:
+        raise RuntimeError('Database is closed')
+    # New file is opened with same params, but always for writing
+    values = dict(db.params.get_values())
+    values.pop(Param.DbfileOpenFlags, None)
+    params = Params(values)
+    start = time.perf_counter()
+    if dest_path is None:
+        if db.readonly:
+            raise PermissionError('Database is opened in read-only mode')
+        target = temp_file(db.path, '.compact')
+    else:
+        target = atomic_file(dest_path, suffix='.compact')
+    with target as path:
+        # File size is checked before snapshot, any commit after that
+        # changes it
+        old_size = os.path.getsize(db.path)
+        with db.transaction() as src:
+            with Tkvdb(path, params) as new_db:
+                with new_db.transaction() as dest:
+                    records = copy_items(src, dest, mem_limit, progress)
+                    dest.commit()
+                new_db.sync()
+        new_size = os.path.getsize(path)
+        if dest_path is None:
+            db.replace_file(path, old_size)
+    return CompactStats(records, old_size, new_size, old_size - new_size,
+                        time.perf_counter() - start)
@@ -0,0 +1,15 @@
+cimport ctkvdb
+
+
+cdef ctkvdb.tkvdb_params *tkvdb_params_create() noexcept nogil
+cdef void tkvdb_param_set(ctkvdb.tkvdb_params *params,
+                          ctkvdb.TKVDB_PARAM p,
+                          unsigned long long val) noexcept nogil
+cdef void tkvdb_params_free(ctkvdb.tkvdb_params *params) noexcept nogil
+cdef ctkvdb.tkvdb *tkvdb_open(const char *path,
+                              ctkvdb.tkvdb_params *params) noexcept nogil
+cdef ctkvdb.TKVDB_RES tkvdb_close(ctkvdb.tkvdb *db) noexcept nogil
+cdef ctkvdb.tkvdb_tr *tkvdb_tr_create(
+    ctkvdb.tkvdb *db, ctkvdb.tkvdb_params *params) noexcept nogil
+cdef ctkvdb.tkvdb_cursor *tkvdb_cursor_create(
+    ctkvdb.tkvdb_tr *tr) noexcept nogil
@@ -0,0 +1,41 @@
+"""Shared tkvdb C library.
+
+Only this extension is linked with tkvdb.c, other modules call library
+functions through it (`from tkvdb.core cimport ...`), so compiled C code
+isn't duplicated. Everything else (transaction and cursor methods) is
+called through function pointers of tkvdb structures.
+"""
+cimport ctkvdb
+
+
+cdef ctkvdb.tkvdb_params *tkvdb_params_create() noexcept nogil:
+    return ctkvdb.tkvdb_params_create()
+
+
+cdef void tkvdb_param_set(ctkvdb.tkvdb_params *params,
+                          ctkvdb.TKVDB_PARAM p,
+                          unsigned long long val) noexcept nogil:
+    ctkvdb.tkvdb_param_set(params, p, val)
+
+
+cdef void tkvdb_params_free(ctkvdb.tkvdb_params *params) noexcept nogil:
+    ctkvdb.tkvdb_params_free(params)
+
+
+cdef ctkvdb.tkvdb *tkvdb_open(const char *path,
+                              ctkvdb.tkvdb_params *params) noexcept nogil:
+    return ctkvdb.tkvdb_open(path, params)
+
+
+cdef ctkvdb.TKVDB_RES tkvdb_close(ctkvdb.tkvdb *db) noexcept nogil:
+    return ctkvdb.tkvdb_close(db)
+
+
+cdef ctkvdb.tkvdb_tr *tkvdb_tr_create(
+        ctkvdb.tkvdb *db, ctkvdb.tkvdb_params *params) noexcept nogil:
+    return ctkvdb.tkvdb_tr_create(db, params)
+
+
+cdef ctkvdb.tkvdb_cursor *tkvdb_cursor_create(
+        ctkvdb.tkvdb_tr *tr) noexcept nogil:
+    return ctkvdb.tkvdb_cursor_create(tr)
@@ -1,4 +1,4 @@
-cdef extern from "tkvdb.h":
+cdef extern from "tkvdb.h" nogil:
     cdef enum TKVDB_RES:
         TKVDB_OK = 0
         TKVDB_IO_ERROR
@@ -30,24 +30,24 @@ cdef extern from "tkvdb.h":
         pass
 
     ctypedef struct tkvdb_cursor:
-        void *(*key)(tkvdb_cursor *c);
-        size_t (*keysize)(tkvdb_cursor *c);
+        void *(*key)(tkvdb_cursor *c) nogil
+        size_t (*keysize)(tkvdb_cursor *c) nogil
 
-        void *(*val)(tkvdb_cursor *c);
-        size_t (*valsize)(tkvdb_cursor *c);
+        void *(*val)(tkvdb_cursor *c) nogil
+        size_t (*valsize)(tkvdb_cursor *c) nogil
 
-        tkvdb_datum (*key_datum)(tkvdb_cursor *c);
-        tkvdb_datum (*val_datum)(tkvdb_cursor *c);
+        tkvdb_datum (*key_datum)(tkvdb_cursor *c) nogil
+        tkvdb_datum (*val_datum)(tkvdb_cursor *c) nogil
 
         TKVDB_RES (*seek)(tkvdb_cursor *c,
-                          const tkvdb_datum *key, TKVDB_SEEK seek);
-        TKVDB_RES (*first)(tkvdb_cursor *c);
-        TKVDB_RES (*last)(tkvdb_cursor *c);
+                          const tkvdb_datum *key, TKVDB_SEEK seek) nogil
+        TKVDB_RES (*first)(tkvdb_cursor *c) nogil
+        TKVDB_RES (*last)(tkvdb_cursor *c) nogil
 
-        TKVDB_RES (*next)(tkvdb_cursor *c);
-        TKVDB_RES (*prev)(tkvdb_cursor *c);
+        TKVDB_RES (*next)(tkvdb_cursor *c) nogil
+        TKVDB_RES (*prev)(tkvdb_cursor *c) nogil
 
-        void (*free)(tkvdb_cursor *c);
+        void (*free)(tkvdb_cursor *c) nogil
         void *data;
 
 
@@ -59,19 +59,19 @@ cdef extern from "tkvdb.h":
         size_t size
 
     ctypedef struct tkvdb_tr:
-        TKVDB_RES (*begin)(tkvdb_tr *tr);
-        TKVDB_RES (*commit)(tkvdb_tr *tr);
-        TKVDB_RES (*rollback)(tkvdb_tr *tr);
+        TKVDB_RES (*begin)(tkvdb_tr *tr) nogil
+        TKVDB_RES (*commit)(tkvdb_tr *tr) nogil
+        TKVDB_RES (*rollback)(tkvdb_tr *tr) nogil
 
         TKVDB_RES (*put)(tkvdb_tr *tr,
-                         const tkvdb_datum *key, const tkvdb_datum *val);
+                         const tkvdb_datum *key, const tkvdb_datum *val) nogil
         TKVDB_RES (*get)(tkvdb_tr *tr,
-                         const tkvdb_datum *key, tkvdb_datum *val);
-        TKVDB_RES (*delete "del")(tkvdb_tr *tr, const tkvdb_datum *key, int del_pfx);
+                         const tkvdb_datum *key, tkvdb_datum *val) nogil
+        TKVDB_RES (*delete "del")(tkvdb_tr *tr, const tkvdb_datum *key, int del_pfx) nogil
 
-        size_t (*mem)(tkvdb_tr *tr);
+        size_t (*mem)(tkvdb_tr *tr) nogil
 
-        void (*free)(tkvdb_tr *tr);
+        void (*free)(tkvdb_tr *tr) nogil
 
         void *data;
 
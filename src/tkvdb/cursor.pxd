@@ -3,14 +3,26 @@ cimport tkvdb.transaction as tr
 from tkvdb.iterators cimport BaseIterator
 
 
+cdef enum CursorMove:
+    MOVE_FIRST
+    MOVE_LAST
+    MOVE_NEXT
+    MOVE_PREV
+
+
 cdef class Cursor:
     cdef ctkvdb.tkvdb_cursor* cursor
     cdef readonly tr.Transaction tr
     cdef readonly bint is_initialized
     cdef readonly bint is_started
 
-    cpdef bytes key(self)
-    cpdef bytes val(self)
+    cdef ctkvdb.TKVDB_RES call_move(self, int move) noexcept nogil
+    cdef ctkvdb.TKVDB_RES do_move(self, int move)
+    cdef int move(self, int move) except -1
+    cpdef key(self)
+    cpdef val(self)
+    cpdef key_view(self)
+    cpdef val_view(self)
     cpdef Py_ssize_t keysize(self)
     cpdef Py_ssize_t valsize(self)
     cpdef next(self)
@@ -18,7 +30,11 @@ cdef class Cursor:
     cpdef first(self)
     cpdef last(self)
     cpdef free(self)
-    cpdef seek(self, bytes key, seek)
-    cpdef BaseIterator items(self)
-    cpdef BaseIterator values(self)
-    cpdef BaseIterator keys(self)
+    cpdef reset(self)
+    cpdef seek(self, key, seek)
+    cdef int do_seek(self, key, ctkvdb.TKVDB_SEEK seek_type) except -1
+    cdef int compare_key(self, bytes other)
+    cpdef BaseIterator items(self, bint copy=*)
+    cpdef BaseIterator values(self, bint copy=*)
+    cpdef BaseIterator keys(self, bint copy=*)
+    cpdef list fetch(self, Py_ssize_t n, bint keys_only=*)
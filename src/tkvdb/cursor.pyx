@@ -1,9 +1,13 @@
 import enum
-from cpython.bytes cimport PyBytes_FromStringAndSize, PyBytes_AsStringAndSize
+from libc.string cimport memcmp
+from cpython.bytes cimport PyBytes_FromStringAndSize
 
 cimport ctkvdb
+from tkvdb.core cimport tkvdb_cursor_create
+from datum cimport Datum, datum_fill, datum_release
 from ctkvdb cimport TKVDB_SEEK as S
-from tkvdb.transaction cimport Transaction
+from tkvdb.transaction cimport Transaction, DeferredFree
+from tkvdb.stats cimport Stats, stats_start, OP_SEEK, OP_NEXT
 from tkvdb.iterators cimport KeysIterator, ItemsIterator, ValuesIterator
 from tkvdb.errors import make_error
 
@@ -19,37 +23,121 @@ cdef class Cursor:
     """Pythonic wrapper around tkvdb cursor."""
     def __cinit__(self, Transaction tr):
         self.is_started = False
+        tr.check()
         self.tr = tr
-        self.cursor = ctkvdb.tkvdb_cursor_create(
+        self.cursor = tkvdb_cursor_create(
             tr.get_transaction()
         )
         self.is_initialized = True
 
-    cpdef bytes key(self):
-        """Get current cursor key."""
+    cdef ctkvdb.TKVDB_RES call_move(self, int move) noexcept nogil:
+        """Call one of cursor move methods."""
+        if move == MOVE_FIRST:
+            return self.cursor.first(self.cursor)
+        elif move == MOVE_LAST:
+            return self.cursor.last(self.cursor)
+        elif move == MOVE_NEXT:
+            return self.cursor.next(self.cursor)
+        return self.cursor.prev(self.cursor)
+
+    cdef ctkvdb.TKVDB_RES do_move(self, int move):
+        """Move cursor, GIL is released for db-bound transaction.
+
+        Caller must mark transaction as busy.
+        """
+        cdef ctkvdb.TKVDB_RES ok
+        cdef Stats metrics = self.tr.metrics
+        cdef unsigned long long start
+        cdef int op = OP_NEXT if move >= MOVE_NEXT else OP_SEEK
+        if metrics is not None:
+            start = stats_start(metrics, op)
+        if self.tr.db_lock == NULL:
+            ok = self.call_move(move)
+        else:
+            with nogil:
+                self.tr.lock_db()
+                ok = self.call_move(move)
+                self.tr.unlock_db()
+        if metrics is not None:
+            if ok == ctkvdb.TKVDB_RES.TKVDB_OK:
+                metrics.record(op, start, ok, self.cursor.keysize(self.cursor),
+                               self.cursor.valsize(self.cursor))
+            else:
+                metrics.record(op, start, ok)
+        return ok
+
+    cdef int move(self, int move) except -1:
+        """Move cursor, return tkvdb code without raising."""
+        cdef ctkvdb.TKVDB_RES ok
+        self.tr.release_views()
+        self.tr.acquire()
+        ok = self.do_move(move)
+        self.tr.release()
+        return ok
+
+    cpdef key(self):
+        """Get current cursor key (decoded by key codec)."""
+        self.tr.check()
+        if self.tr.key_codec is not None:
+            return self.tr.key_codec.c_decode(
+                <char *>self.cursor.key(self.cursor), self.keysize()
+            )
         return PyBytes_FromStringAndSize(
-            <char *>self.cursor.key(self.cursor),
-            self.keysize()
+            <char *>self.cursor.key(self.cursor), self.keysize()
         )
 
-    cpdef bytes val(self):
-        """Get current cursor value."""
+    cpdef val(self):
+        """Get current cursor value (decoded by value codec)."""
+        self.tr.check()
+        if self.tr.value_codec is not None:
+            return self.tr.value_codec.c_decode(
+                <char *>self.cursor.val(self.cursor), self.valsize()
+            )
         return PyBytes_FromStringAndSize(
-            <char *>self.cursor.val(self.cursor),
-            self.valsize()
+            <char *>self.cursor.val(self.cursor), self.valsize()
         )
 
+    cpdef key_view(self):
+        """Get current cursor key as read-only memoryview without copy.
+
+        View is released when cursor moves or transaction is changed.
+        Key is not decoded by codec.
+        """
+        self.tr.check()
+        return self.tr.view(self.cursor.key(self.cursor), self.keysize())
+
+    cpdef val_view(self):
+        """Get current cursor value as read-only memoryview without copy.
+
+        View is released when cursor moves or transaction is changed.
+        Value is not decoded by codec.
+        """
+        self.tr.check()
+        return self.tr.view(self.cursor.val(self.cursor), self.valsize())
+
     cpdef Py_ssize_t keysize(self):
-        """Get current key size."""
+        """Get current key size (0 if cursor isn't positioned)."""
+        if not self.is_started:
+            return 0
         return self.cursor.keysize(self.cursor)
 
     cpdef Py_ssize_t valsize(self):
-        """Get current value size."""
+        """Get current value size (0 if cursor isn't positioned)."""
+        if not self.is_started:
+            return 0
         return self.cursor.valsize(self.cursor)
 
+    cpdef reset(self):
+        """Forget cursor position, first() or seek() is needed again.
+
+        Position refers to transaction nodes, so it must not be used
+        after transaction is rolled back or committed.
+        """
+        self.is_started = False
+
     cpdef next(self):
         """Call cursor next method."""
-        ok = self.cursor.next(self.cursor)
+        ok = self.move(MOVE_NEXT)
         if ok != ctkvdb.TKVDB_RES.TKVDB_OK:
             error = make_error(ok)
             if error is not None:
@@ -57,7 +145,7 @@ cdef class Cursor:
 
     cpdef prev(self):
         """Call cursor prev method."""
-        ok = self.cursor.prev(self.cursor)
+        ok = self.move(MOVE_PREV)
         if ok != ctkvdb.TKVDB_RES.TKVDB_OK:
             error = make_error(ok)
             if error is not None:
@@ -65,7 +153,7 @@ cdef class Cursor:
 
     cpdef first(self):
         """Call cursor first method."""
-        ok = self.cursor.first(self.cursor)
+        ok = self.move(MOVE_FIRST)
         if ok != ctkvdb.TKVDB_RES.TKVDB_OK:
             error = make_error(ok)
             if error is not None:
@@ -75,7 +163,7 @@ cdef class Cursor:
 
     cpdef last(self):
         """Call cursor last method."""
-        ok = self.cursor.last(self.cursor)
+        ok = self.move(MOVE_LAST)
         if ok != ctkvdb.TKVDB_RES.TKVDB_OK:
             error = make_error(ok)
             if error is not None:
@@ -84,29 +172,80 @@ cdef class Cursor:
             self.is_started = True
 
     cpdef free(self):
-        """Free cursor."""
+        """Free cursor.
+
+        If memoryviews derived from zero-copy views are still used,
+        cursor memory is freed after they are collected.
+        """
+        cdef DeferredFree keeper = None
         if self.is_initialized:
-            self.cursor.free(self.cursor)
+            if self.tr.buffers:
+                keeper = DeferredFree.__new__(DeferredFree)
+                if self.tr.release_views(keeper):
+                    keeper.cursor = self.cursor
+                else:
+                    keeper = None
+            if keeper is None:
+                if self.tr.is_initialized:
+                    self.tr.acquire()
+                    self.cursor.free(self.cursor)
+                    self.tr.release()
+                else:
+                    # Cursor memory doesn't depend on freed transaction
+                    self.cursor.free(self.cursor)
             self.is_initialized = False
             self.is_started = False
 
-    cpdef seek(self, bytes key, seek):
+    cpdef seek(self, key, seek):
         """Call cursor seek method with Seek param."""
-        # Create key
-        cdef ctkvdb.tkvdb_datum key_datum
-        PyBytes_AsStringAndSize(
-            key,
-            <char **>&key_datum.data,
-            <Py_ssize_t *>&key_datum.size
-        )
-
-        ok = self.cursor.seek(self.cursor, &key_datum, seek.value)
+        if self.tr.key_codec is not None:
+            key = self.tr.key_codec.c_encode(key)
+        ok = self.do_seek(key, seek.value)
         if ok != ctkvdb.TKVDB_RES.TKVDB_OK:
             error = make_error(ok)
             if error is not None:
                 raise error()
-        else:
+
+    cdef int do_seek(self, key, ctkvdb.TKVDB_SEEK seek_type) except -1:
+        """Seek cursor, return tkvdb code without raising."""
+        cdef Datum key_d
+        cdef ctkvdb.TKVDB_RES ok
+        cdef Stats metrics = self.tr.metrics
+        cdef unsigned long long start
+
+        datum_fill(&key_d, key)
+        try:
+            self.tr.release_views()
+            self.tr.acquire()
+            if metrics is not None:
+                start = stats_start(metrics, OP_SEEK)
+            if self.tr.db_lock == NULL:
+                ok = self.cursor.seek(self.cursor, &key_d.datum, seek_type)
+            else:
+                with nogil:
+                    self.tr.lock_db()
+                    ok = self.cursor.seek(self.cursor, &key_d.datum,
+                                          seek_type)
+                    self.tr.unlock_db()
+            if metrics is not None:
+                metrics.record(OP_SEEK, start, ok, key_d.datum.size)
+            self.tr.release()
+        finally:
+            datum_release(&key_d)
+        if ok == ctkvdb.TKVDB_RES.TKVDB_OK:
             self.is_started = True
+        return ok
+
+    cdef int compare_key(self, bytes other):
+        """Compare current key with bytes like memcmp."""
+        cdef size_t size = self.cursor.keysize(self.cursor)
+        cdef size_t other_size = len(other)
+        cdef int res = memcmp(self.cursor.key(self.cursor),
+                              <char *>other,
+                              min(size, other_size))
+        if res == 0:
+            return (size > other_size) - (size < other_size)
+        return res
 
     def __dealloc__(self):
         """Destructor."""
@@ -116,17 +255,23 @@ cdef class Cursor:
         """Return keys iterator as default iterator."""
         return self.keys()
 
-    cpdef BaseIterator items(self):
-        """Dict-like items iterator."""
-        return ItemsIterator(self)
+    cpdef BaseIterator items(self, bint copy=True):
+        """Dict-like items iterator, copy=False returns memoryviews."""
+        return ItemsIterator(self, copy=copy)
+
+    cpdef BaseIterator keys(self, bint copy=True):
+        """Dict-like keys iterator, copy=False returns memoryviews."""
+        return KeysIterator(self, copy=copy)
 
-    cpdef BaseIterator keys(self):
-        """Dict-like keys iterator."""
-        return KeysIterator(self)
+    cpdef BaseIterator values(self, bint copy=True):
+        """Dict-like values iterator, copy=False returns memoryviews."""
+        return ValuesIterator(self, copy=copy)
 
-    cpdef BaseIterator values(self):
-        """Dict-like values iterator."""
-        return ValuesIterator(self)
+    cpdef list fetch(self, Py_ssize_t n, bint keys_only=False):
+        """Return list of up to n next items (or keys) from cursor."""
+        if keys_only:
+            return KeysIterator(self).fetch(n)
+        return ItemsIterator(self).fetch(n)
 
     def __enter__(self):
         """Context manager enter."""
@@ -136,4 +281,3 @@ cdef class Cursor:
         """Context manager exit."""
         self.free()
 
-    # FIXME add key_datum/val_datum
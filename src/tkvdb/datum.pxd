@@ -0,0 +1,35 @@
+from cpython.buffer cimport PyObject_GetBuffer, PyBuffer_Release, PyBUF_SIMPLE
+from cpython.bytes cimport PyBytes_AS_STRING, PyBytes_GET_SIZE
+
+cimport ctkvdb
+
+
+cdef struct Datum:
+    ctkvdb.tkvdb_datum datum
+    Py_buffer buffer
+    bint is_buffer
+
+
+cdef inline int datum_fill(Datum *d, object obj) except -1:
+    """Point datum to object contents without copying.
+
+    Exact bytes are used directly, other objects must support
+    C-contiguous buffer protocol. Buffer is held until datum_release.
+    """
+    d.is_buffer = False
+    if type(obj) is bytes:
+        d.datum.data = PyBytes_AS_STRING(obj)
+        d.datum.size = PyBytes_GET_SIZE(obj)
+        return 0
+    PyObject_GetBuffer(obj, &d.buffer, PyBUF_SIMPLE)
+    d.is_buffer = True
+    d.datum.data = d.buffer.buf
+    d.datum.size = d.buffer.len
+    return 0
+
+
+cdef inline void datum_release(Datum *d):
+    """Release buffer acquired by datum_fill."""
+    if d.is_buffer:
+        PyBuffer_Release(&d.buffer)
+        d.is_buffer = False
@@ -1,6 +1,11 @@
+from cpython.pythread cimport PyThread_type_lock
+
 cimport ctkvdb
 from tkvdb.transaction cimport Transaction
 from tkvdb.params cimport Params
+from tkvdb.cache cimport ValueCache
+from tkvdb.codecs cimport Codec
+from tkvdb.stats cimport Stats
 
 
 cdef class Tkvdb:
@@ -8,8 +13,41 @@ cdef class Tkvdb:
     cdef readonly str path
     cdef readonly bint is_opened
     cdef Params params
+    cdef PyThread_type_lock lock
+    cdef readonly bint readonly
+    cdef readonly Codec key_codec
+    cdef readonly Codec value_codec
+    cdef readonly Stats metrics
+    cdef long pid
+    cdef object transactions
+    cdef object workers
+    cdef readonly object durability
+    cdef readonly Py_ssize_t sync_every
+    cdef readonly double sync_interval
+    cdef int sync_mode
+    cdef Py_ssize_t pending
+    cdef int sync_fd
+    cdef object sync_event
+    cdef object sync_stop
+    cdef object sync_thread
+    cdef object __weakref__
 
-    cpdef Transaction transaction(self, Params params=*)
+    cdef int open(self) except -1
+    cdef int open_file(self) except -1
+    cpdef replace_file(self, str path, object expected_size=*)
+    cpdef Transaction transaction(self, Params params=*,
+                                  ValueCache cache=*,
+                                  Codec key_codec=*,
+                                  Codec value_codec=*,
+                                  Stats metrics=*)
+    cdef set_metrics(self, Stats metrics)
+    cpdef reopen(self)
+    cdef int free_transactions(self) except -1
     cdef ctkvdb.tkvdb* get_db(self)
+    cdef PyThread_type_lock get_lock(self)
 
+    cpdef sync(self)
+    cpdef sync_pending(self)
+    cdef int on_commit(self) except -1
     cpdef close(self)
+    cdef int do_close(self) except -1
@@ -1,46 +1,435 @@
+import enum
 import os
 import sys
+import threading
+import weakref
+
+cimport libc.errno
+from cpython.pythread cimport (
+    PyThread_allocate_lock, PyThread_free_lock,
+    PyThread_acquire_lock, PyThread_release_lock, WAIT_LOCK
+)
 
 cimport ctkvdb
+from tkvdb.core cimport tkvdb_open, tkvdb_close
 from tkvdb.transaction cimport Transaction
-from tkvdb.errors import make_error
-from tkvdb.params import Params
+from tkvdb.errors import make_error, IoError
+from tkvdb.params import Params, Param
+from tkvdb.stats cimport Stats, stats_start, OP_OPEN
+
+
+class Durability(enum.Enum):
+    """When database file is synced to disk after commit."""
+    NEVER = 0  # Leave flushing to OS
+    COMMIT = 1  # Sync after every commit
+    GROUP = 2  # Sync in background after N commits or T milliseconds
+
+
+def _sync_worker(ref, event, stop, double interval):
+    """Background thread syncing database in GROUP mode.
+
+    Holds only weak reference to database, so it also stops after
+    database is collected.
+    """
+    timeout = interval / 1000 if interval > 0 else None
+    while True:
+        event.wait(timeout)
+        event.clear()
+        if stop.is_set():
+            return
+        db = ref()
+        if db is None:
+            return
+        db.sync_pending()
+        del db
+
+
+# Opened databases, their transactions are detached in child process
+_databases = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    """Detach transactions inherited from parent process."""
+    cdef Tkvdb db
+    cdef Transaction tr
+    for db in list(_databases):
+        for tr in list(db.transactions):
+            tr.detach()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
 
 
 cdef class Tkvdb:
     """Wrapper around tkvdb database with pythonic interface."""
-    def __cinit__(self, str path, Params params=None):
+    def __cinit__(self, str path, Params params=None,
+                  durability=Durability.NEVER, Py_ssize_t sync_every=0,
+                  double sync_interval=0, bint readonly=False,
+                  Codec key_codec=None, Codec value_codec=None,
+                  bint stats=False):
         self.path = path
+        if stats:
+            self.metrics = Stats()
+        self.key_codec = key_codec
+        self.value_codec = value_codec
+        self.sync_fd = -1
+        self.transactions = weakref.WeakSet()
+        # Writers and pools, they are closed before database
+        self.workers = weakref.WeakSet()
+        durability = Durability(durability)
+        if durability is Durability.GROUP:
+            if sync_every <= 0 and sync_interval <= 0:
+                raise ValueError(
+                    'sync_every or sync_interval is required for GROUP'
+                )
+        self.durability = durability
+        self.sync_mode = durability.value
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
         if params is None:
             params = Params()
-        self.db = ctkvdb.tkvdb_open(
-            os.fsencode(path),
-            params.get_params()
-        )
+        flags = params.get(Param.DbfileOpenFlags)
+        if readonly:
+            # Copy params to keep original ones unchanged
+            params = Params(params.get_values())
+            params.set(Param.DbfileOpenFlags, os.O_RDONLY)
+        elif flags is not None and flags & os.O_ACCMODE == os.O_RDONLY:
+            readonly = True
+        self.readonly = readonly
         self.params = params
+        self.lock = PyThread_allocate_lock()
+        if self.lock == NULL:
+            raise MemoryError()
+        self.open()
+        _databases.add(self)
+
+    cdef int open(self) except -1:
+        """Open database file, start sync thread if needed."""
+        self.open_file()
         self.is_opened = True
+        self.pid = os.getpid()
+
+        if self.sync_mode == Durability.GROUP.value:
+            self.sync_event = threading.Event()
+            self.sync_stop = threading.Event()
+            self.sync_thread = threading.Thread(
+                target=_sync_worker,
+                args=(weakref.ref(self), self.sync_event, self.sync_stop,
+                      self.sync_interval),
+                name='tkvdb-sync',
+                daemon=True
+            )
+            self.sync_thread.start()
+        return 0
+
+    cdef int open_file(self) except -1:
+        """Open underlying tkvdb database."""
+        cdef bytes path_bytes = os.fsencode(self.path)
+        cdef const char *path_ptr = path_bytes
+        cdef ctkvdb.tkvdb_params *params_ptr = self.params.get_params()
+        cdef unsigned long long start
+        if self.metrics is not None:
+            start = stats_start(self.metrics, OP_OPEN)
+        with nogil:
+            libc.errno.errno = 0
+            self.db = tkvdb_open(path_ptr, params_ptr)
+        if self.metrics is not None:
+            self.metrics.record(
+                OP_OPEN, start, ctkvdb.TKVDB_RES.TKVDB_OK if self.db != NULL
+                else ctkvdb.TKVDB_RES.TKVDB_IO_ERROR
+            )
+        if self.db == NULL:
+            code = libc.errno.errno
+            if code:
+                raise OSError(code, os.strerror(code), self.path)
+            raise IoError()
+        return 0
+
+    cpdef replace_file(self, str path, object expected_size=None):
+        """Atomically replace database file with other file and reopen.
+
+        Database is locked for the whole operation, so no commit may
+        happen between check and reopen. File isn't replaced and
+        RuntimeError is raised if size of current file differs from
+        `expected_size` (file grows on every commit). New file gets
+        mode and owner of database file. All transactions are freed,
+        nothing is changed if some of them is used by another thread.
+        """
+        from tkvdb.files import copy_mode, sync_dir
+        if not self.is_opened:
+            raise RuntimeError('Database is closed')
+        if self.readonly:
+            raise PermissionError('Database is opened in read-only mode')
+        with nogil:
+            PyThread_acquire_lock(self.lock, WAIT_LOCK)
+        try:
+            if (expected_size is not None
+                and os.path.getsize(self.path) != expected_size):
+                raise RuntimeError('Database was modified')
+            self.free_transactions()
+            copy_mode(self.path, path)
+            os.replace(path, self.path)
+            if self.sync_fd >= 0:
+                os.close(self.sync_fd)
+                self.sync_fd = -1
+            with nogil:
+                # Old file is already unlinked, close errors don't matter
+                tkvdb_close(self.db)
+            self.db = NULL
+            self.is_opened = False
+            self.open_file()
+            self.is_opened = True
+            self.pending = 0
+        finally:
+            PyThread_release_lock(self.lock)
+        # Make rename durable
+        sync_dir(self.path)
+
+    def compact(self, dest_path=None, mem_limit=64 * 1024 * 1024,
+                background=False, progress=None):
+        """Rewrite committed state of database into new compact file.
+
+        See tkvdb.compact.compact() for arguments. Returns
+        CompactStats, or concurrent.futures.Future of it if
+        `background` is True.
+        """
+        from tkvdb.compact import compact
+        if not background:
+            return compact(self, dest_path, mem_limit, progress)
+        # Imported here, it is slow and not needed by most programs
+        from concurrent.futures import Future
+        future = Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(compact(self, dest_path, mem_limit,
+                                          progress))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name='tkvdb-compact',
+                         daemon=True).start()
+        return future
 
     cdef ctkvdb.tkvdb* get_db(self):
         """Get underlying C database structure."""
         return self.db
 
-    cpdef Transaction transaction(self, Params params=None):
-        """Create transaction object."""
-        tr = Transaction(self, params=params, ram_only=False)
+    cdef PyThread_type_lock get_lock(self):
+        """Get lock serializing access to database file."""
+        return self.lock
+
+    cpdef Transaction transaction(self, Params params=None,
+                                  ValueCache cache=None,
+                                  Codec key_codec=None,
+                                  Codec value_codec=None,
+                                  Stats metrics=None):
+        """Create transaction object, optionally with value cache.
+
+        Transaction uses database codecs and metrics if they aren't
+        passed. Database is reopened automatically in child process
+        after fork.
+        """
+        if self.is_opened and self.pid != os.getpid():
+            self.reopen()
+        tr = Transaction(self, params=params, ram_only=False, cache=cache,
+                         key_codec=key_codec, value_codec=value_codec,
+                         metrics=metrics)
         return tr
 
+    def enable_stats(self, unsigned long long sample_rate=1):
+        """Start counting operations of database and its transactions.
+
+        Duration of every `sample_rate`-th operation of each type is
+        measured. Existing transactions without own metrics also start
+        counting.
+        """
+        metrics = Stats(sample_rate)
+        self.set_metrics(metrics)
+
+    def disable_stats(self):
+        """Stop counting operations, counters are dropped."""
+        self.set_metrics(None)
+
+    cdef set_metrics(self, Stats metrics):
+        """Replace metrics of database and transactions using them."""
+        cdef Transaction tr
+        for tr in list(self.transactions):
+            if tr.metrics is self.metrics:
+                tr.metrics = metrics
+        self.metrics = metrics
+
+    def set_trace_hook(self, callback, double threshold_us=0):
+        """Report operations slower than threshold to callback.
+
+        Stats are enabled if needed, see
+        tkvdb.stats.Stats.set_trace_hook() for callback arguments.
+        Passing None removes hook.
+        """
+        if self.metrics is None:
+            if callback is None:
+                return
+            self.enable_stats()
+        self.metrics.set_trace_hook(callback, threshold_us)
+
+    def stats(self):
+        """Return snapshot of database metrics (empty if disabled).
+
+        See tkvdb.stats.Stats.snapshot() for format.
+        """
+        if self.metrics is None:
+            return {}
+        return self.metrics.snapshot()
+
+    def reset_stats(self):
+        """Return snapshot of database metrics and reset them."""
+        result = self.stats()
+        if self.metrics is not None:
+            self.metrics.reset()
+        return result
+
+    def dump(self, fileobj, prefix=None, compress=None,
+             Py_ssize_t block_size=1024 * 1024):
+        """Write consistent snapshot of database to binary file object.
+
+        All items (or items with prefix) are written in single
+        transaction, see tkvdb.dump.dump() for arguments. Returns
+        number of written records.
+        """
+        from tkvdb.dump import dump
+        with self.transaction() as tr:
+            return dump(tr, fileobj, prefix, compress, block_size)
+
+    def transaction_pool(self, size=16, idle_timeout=60.0, params=None,
+                         **kwargs):
+        """Create pool of reusable transactions and cursors.
+
+        See tkvdb.pool.TransactionPool for arguments.
+        """
+        from tkvdb.pool import TransactionPool
+        pool = TransactionPool(self, size, idle_timeout, params, **kwargs)
+        self.workers.add(pool)
+        return pool
+
+    def writer(self, batch_size=1000, max_delay=0.01, sync=True,
+               queue_size=0, params=None):
+        """Start background group commit writer.
+
+        See tkvdb.writer.GroupWriter for arguments.
+        """
+        from tkvdb.writer import GroupWriter
+        writer = GroupWriter(self, batch_size, max_delay, sync, queue_size,
+                             params)
+        self.workers.add(writer)
+        return writer
+
+    cpdef reopen(self):
+        """Close database and open it again with same params.
+
+        Database handle (including file offset) and lock must not be
+        shared by processes after fork, so child process must reopen
+        database before using it. All transactions are freed, writers
+        and transaction pools are kept.
+        """
+        if self.pid != os.getpid():
+            # Lock may be held by thread of parent process, it can't be
+            # used or freed in child, so it is replaced
+            self.lock = PyThread_allocate_lock()
+            if self.lock == NULL:
+                raise MemoryError()
+        self.do_close()
+        self.open()
+
+    cpdef sync(self):
+        """Flush database file to disk (fsync)."""
+        if not self.is_opened:
+            raise RuntimeError('Database is closed')
+        if self.sync_fd < 0:
+            self.sync_fd = os.open(self.path, os.O_RDONLY)
+        # Commits made during fsync will be synced next time
+        self.pending = 0
+        os.fsync(self.sync_fd)
+
+    cpdef sync_pending(self):
+        """Sync database if there are unsynced commits."""
+        if self.pending > 0 and self.is_opened:
+            self.sync()
+
+    cdef int on_commit(self) except -1:
+        """Apply durability mode after transaction commit."""
+        if self.sync_mode == Durability.COMMIT.value:
+            self.sync()
+        elif self.sync_mode == Durability.GROUP.value:
+            self.pending += 1
+            if self.sync_every > 0 and self.pending >= self.sync_every:
+                self.sync_event.set()
+        return 0
+
+    cdef int free_transactions(self) except -1:
+        """Free all transactions or none if some of them is used."""
+        cdef Transaction tr
+        cdef list transactions = [tr for tr in self.transactions
+                                  if tr.is_initialized]
+        # Loops don't release GIL, so no transaction may be acquired
+        # by another thread between check and marking
+        for tr in transactions:
+            tr.check()
+        for tr in transactions:
+            tr.busy = True
+        for tr in transactions:
+            try:
+                tr.free_acquired()
+            finally:
+                tr.release()
+        return 0
+
     cpdef close(self):
-        """Close and free database."""
+        """Close and free database, all its transactions are freed.
+
+        Writers and transaction pools created by database are closed
+        first (queued writes are committed). RuntimeError is raised and
+        database stays opened if some transaction is still used by
+        another thread.
+        """
         if self.is_opened:
-            ok = ctkvdb.tkvdb_close(self.db)
+            for worker in list(self.workers):
+                worker.close()
+            self.do_close()
+
+    cdef int do_close(self) except -1:
+        """Free transactions, stop sync thread and close database file."""
+        cdef ctkvdb.TKVDB_RES ok
+        if self.is_opened:
+            self.free_transactions()
+            if self.sync_thread is not None:
+                # Stop worker and sync remaining commits
+                self.sync_stop.set()
+                self.sync_event.set()
+                if self.sync_thread is not threading.current_thread():
+                    self.sync_thread.join()
+                self.sync_thread = None
+                self.sync_pending()
+            if self.sync_fd >= 0:
+                os.close(self.sync_fd)
+                self.sync_fd = -1
+            with nogil:
+                PyThread_acquire_lock(self.lock, WAIT_LOCK)
+                ok = tkvdb_close(self.db)
+                PyThread_release_lock(self.lock)
             error = make_error(ok)
             if error is not None:
                 raise error()
             self.is_opened = False
+        return 0
 
     def __dealloc__(self):
         """Destructor."""
-        self.close()
+        if self.lock != NULL:
+            self.close()
+            PyThread_free_lock(self.lock)
 
     def __enter__(self):
         """Context manager enter."""
@@ -0,0 +1,346 @@
+"""Streaming dump and restore of database contents.
+
+Dump is a header followed by blocks of records. Header is magic bytes,
+format version and compression id. Every block has header with raw
+(uncompressed) size, stored size, number of records and CRC32 of raw
+data, followed by stored (optionally compressed) data. Record is a
+key size and a value size (unsigned LEB128 varints) followed by key
+and value. Last block has zero sizes and total number of records.
+"""
+import importlib
+import struct
+import zlib
+
+from libc.string cimport memcmp, memcpy
+from cpython.bytearray cimport PyByteArray_AS_STRING
+from cpython.bytes cimport PyBytes_AS_STRING, PyBytes_GET_SIZE
+
+cimport ctkvdb
+from tkvdb.iterators cimport BaseIterator
+from tkvdb.transaction cimport Transaction
+from tkvdb.db import Tkvdb
+from tkvdb.errors import make_error
+from tkvdb.files import atomic_file
+
+
+MAGIC = b'TKVDBDMP'
+VERSION = 1
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+
+_HEADER = struct.Struct('>8sBBxx')
+_BLOCK = struct.Struct('>QQQI')
+
+# Compression id in header and name of stdlib module
+COMPRESSIONS = {None: 0, 'zlib': 1, 'bz2': 2, 'lzma': 3}
+_COMPRESSION_NAMES = {v: k for k, v in COMPRESSIONS.items()}
+
+
+cdef enum:
+    # _unpack result for malformed record (outside of tkvdb codes)
+    UNPACK_CORRUPTED = 0x100
+
+
+cdef inline size_t _varint_size(size_t value) noexcept nogil:
+    """Return size of encoded varint."""
+    cdef size_t size = 1
+    while value >= 0x80:
+        value >>= 7
+        size += 1
+    return size
+
+
+cdef inline size_t _put_varint(unsigned char *p, size_t value) noexcept nogil:
+    """Write varint, return number of written bytes."""
+    cdef size_t i = 0
+    while value >= 0x80:
+        p[i] = <unsigned char>(value & 0x7f) | 0x80
+        value >>= 7
+        i += 1
+    p[i] = <unsigned char>value
+    return i + 1
+
+
+cdef inline bint _get_varint(const unsigned char *data, size_t size,
+                             size_t *pos, size_t *value) noexcept nogil:
+    """Read varint at pos, return False if it is malformed."""
+    cdef size_t result = 0
+    cdef unsigned int shift = 0
+    cdef unsigned char byte
+    while pos[0] < size and shift < 64:
+        byte = data[pos[0]]
+        pos[0] += 1
+        result |= <size_t>(byte & 0x7f) << shift
+        if byte < 0x80:
+            value[0] = result
+            return True
+        shift += 7
+    return False
+
+
+cdef inline size_t _record_size(ctkvdb.tkvdb_cursor *c) noexcept nogil:
+    """Return encoded size of current cursor item."""
+    cdef size_t key_size = c.keysize(c)
+    cdef size_t val_size = c.valsize(c)
+    return (_varint_size(key_size) + _varint_size(val_size)
+            + key_size + val_size)
+
+
+cdef inline bint _reached(ctkvdb.tkvdb_cursor *c, const char *bound,
+                          size_t bound_size) noexcept nogil:
+    """Check that current cursor key is not less than bound."""
+    cdef size_t size = c.keysize(c)
+    cdef int res = memcmp(c.key(c), bound, min(size, bound_size))
+    if res == 0:
+        return size >= bound_size
+    return res > 0
+
+
+cdef ctkvdb.TKVDB_RES _pack(ctkvdb.tkvdb_cursor *c, const char *bound,
+                            size_t bound_size, unsigned char *buf,
+                            size_t size, size_t *used,
+                            Py_ssize_t *count) noexcept nogil:
+    """Encode records starting from current item while they fit buf.
+
+    Returns TKVDB_OK if buffer is full (current item isn't encoded),
+    TKVDB_NOT_FOUND when key is out of range or other tkvdb code.
+    """
+    cdef ctkvdb.TKVDB_RES ok
+    cdef size_t key_size
+    cdef size_t val_size
+    cdef unsigned char *p
+    while True:
+        if used[0] + _record_size(c) > size:
+            return ctkvdb.TKVDB_RES.TKVDB_OK
+        key_size = c.keysize(c)
+        val_size = c.valsize(c)
+        p = buf + used[0]
+        p += _put_varint(p, key_size)
+        p += _put_varint(p, val_size)
+        memcpy(p, c.key(c), key_size)
+        memcpy(p + key_size, c.val(c), val_size)
+        used[0] = p - buf + key_size + val_size
+        count[0] += 1
+        ok = c.next(c)
+        if ok != ctkvdb.TKVDB_RES.TKVDB_OK:
+            return ok
+        if bound != NULL and _reached(c, bound, bound_size):
+            return ctkvdb.TKVDB_RES.TKVDB_NOT_FOUND
+
+
+cdef int _unpack(ctkvdb.tkvdb_tr *tr, const unsigned char *data,
+                 size_t size, size_t *pos, Py_ssize_t *done) noexcept nogil:
+    """Put records of raw block data starting from pos.
+
+    Returns tkvdb code or UNPACK_CORRUPTED, `pos` and `done` point
+    after the last successfully put record.
+    """
+    cdef ctkvdb.TKVDB_RES ok
+    cdef ctkvdb.tkvdb_datum key
+    cdef ctkvdb.tkvdb_datum val
+    cdef size_t p
+    while pos[0] < size:
+        p = pos[0]
+        if (not _get_varint(data, size, &p, &key.size)
+            or not _get_varint(data, size, &p, &val.size)
+            or key.size > size - p or val.size > size - p - key.size):
+            return UNPACK_CORRUPTED
+        key.data = <void *>(data + p)
+        val.data = <void *>(data + p + key.size)
+        ok = tr.put(tr, &key, &val)
+        if ok != ctkvdb.TKVDB_RES.TKVDB_OK:
+            return ok
+        pos[0] = p + key.size + val.size
+        done[0] += 1
+    return ctkvdb.TKVDB_RES.TKVDB_OK
+
+
+cdef _compression_module(compress):
+    """Return stdlib compression module by name (None if not used)."""
+    if compress not in COMPRESSIONS:
+        raise ValueError('Unknown compression {!r}'.format(compress))
+    if compress is None:
+        return None
+    return importlib.import_module(compress)
+
+
+cdef _write_block(fileobj, compressor, data, Py_ssize_t count):
+    """Write single block of raw data."""
+    crc = zlib.crc32(data)
+    stored = compressor.compress(data) if compressor is not None else data
+    fileobj.write(_BLOCK.pack(len(data), len(stored), count, crc))
+    fileobj.write(stored)
+
+
+def dump(Transaction tr, fileobj, prefix=None, compress=None,
+         Py_ssize_t block_size=DEFAULT_BLOCK_SIZE):
+    """Write all items of transaction (or items with prefix) to file.
+
+    `fileobj` is a binary file-like object with write() method,
+    `compress` is None or name of stdlib compression module ('zlib',
+    'bz2' or 'lzma'). Records are encoded in blocks of `block_size`
+    bytes by C loop with GIL released, block is increased only for
+    larger records. Keys and values are raw bytes, codecs are not
+    used. Returns number of written records.
+    """
+    cdef BaseIterator it
+    cdef ctkvdb.tkvdb_cursor *c
+    cdef bytes bound
+    cdef const char *bound_ptr = NULL
+    cdef size_t bound_size = 0
+    cdef bytearray buf
+    cdef unsigned char *buf_ptr
+    cdef size_t size
+    cdef size_t used
+    cdef Py_ssize_t count
+    cdef Py_ssize_t total = 0
+    cdef ctkvdb.TKVDB_RES ok = ctkvdb.TKVDB_RES.TKVDB_OK
+
+    if block_size <= 0:
+        raise ValueError('block_size must be positive')
+    compressor = _compression_module(compress)
+    fileobj.write(_HEADER.pack(MAGIC, VERSION, COMPRESSIONS[compress]))
+
+    it = tr.items(prefix)
+    try:
+        if it.step():
+            c = it.cursor.cursor
+            bound = it.stop
+            if bound is not None:
+                bound_ptr = bound
+                bound_size = len(bound)
+            size = block_size
+            buf = bytearray(size)
+            while True:
+                used = count = 0
+                buf_ptr = <unsigned char *>PyByteArray_AS_STRING(buf)
+                tr.release_views()
+                tr.acquire()
+                with nogil:
+                    tr.lock_db()
+                    ok = _pack(c, bound_ptr, bound_size, buf_ptr, size,
+                               &used, &count)
+                    tr.unlock_db()
+                tr.release()
+                if count == 0 and ok == ctkvdb.TKVDB_RES.TKVDB_OK:
+                    # Record doesn't fit into block
+                    size = _record_size(c)
+                    buf = bytearray(size)
+                    continue
+                with memoryview(buf) as view:
+                    _write_block(fileobj, compressor, view[:used], count)
+                total += count
+                if ok != ctkvdb.TKVDB_RES.TKVDB_OK:
+                    break
+                if size > <size_t>block_size:
+                    size = block_size
+                    buf = bytearray(size)
+    finally:
+        it.cursor.free()
+
+    if (ok != ctkvdb.TKVDB_RES.TKVDB_OK
+        and ok != ctkvdb.TKVDB_RES.TKVDB_NOT_FOUND
+        and ok != ctkvdb.TKVDB_RES.TKVDB_EMPTY):
+        raise make_error(ok)()
+    fileobj.write(_BLOCK.pack(0, 0, total, 0))
+    return total
+
+
+cdef bytes _read(fileobj, Py_ssize_t size):
+    """Read exactly size bytes, fail on truncated dump."""
+    data = fileobj.read(size)
+    if len(data) != size:
+        raise ValueError('Dump is truncated')
+    return bytes(data)
+
+
+cdef int _restore_block(Transaction tr, bytes data, Py_ssize_t count,
+                        bint *pending) except -1:
+    """Put records of raw block, commit if transaction memory is full."""
+    cdef const unsigned char *data_ptr = (
+        <unsigned char *>PyBytes_AS_STRING(data)
+    )
+    cdef size_t size = PyBytes_GET_SIZE(data)
+    cdef size_t pos = 0
+    cdef Py_ssize_t done = 0
+    cdef int ok
+    while True:
+        tr.release_views()
+        tr.acquire()
+        with nogil:
+            tr.lock_db()
+            ok = _unpack(tr.tr, data_ptr, size, &pos, &done)
+            tr.unlock_db()
+        tr.release()
+        if pos > 0:
+            tr.is_changed = True
+            pending[0] = True
+        if ok == ctkvdb.TKVDB_RES.TKVDB_ENOMEM and pending[0]:
+            # Transaction limit is reached, continue in new one
+            tr.commit()
+            tr.begin()
+            pending[0] = False
+            continue
+        break
+    if ok == UNPACK_CORRUPTED or (ok == ctkvdb.TKVDB_RES.TKVDB_OK
+                                  and done != count):
+        raise ValueError('Dump block is corrupted')
+    if ok != ctkvdb.TKVDB_RES.TKVDB_OK:
+        raise make_error(ok)()
+    return 0
+
+
+def restore(fileobj, path, params=None, mem_limit=64 * 1024 * 1024,
+            overwrite=False, **kwargs):
+    """Create database file from dump written by dump().
+
+    Blocks are verified by checksum and records are put by C loop with
+    GIL released. Transaction is committed when its memory reaches
+    `mem_limit` or `Param.TrLimit` of params, so memory usage is
+    bounded. Database is restored into temporary file which replaces
+    `path` after it is synced, so existing file is kept if restore
+    fails. Existing non-empty file is replaced only if `overwrite` is
+    True. Other keyword arguments are passed to Tkvdb. Returns number of
+    restored records, ValueError is raised for malformed dump.
+    """
+    cdef Transaction tr
+    cdef Py_ssize_t total = 0
+    cdef bint pending = False
+
+    magic, version, compression = _HEADER.unpack(_read(fileobj,
+                                                       _HEADER.size))
+    if magic != MAGIC:
+        raise ValueError('Not a tkvdb dump')
+    if version != VERSION:
+        raise ValueError('Unsupported dump version {}'.format(version))
+    if compression not in _COMPRESSION_NAMES:
+        raise ValueError('Unknown compression id {}'.format(compression))
+    compressor = _compression_module(_COMPRESSION_NAMES[compression])
+
+    with atomic_file(path, overwrite) as tmp:
+        with Tkvdb(tmp, params, **kwargs) as db:
+            with db.transaction() as tr:
+                while True:
+                    raw_size, stored_size, count, crc = _BLOCK.unpack(
+                        _read(fileobj, _BLOCK.size)
+                    )
+                    if raw_size == 0:
+                        if count != total:
+                            raise ValueError(
+                                'Dump has {} records instead of {}'
+                                .format(total, count)
+                            )
+                        break
+                    data = _read(fileobj, stored_size)
+                    if compressor is not None:
+                        data = compressor.decompress(data)
+                    if len(data) != raw_size or zlib.crc32(data) != crc:
+                        raise ValueError('Dump block checksum mismatch')
+                    _restore_block(tr, data, count, &pending)
+                    total += count
+                    if tr.mem() >= mem_limit:
+                        tr.commit()
+                        tr.begin()
+                        pending = False
+                tr.commit()
+            db.sync()
+    return total
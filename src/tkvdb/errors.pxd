@@ -4,6 +4,7 @@ from ctkvdb cimport TKVDB_RES
 cdef class Error(Exception):
     cdef readonly str name
     cdef readonly int code
+    cdef readonly object index
 
 
 cdef class IoError(Error):
@@ -6,8 +6,12 @@ cdef class Error(Exception):
     def __cinit__(self, *args, **kwargs):
         self.name = 'Error'
         self.code = -1
+        self.index = None
 
     def __str__(self):
+        if self.index is not None:
+            # Batch operations report position of the failed item
+            return '{} (item {})'.format(self.name, self.index)
         return str(self.name)   # FIXME
 
 # Repeatable, but Cython doesn't allow easy metaprogramming
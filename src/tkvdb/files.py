@@ -0,0 +1,79 @@
+"""Atomic creation of database files.
+
+New database is written into temporary file in the same directory,
+which replaces target path only after it is completely written and
+synced. If writing fails, only temporary file is removed and previous
+database stays untouched.
+"""
+import contextlib
+import errno
+import os
+import stat
+import tempfile
+
+
+def check_target(path, overwrite=False):
+    """Raise FileExistsError if non-empty file exists at path."""
+    if (not overwrite and os.path.exists(path)
+            and os.path.getsize(path)):
+        raise FileExistsError(errno.EEXIST, 'Database file exists', path)
+
+
+def copy_mode(src, dest):
+    """Copy permissions (and owner if possible) of src file to dest.
+
+    Temporary files are created with 0600 mode, so file replacing
+    existing database gets its mode.
+    """
+    st = os.stat(src)
+    os.chmod(dest, stat.S_IMODE(st.st_mode))
+    if hasattr(os, 'chown'):
+        try:
+            os.chown(dest, st.st_uid, st.st_gid)
+        except PermissionError:
+            # Only root can give file away, mode is kept anyway
+            pass
+
+
+def sync_dir(path):
+    """Sync directory containing path, so rename is durable."""
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextlib.contextmanager
+def temp_file(path, suffix='.tmp'):
+    """Create empty hidden temporary file next to path, yield its name.
+
+    File is removed if block fails (or if it still exists after block).
+    """
+    fd, tmp = tempfile.mkstemp(
+        prefix='.{}.'.format(os.path.basename(path)), suffix=suffix,
+        dir=os.path.dirname(os.path.abspath(path))
+    )
+    os.close(fd)
+    try:
+        yield tmp
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+@contextlib.contextmanager
+def atomic_file(path, overwrite=False, suffix='.tmp'):
+    """Yield name of temporary file which replaces path on success.
+
+    FileExistsError is raised before block if non-empty file exists at
+    path and `overwrite` is False. Block must close and sync file.
+    Mode of replaced file is kept.
+    """
+    check_target(path, overwrite)
+    with temp_file(path, suffix) as tmp:
+        yield tmp
+        if os.path.exists(path):
+            copy_mode(path, tmp)
+        os.replace(tmp, path)
+    sync_dir(path)
@@ -4,19 +4,31 @@ from tkvdb.cursor cimport Cursor
 cdef class BaseIterator:
     cdef Cursor cursor
     cdef readonly bint reverse
-
+    cdef readonly bytes start
+    cdef readonly bytes stop
+    cdef readonly bint copy
+    cdef bint finished
+
+    cdef bint step(self) except -1
+    cdef int seek_start(self) except -1
+    cdef bint in_range(self)
     cpdef value(self)
+    cpdef list fetch(self, Py_ssize_t n)
+    cpdef Py_ssize_t skip(self, Py_ssize_t n) except -1
+    cdef Py_ssize_t fill(self, char *keys, size_t key_size, char *vals,
+                         size_t val_size, Py_ssize_t n) except -1
+    cdef current(self)
     cpdef _iter(self)
     cpdef _start(self)
 
 
 cdef class KeysIterator(BaseIterator):
-    pass
+    cdef current(self)
 
 
 cdef class ItemsIterator(BaseIterator):
-    pass
+    cdef current(self)
 
 
 cdef class ValuesIterator(BaseIterator):
-    pass
+    cdef current(self)
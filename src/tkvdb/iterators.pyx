@@ -1,13 +1,150 @@
+from libc.string cimport memcmp, memcpy
+from cpython.bytes cimport PyBytes_FromStringAndSize
+from cpython.pythread cimport (
+    PyThread_type_lock, PyThread_acquire_lock, PyThread_release_lock,
+    WAIT_LOCK
+)
+
 cimport ctkvdb
-from tkvdb.cursor cimport Cursor
-from tkvdb.errors cimport EmptyError, NotFoundError
+from tkvdb.cursor cimport (
+    Cursor, MOVE_FIRST, MOVE_LAST, MOVE_NEXT, MOVE_PREV
+)
+from tkvdb.errors import make_error
+from tkvdb.stats cimport OP_NEXT
+
+
+cpdef bytes prefix_end(bytes prefix):
+    """Return smallest key greater than all keys with prefix.
+
+    Returns None if there is no such key (prefix is empty or consists
+    of 0xff bytes only).
+    """
+    cdef bytes stripped = prefix.rstrip(b'\xff')
+    if not stripped:
+        return None
+    return stripped[:-1] + bytes((stripped[-1] + 1,))
+
+
+cdef inline int _compare(ctkvdb.tkvdb_cursor *c, const char *other,
+                         size_t other_size) noexcept nogil:
+    """Compare current cursor key with other key like memcmp."""
+    cdef size_t size = c.keysize(c)
+    cdef int res = memcmp(c.key(c), other, min(size, other_size))
+    if res == 0:
+        return (size > other_size) - (size < other_size)
+    return res
+
+
+cdef ctkvdb.TKVDB_RES _skip(ctkvdb.tkvdb_cursor *c, bint reverse,
+                            const char *bound, size_t bound_size,
+                            Py_ssize_t n, Py_ssize_t *moved) noexcept nogil:
+    """Move cursor up to n times while key is inside range.
+
+    Returns TKVDB_NOT_FOUND when key is out of range, `moved` is
+    increased for every move to the key inside range.
+    """
+    cdef ctkvdb.TKVDB_RES ok = ctkvdb.TKVDB_RES.TKVDB_OK
+    while moved[0] < n:
+        if reverse:
+            ok = c.prev(c)
+        else:
+            ok = c.next(c)
+        if ok != ctkvdb.TKVDB_RES.TKVDB_OK:
+            return ok
+        if bound != NULL:
+            if reverse and _compare(c, bound, bound_size) < 0:
+                return ctkvdb.TKVDB_RES.TKVDB_NOT_FOUND
+            if not reverse and _compare(c, bound, bound_size) >= 0:
+                return ctkvdb.TKVDB_RES.TKVDB_NOT_FOUND
+        moved[0] += 1
+    return ok
+
+
+cdef enum:
+    # _fill result for key or value of wrong size (outside of tkvdb codes)
+    FILL_SIZE_MISMATCH = 0x100
+
+
+cdef int _fill(ctkvdb.tkvdb_cursor *c, bint reverse, const char *bound,
+               size_t bound_size, bint move_first, char *keys,
+               size_t key_size, char *vals, size_t val_size, Py_ssize_t n,
+               Py_ssize_t *done) noexcept nogil:
+    """Copy up to n fixed-size keys and values to row buffers.
+
+    Copying starts from current item if `move_first` is false.
+    Returns tkvdb code (TKVDB_NOT_FOUND when key is out of range) or
+    FILL_SIZE_MISMATCH, `done` is increased for every copied row.
+    """
+    cdef ctkvdb.TKVDB_RES ok
+    while done[0] < n:
+        if move_first:
+            if reverse:
+                ok = c.prev(c)
+            else:
+                ok = c.next(c)
+            if ok != ctkvdb.TKVDB_RES.TKVDB_OK:
+                return ok
+            if bound != NULL:
+                if reverse and _compare(c, bound, bound_size) < 0:
+                    return ctkvdb.TKVDB_RES.TKVDB_NOT_FOUND
+                if not reverse and _compare(c, bound, bound_size) >= 0:
+                    return ctkvdb.TKVDB_RES.TKVDB_NOT_FOUND
+        move_first = True
+        if keys != NULL:
+            if c.keysize(c) != key_size:
+                return FILL_SIZE_MISMATCH
+            memcpy(keys + done[0] * key_size, c.key(c), key_size)
+        if vals != NULL:
+            if c.valsize(c) != val_size:
+                return FILL_SIZE_MISMATCH
+            memcpy(vals + done[0] * val_size, c.val(c), val_size)
+        done[0] += 1
+    return ctkvdb.TKVDB_RES.TKVDB_OK
+
+
+cdef inline bytes _as_bytes(obj):
+    """Convert range boundary (any buffer object) to bytes."""
+    if obj is None or type(obj) is bytes:
+        return obj
+    return bytes(memoryview(obj))
 
 
 cdef class BaseIterator:
-    """Base class for all iterators."""
-    def __init__(self, cursor, reverse=False):
+    """Base class for all iterators.
+
+    Iteration may be limited by `start` (inclusive) and `stop`
+    (exclusive) keys and by key `prefix`. Cursor is positioned by
+    single seek and iteration stops at the first key out of range.
+    With `copy` set to False iterator returns read-only memoryviews
+    valid until the next iteration step. Keys and values are decoded
+    by transaction codecs, `start` and `stop` are encoded by key codec
+    and `prefix` is always raw bytes.
+    """
+    def __init__(self, cursor, reverse=False, prefix=None, start=None,
+                 stop=None, copy=True):
         self.cursor = cursor
         self.reverse = reverse
+        self.copy = copy
+        self.finished = False
+        codec = self.cursor.tr.key_codec
+        if codec is not None:
+            # Prefix is raw bytes, it is usually not a complete key
+            if start is not None:
+                start = codec.c_encode(start)
+            if stop is not None:
+                stop = codec.c_encode(stop)
+        prefix = _as_bytes(prefix)
+        start = _as_bytes(start)
+        stop = _as_bytes(stop)
+        if prefix is not None:
+            # Prefix is just a range [prefix, prefix_end)
+            end = prefix_end(prefix)
+            if start is None or start < prefix:
+                start = prefix
+            if end is not None and (stop is None or stop > end):
+                stop = end
+        self.start = start
+        self.stop = stop
 
     def __iter__(self):
         return self
@@ -30,35 +167,267 @@ cdef class BaseIterator:
         else:
             self.cursor.first()
 
+    cdef bint step(self) except -1:
+        """Move cursor to next item, return False at the end.
+
+        End of data is detected by result code, so no exception is
+        created for it.
+        """
+        cdef int ok
+        if self.finished:
+            return False
+        if not self.cursor.is_started:
+            ok = self.seek_start()
+        else:
+            ok = self.cursor.move(MOVE_PREV if self.reverse else MOVE_NEXT)
+
+        if ok == ctkvdb.TKVDB_RES.TKVDB_OK:
+            if self.in_range():
+                return True
+        elif (ok != ctkvdb.TKVDB_RES.TKVDB_NOT_FOUND
+              and ok != ctkvdb.TKVDB_RES.TKVDB_EMPTY):
+            raise make_error(ok)()
+        self.finished = True
+        return False
+
+    cdef int seek_start(self) except -1:
+        """Put cursor to the first item of range, return tkvdb code."""
+        cdef int ok
+        if self.reverse:
+            if self.stop is None:
+                ok = self.cursor.move(MOVE_LAST)
+            else:
+                # Find first key after range and step back from it
+                ok = self.cursor.do_seek(self.stop,
+                                         ctkvdb.TKVDB_SEEK.TKVDB_SEEK_GE)
+                if ok == ctkvdb.TKVDB_RES.TKVDB_OK:
+                    ok = self.cursor.move(MOVE_PREV)
+                elif ok == ctkvdb.TKVDB_RES.TKVDB_NOT_FOUND:
+                    ok = self.cursor.move(MOVE_LAST)
+        else:
+            if self.start is None:
+                ok = self.cursor.move(MOVE_FIRST)
+            else:
+                ok = self.cursor.do_seek(self.start,
+                                         ctkvdb.TKVDB_SEEK.TKVDB_SEEK_GE)
+        if ok == ctkvdb.TKVDB_RES.TKVDB_OK:
+            self.cursor.is_started = True
+        return ok
+
+    cdef bint in_range(self):
+        """Check that current cursor key is inside iteration range."""
+        if self.reverse:
+            return (self.start is None
+                    or self.cursor.compare_key(self.start) >= 0)
+        return self.stop is None or self.cursor.compare_key(self.stop) < 0
+
     def __next__(self):
         """Call cursor first or next."""
-        try:
-            if not self.cursor.is_started:
-                self._start()
-            else:
-                self._iter()
+        if self.step():
             return self.value()
-        except (EmptyError, NotFoundError):
-            raise StopIteration()
+        raise StopIteration
+
+    cpdef list fetch(self, Py_ssize_t n):
+        """Return list of up to n next values, empty list at the end.
+
+        Transaction is locked once for the whole chunk and values are
+        created directly from cursor buffers.
+        """
+        cdef list result = []
+        cdef Py_ssize_t i = 0
+        cdef int move = MOVE_PREV if self.reverse else MOVE_NEXT
+        cdef ctkvdb.TKVDB_RES ok
+
+        if n <= 0 or self.finished:
+            return result
+        if not self.cursor.is_started:
+            # Initial seek is done only once, no need for fast path
+            if not self.step():
+                return result
+            result.append(self.current())
+            i += 1
+
+        self.cursor.tr.release_views()
+        self.cursor.tr.acquire()
+        try:
+            while i < n:
+                ok = self.cursor.do_move(move)
+                if ok != ctkvdb.TKVDB_RES.TKVDB_OK:
+                    if (ok != ctkvdb.TKVDB_RES.TKVDB_NOT_FOUND
+                        and ok != ctkvdb.TKVDB_RES.TKVDB_EMPTY):
+                        raise make_error(ok)()
+                    self.finished = True
+                    break
+                if not self.in_range():
+                    self.finished = True
+                    break
+                result.append(self.current())
+                i += 1
+        finally:
+            self.cursor.tr.release()
+        return result
+
+    cpdef Py_ssize_t skip(self, Py_ssize_t n) except -1:
+        """Skip up to n next values, return number of skipped values.
+
+        Same as calling next() n times, but cursor is moved by C loop
+        with GIL released and no values are created. Returned number
+        less than n means end of range.
+        """
+        cdef ctkvdb.tkvdb_cursor *c = self.cursor.cursor
+        cdef PyThread_type_lock lock = self.cursor.tr.db_lock
+        cdef bytes bound = self.start if self.reverse else self.stop
+        cdef const char *bound_ptr = NULL
+        cdef size_t bound_size = 0
+        cdef Py_ssize_t moved = 0
+        cdef ctkvdb.TKVDB_RES ok
+
+        if n <= 0 or self.finished:
+            return 0
+        if not self.cursor.is_started:
+            if not self.step():
+                return 0
+            moved = 1
+        if bound is not None:
+            bound_ptr = bound
+            bound_size = len(bound)
+
+        self.cursor.tr.release_views()
+        self.cursor.tr.acquire()
+        try:
+            with nogil:
+                if lock != NULL:
+                    PyThread_acquire_lock(lock, WAIT_LOCK)
+                ok = _skip(c, self.reverse, bound_ptr, bound_size, n,
+                           &moved)
+                if lock != NULL:
+                    PyThread_release_lock(lock)
+        finally:
+            self.cursor.tr.release()
+        if self.cursor.tr.metrics is not None:
+            self.cursor.tr.metrics.add(OP_NEXT, moved)
+        if ok != ctkvdb.TKVDB_RES.TKVDB_OK:
+            if (ok != ctkvdb.TKVDB_RES.TKVDB_NOT_FOUND
+                and ok != ctkvdb.TKVDB_RES.TKVDB_EMPTY):
+                raise make_error(ok)()
+            self.finished = True
+        return moved
+
+    cdef Py_ssize_t fill(self, char *keys, size_t key_size, char *vals,
+                         size_t val_size, Py_ssize_t n) except -1:
+        """Copy up to n next keys and values to arrays of fixed-size rows.
+
+        Keys (or values) are not copied if pointer is NULL. Rows are
+        copied in C loop with GIL released, ValueError is raised if
+        size of key or value differs from row size. Returns number of
+        copied rows, codecs are not used.
+        """
+        cdef ctkvdb.tkvdb_cursor *c = self.cursor.cursor
+        cdef PyThread_type_lock lock = self.cursor.tr.db_lock
+        cdef bytes bound = self.start if self.reverse else self.stop
+        cdef const char *bound_ptr = NULL
+        cdef size_t bound_size = 0
+        cdef bint move_first = True
+        cdef Py_ssize_t done = 0
+        cdef int ok
+
+        if n <= 0 or self.finished:
+            return 0
+        if not self.cursor.is_started:
+            if not self.step():
+                return 0
+            move_first = False
+        if bound is not None:
+            bound_ptr = bound
+            bound_size = len(bound)
+
+        self.cursor.tr.release_views()
+        self.cursor.tr.acquire()
+        try:
+            with nogil:
+                if lock != NULL:
+                    PyThread_acquire_lock(lock, WAIT_LOCK)
+                ok = _fill(c, self.reverse, bound_ptr, bound_size,
+                           move_first, keys, key_size, vals, val_size, n,
+                           &done)
+                if lock != NULL:
+                    PyThread_release_lock(lock)
+        finally:
+            self.cursor.tr.release()
+        if self.cursor.tr.metrics is not None:
+            self.cursor.tr.metrics.add(OP_NEXT, done)
+        if ok == FILL_SIZE_MISMATCH:
+            if keys != NULL and c.keysize(c) != key_size:
+                raise ValueError('Key size {} differs from row size {}'
+                                 .format(c.keysize(c), key_size))
+            raise ValueError('Value size {} differs from row size {}'
+                             .format(c.valsize(c), val_size))
+        if ok != ctkvdb.TKVDB_RES.TKVDB_OK:
+            if (ok != ctkvdb.TKVDB_RES.TKVDB_NOT_FOUND
+                and ok != ctkvdb.TKVDB_RES.TKVDB_EMPTY):
+                raise make_error(ok)()
+            self.finished = True
+        return done
+
+    cdef current(self):
+        """Create current value from cursor without checks."""
+        raise NotImplementedError()
 
     cpdef value(self):
         """Return current value depending on implementation."""
         raise NotImplementedError()
 
 
+cdef inline object _key(Cursor cursor):
+    """Copy current cursor key to bytes or decode it."""
+    cdef ctkvdb.tkvdb_cursor *c = cursor.cursor
+    if cursor.tr.key_codec is not None:
+        return cursor.tr.key_codec.c_decode(<char *>c.key(c), c.keysize(c))
+    return PyBytes_FromStringAndSize(<char *>c.key(c), c.keysize(c))
+
+
+cdef inline object _val(Cursor cursor):
+    """Copy current cursor value to bytes or decode it."""
+    cdef ctkvdb.tkvdb_cursor *c = cursor.cursor
+    if cursor.tr.value_codec is not None:
+        return cursor.tr.value_codec.c_decode(<char *>c.val(c),
+                                              c.valsize(c))
+    return PyBytes_FromStringAndSize(<char *>c.val(c), c.valsize(c))
+
+
 cdef class KeysIterator(BaseIterator):
     """Iterator returning cursor keys."""
     cpdef value(self):
-        return self.cursor.key()
+        if self.copy or self.cursor.tr.key_codec is not None:
+            return self.cursor.key()
+        return self.cursor.key_view()
+
+    cdef current(self):
+        return _key(self.cursor)
 
 
 cdef class ItemsIterator(BaseIterator):
     """Iterator returning cursor key-value tuple."""
     cpdef value(self):
-        return (self.cursor.key(), self.cursor.val())
+        if self.copy:
+            return (self.cursor.key(), self.cursor.val())
+        return (
+            self.cursor.key() if self.cursor.tr.key_codec is not None
+            else self.cursor.key_view(),
+            self.cursor.val() if self.cursor.tr.value_codec is not None
+            else self.cursor.val_view()
+        )
+
+    cdef current(self):
+        return (_key(self.cursor), _val(self.cursor))
 
 
 cdef class ValuesIterator(BaseIterator):
     """Iterator returning cursor values."""
     cpdef value(self):
-        return self.cursor.val()
+        if self.copy or self.cursor.tr.value_codec is not None:
+            return self.cursor.val()
+        return self.cursor.val_view()
+
+    cdef current(self):
+        return _val(self.cursor)
@@ -0,0 +1,106 @@
+"""Parallel range scans in multiple processes.
+
+Key range is split into sub-ranges, every worker process opens own
+read-only database handle and scans its sub-range (cursor is
+positioned by seek), so scans aren't limited by single GIL.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from tkvdb.db import Tkvdb
+from tkvdb.iterators import prefix_end
+
+
+def _to_int(key, width):
+    """Convert key to integer as big-endian number of width bytes."""
+    return int.from_bytes(key[:width].ljust(width, b'\x00'), 'big')
+
+
+def split_range(start=None, stop=None, n=2):
+    """Split key range [start, stop) into n contiguous sub-ranges.
+
+    Boundaries are interpolated as big-endian numbers, so sub-ranges
+    are balanced only for uniformly distributed keys. Returns list of
+    (start, stop) tuples, None means unbounded.
+    """
+    if n < 1:
+        raise ValueError('n must be positive')
+    low = start or b''
+    width = max(len(low), len(stop or b''), 1) + 1
+    begin = _to_int(low, width)
+    end = _to_int(stop, width) if stop is not None else 256 ** width
+    bounds = []
+    for i in range(1, n):
+        value = begin + (end - begin) * i // n
+        bound = value.to_bytes(width, 'big').rstrip(b'\x00')
+        if bound > low and (stop is None or bound < stop):
+            if not bounds or bound > bounds[-1]:
+                bounds.append(bound)
+    edges = [start] + bounds + [stop]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def _scan_worker(path, func, start, stop, keys_only, params):
+    """Scan single sub-range in worker process."""
+    with Tkvdb(path, params, readonly=True) as db:
+        with db.transaction() as tr:
+            if keys_only:
+                iterator = tr.keys(start=start, stop=stop)
+            else:
+                iterator = tr.items(start=start, stop=stop)
+            return func(iterator)
+
+
+def partition(path, n, start=None, stop=None, params=None):
+    """Split key range of database file into n balanced sub-ranges.
+
+    Uses Transaction.partition() of read-only database handle.
+    """
+    with Tkvdb(path, params, readonly=True) as db:
+        with db.transaction() as tr:
+            return tr.partition(n, start=start, stop=stop)
+
+
+def parallel_scan(path, func, start=None, stop=None, prefix=None,
+                  processes=None, ranges=None, keys_only=False,
+                  params=None, executor=None, balanced=True):
+    """Scan key range of database in multiple processes.
+
+    `func(iterator)` is called in worker process for every sub-range
+    with items (or keys) iterator and must return picklable result.
+    Returns list of results in key order. Range is split into
+    `processes` parts (CPU count by default) with equal number of
+    keys by partition(), or with split_range() if `balanced` is False
+    (no preliminary walk over keys), or explicit list of
+    (start, stop) `ranges` may be passed.
+    `func` must be picklable (defined at module level). Custom
+    executor (e.g. ProcessPoolExecutor with own mp_context) may be
+    used instead of creating new one.
+    """
+    if prefix is not None:
+        if start is None or start < prefix:
+            start = prefix
+        end = prefix_end(prefix)
+        if end is not None and (stop is None or stop > end):
+            stop = end
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if ranges is None:
+        if balanced:
+            ranges = partition(path, processes, start, stop, params)
+        else:
+            ranges = split_range(start, stop, processes)
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=processes)
+    try:
+        futures = [
+            executor.submit(_scan_worker, path, func, range_start,
+                            range_stop, keys_only, params)
+            for range_start, range_stop in ranges
+        ]
+        return [f.result() for f in futures]
+    finally:
+        if own_executor:
+            executor.shutdown()
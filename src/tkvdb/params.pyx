@@ -2,6 +2,9 @@ import enum
 
 cimport ctkvdb
 from ctkvdb cimport TKVDB_PARAM as P
+from tkvdb.core cimport (
+    tkvdb_params_create, tkvdb_param_set, tkvdb_params_free
+)
 
 
 class Param(enum.Enum):
@@ -22,7 +25,7 @@ cdef class Params:
     def __cinit__(self, params=None):
         if params is None:
             params = dict()
-        self.params = ctkvdb.tkvdb_params_create()
+        self.params = tkvdb_params_create()
         self.values = {}
         if params is not None:
             for param, value in params.items():
@@ -47,13 +50,13 @@ cdef class Params:
         """Set param value."""
         if not isinstance(param, Param):
             raise TypeError('param must be tkvdb.params.Param enum')
-        ctkvdb.tkvdb_param_set(self.params, param.value, value)
+        tkvdb_param_set(self.params, param.value, value)
         self.values[param] = value
 
     cpdef free(self):
         """Free underlying C structure."""
         if self.is_initialized:
-            ctkvdb.tkvdb_params_free(self.params)
+            tkvdb_params_free(self.params)
             self.is_initialized = False
 
     def __dealloc__(self):
@@ -0,0 +1,38 @@
+from tkvdb.cursor cimport Cursor
+from tkvdb.db cimport Tkvdb
+from tkvdb.transaction cimport Transaction
+
+
+cdef class PoolEntry:
+    cdef readonly Transaction tr
+    cdef readonly list cursors
+    cdef readonly double released
+
+    cdef int free(self) except -1
+
+
+cdef class TransactionPool:
+    cdef readonly Tkvdb db
+    cdef readonly Py_ssize_t size
+    cdef public object idle_timeout
+    cdef readonly object params
+    cdef readonly dict kwargs
+    cdef object factory
+    cdef readonly object idle
+    cdef dict leased
+    cdef object lock
+    cdef object cond
+    cdef Py_ssize_t waiting
+    cdef readonly bint closed
+    cdef readonly Py_ssize_t created
+    cdef readonly Py_ssize_t reused
+    cdef readonly Py_ssize_t evicted
+    cdef object __weakref__
+
+    cdef int evict_idle(self, double now) except -1
+    cpdef Transaction acquire(self, timeout=*)
+    cpdef release(self, Transaction tr)
+    cpdef discard(self, Transaction tr)
+    cpdef Cursor acquire_cursor(self, Transaction tr, seek_key=*,
+                                seek_type=*)
+    cpdef release_cursor(self, Cursor cursor)
@@ -0,0 +1,289 @@
+"""Pool of reusable transactions and cursors.
+
+Every transaction allocates tkvdb_tr (whole TrLimit-sized memory area
+with TrDynalloc=0) and every cursor allocates its stack, so creating
+them for short requests causes malloc churn. TransactionPool keeps
+created transactions with their cursors between requests.
+"""
+import collections
+import functools
+import threading
+
+from tkvdb.cursor import Seek
+from tkvdb.stats cimport now_ns
+
+
+cdef inline double _monotonic():
+    """Return same time as time.monotonic()."""
+    return now_ns() / 1e9
+
+
+cdef class PoolEntry:
+    """Pooled transaction with its spare cursors."""
+    def __cinit__(self, Transaction tr):
+        self.tr = tr
+        self.cursors = []
+        self.released = 0
+
+    cdef int free(self) except -1:
+        """Free transaction and cursors."""
+        cdef Cursor cursor
+        for cursor in self.cursors:
+            cursor.free()
+        del self.cursors[:]
+        self.tr.free()
+        return 0
+
+
+cdef class TransactionPool:
+    """Bounded pool of started transactions of one database.
+
+    At most `size` transactions exist at once, acquire() waits for
+    released one if all of them are used. Released transactions are
+    rolled back (commit must be called explicitly) and returned to
+    pool, transactions idle for more than `idle_timeout` seconds are
+    freed (None disables eviction). Other arguments are passed to
+    Tkvdb.transaction(). Pool is thread-safe, but every transaction is
+    used by one thread at a time.
+    """
+    def __init__(self, Tkvdb db, Py_ssize_t size=16, idle_timeout=60.0,
+                 params=None, **kwargs):
+        if size < 1:
+            raise ValueError('size must be positive')
+        if idle_timeout is not None and idle_timeout < 0:
+            raise ValueError('idle_timeout must not be negative')
+        self.db = db
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.params = params
+        self.kwargs = kwargs
+        self.factory = functools.partial((<object>db).transaction, params,
+                                         **kwargs)
+        # Most recently released transactions are at the right end, so
+        # they are reused first and old ones are evicted from the left
+        self.idle = collections.deque()
+        self.leased = {}
+        self.lock = threading.Lock()
+        self.cond = threading.Condition(self.lock)
+        self.waiting = 0
+        self.closed = False
+        self.created = self.reused = self.evicted = 0
+
+    cdef int evict_idle(self, double now) except -1:
+        """Free expired idle transactions, lock must be held."""
+        cdef double timeout = self.idle_timeout
+        cdef PoolEntry entry
+        while self.idle:
+            entry = self.idle[0]
+            if now - entry.released < timeout:
+                break
+            self.idle.popleft()
+            entry.free()
+            self.evicted += 1
+        return 0
+
+    def evict(self, now=None):
+        """Free transactions idle for more than idle_timeout.
+
+        `now` is time.monotonic() value, current time by default.
+        """
+        if self.idle_timeout is None:
+            return
+        with self.lock:
+            self.evict_idle(_monotonic() if now is None else now)
+
+    cpdef Transaction acquire(self, timeout=None):
+        """Get started transaction from pool.
+
+        Waits up to `timeout` seconds (forever if None) when all
+        transactions are used, then raises TimeoutError.
+        """
+        cdef PoolEntry entry
+        deadline = None
+        with self.lock:
+            if self.idle and self.idle_timeout is not None:
+                self.evict_idle(_monotonic())
+            while True:
+                if self.closed:
+                    raise RuntimeError('Pool is closed')
+                entry = None
+                while self.idle:
+                    entry = self.idle.pop()
+                    # Transactions are freed on database close or reopen
+                    # and detached in child process after fork
+                    if entry.tr.is_initialized:
+                        self.reused += 1
+                        break
+                    entry.free()
+                    entry = None
+                if entry is None and len(self.leased) < self.size:
+                    entry = PoolEntry(self.factory())
+                    self.created += 1
+                if entry is not None:
+                    self.leased[entry.tr] = entry
+                    break
+                wait = None
+                if timeout is not None:
+                    if deadline is None:
+                        deadline = _monotonic() + timeout
+                    wait = deadline - _monotonic()
+                    if wait <= 0:
+                        raise TimeoutError('No free transactions in pool')
+                self.waiting += 1
+                try:
+                    self.cond.wait(wait)
+                finally:
+                    self.waiting -= 1
+        try:
+            entry.tr.begin()
+        except BaseException:
+            self.discard(entry.tr)
+            raise
+        return entry.tr
+
+    cpdef release(self, Transaction tr):
+        """Rollback transaction and return it to pool."""
+        cdef PoolEntry entry = self.leased.get(tr)
+        if entry is None:
+            raise ValueError('Transaction is not acquired from this pool')
+        try:
+            tr.rollback()
+        except BaseException:
+            self.discard(tr)
+            raise
+        with self.lock:
+            del self.leased[tr]
+            if self.closed or not tr.is_initialized:
+                entry.free()
+            else:
+                if self.idle_timeout is not None:
+                    entry.released = _monotonic()
+                self.idle.append(entry)
+            if self.waiting:
+                self.cond.notify()
+
+    cpdef discard(self, Transaction tr):
+        """Free acquired transaction instead of returning it to pool."""
+        cdef PoolEntry entry
+        with self.lock:
+            entry = self.leased.pop(tr, None)
+            if self.waiting:
+                self.cond.notify()
+        if entry is not None:
+            entry.free()
+
+    def transaction(self, timeout=None):
+        """Context manager acquiring transaction, see acquire()."""
+        return PooledTransaction(self, timeout)
+
+    cpdef Cursor acquire_cursor(self, Transaction tr, seek_key=None,
+                                seek_type=Seek.EQ):
+        """Get cursor of acquired transaction, reuse released ones.
+
+        Cursor is positioned by seek if `seek_key` is passed, otherwise
+        it is reset and iteration starts from first item.
+        """
+        cdef PoolEntry entry = self.leased.get(tr)
+        cdef Cursor cursor
+        if entry is None:
+            raise ValueError('Transaction is not acquired from this pool')
+        if entry.cursors:
+            cursor = entry.cursors.pop()
+        else:
+            cursor = tr.cursor()
+        if seek_key is not None:
+            try:
+                cursor.seek(seek_key, seek_type)
+            except BaseException:
+                entry.cursors.append(cursor)
+                raise
+        else:
+            # Position of reused cursor may point to rolled back nodes
+            cursor.reset()
+        return cursor
+
+    cpdef release_cursor(self, Cursor cursor):
+        """Return cursor to its transaction for reuse."""
+        cdef PoolEntry entry = self.leased.get(cursor.tr)
+        if entry is None or not cursor.is_initialized:
+            cursor.free()
+        else:
+            entry.cursors.append(cursor)
+
+    def cursor(self, Transaction tr, seek_key=None, seek_type=Seek.EQ):
+        """Context manager acquiring cursor, see acquire_cursor()."""
+        return PooledCursor(self, tr, seek_key, seek_type)
+
+    def stats(self):
+        """Return dict with pool counters."""
+        with self.lock:
+            return {
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': len(self.leased),
+                'created': self.created,
+                'reused': self.reused,
+                'evicted': self.evicted,
+            }
+
+    def close(self):
+        """Free idle transactions, used ones are freed on release."""
+        cdef PoolEntry entry
+        with self.lock:
+            self.closed = True
+            while self.idle:
+                entry = self.idle.pop()
+                entry.free()
+            self.cond.notify_all()
+
+    def __enter__(self):
+        """Context manager enter."""
+        return self
+
+    def __exit__(self, *args):
+        """Context manager exit."""
+        self.close()
+
+
+cdef class PooledTransaction:
+    """Context manager returning transaction to pool on exit."""
+    cdef TransactionPool pool
+    cdef object timeout
+    cdef Transaction tr
+
+    def __cinit__(self, TransactionPool pool, timeout=None):
+        self.pool = pool
+        self.timeout = timeout
+
+    def __enter__(self):
+        self.tr = self.pool.acquire(self.timeout)
+        return self.tr
+
+    def __exit__(self, *args):
+        tr, self.tr = self.tr, None
+        self.pool.release(tr)
+
+
+cdef class PooledCursor:
+    """Context manager returning cursor to pool on exit."""
+    cdef TransactionPool pool
+    cdef Transaction tr
+    cdef object seek_key
+    cdef object seek_type
+    cdef Cursor cursor
+
+    def __cinit__(self, TransactionPool pool, Transaction tr,
+                  seek_key=None, seek_type=Seek.EQ):
+        self.pool = pool
+        self.tr = tr
+        self.seek_key = seek_key
+        self.seek_type = seek_type
+
+    def __enter__(self):
+        self.cursor = self.pool.acquire_cursor(self.tr, self.seek_key,
+                                               self.seek_type)
+        return self.cursor
+
+    def __exit__(self, *args):
+        cursor, self.cursor = self.cursor, None
+        self.pool.release_cursor(cursor)
@@ -0,0 +1,351 @@
+"""Single keyspace spread over multiple database files.
+
+Every key is stored in one shard (separate Tkvdb file) selected by key
+hash or by key range boundaries. Sharded transaction consists of
+transactions of all shards, changed shards are committed in parallel
+by thread pool (GIL is released by tkvdb commits). Commit is not atomic
+across shards.
+"""
+import bisect
+import heapq
+import itertools
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+
+from tkvdb.db import Tkvdb
+from tkvdb.iterators import prefix_end
+
+
+def _as_bytes(key):
+    """Convert key (any buffer object) to bytes."""
+    if type(key) is bytes:
+        return key
+    return bytes(memoryview(key))
+
+
+class ShardedTkvdb:
+    """Logical database of multiple Tkvdb files.
+
+    Keys are routed by `boundaries` if it is passed: sorted list of
+    len(paths) - 1 keys, shard i contains keys in range
+    [boundaries[i - 1], boundaries[i]). Otherwise keys are routed by
+    `hash_func(key) % len(paths)`, CRC32 of key by default (it doesn't
+    depend on process, unlike hash()). Routing uses encoded keys if
+    key codec is passed. Other arguments are passed to every Tkvdb.
+    """
+    def __init__(self, paths, params=None, boundaries=None, hash_func=None,
+                 max_workers=None, **kwargs):
+        paths = list(paths)
+        if not paths:
+            raise ValueError('At least one shard is required')
+        if boundaries is not None:
+            boundaries = [_as_bytes(b) for b in boundaries]
+            if len(boundaries) != len(paths) - 1:
+                raise ValueError('Number of boundaries must be number of '
+                                 'shards minus one')
+            if any(a >= b for a, b in zip(boundaries, boundaries[1:])):
+                raise ValueError('Boundaries must be sorted and unique')
+            if hash_func is not None:
+                raise ValueError('hash_func is not used with boundaries')
+        self.boundaries = boundaries
+        self.hash_func = hash_func or zlib.crc32
+        self.shards = []
+        try:
+            for path in paths:
+                self.shards.append(Tkvdb(path, params, **kwargs))
+        except BaseException:
+            self.close()
+            raise
+        self.key_codec = self.shards[0].key_codec
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or len(paths)
+        )
+
+    @property
+    def paths(self):
+        """Paths to shard files."""
+        return [db.path for db in self.shards]
+
+    @property
+    def is_opened(self):
+        """All shards are opened."""
+        return all(db.is_opened for db in self.shards)
+
+    def shard_index(self, key):
+        """Return index of shard containing key."""
+        if self.key_codec is not None:
+            key = self.key_codec.encode(key)
+        return self.route(key)
+
+    def route(self, key):
+        """Return index of shard containing encoded key."""
+        if self.boundaries is not None:
+            return bisect.bisect_right(self.boundaries, key)
+        return self.hash_func(key) % len(self.shards)
+
+    def transaction(self, params=None, **kwargs):
+        """Create ShardedTransaction.
+
+        Arguments are passed to transaction() of every shard.
+        """
+        return ShardedTransaction(self, [
+            db.transaction(params, **kwargs) for db in self.shards
+        ])
+
+    def map(self, func, *iterables):
+        """Call func for every item of iterables in thread pool.
+
+        Returns list of results, the first exception is raised after
+        all calls are finished.
+        """
+        futures = [self.executor.submit(func, *args)
+                   for args in zip(*iterables)]
+        errors = [f.exception() for f in futures]
+        for error in errors:
+            if error is not None:
+                raise error
+        return [f.result() for f in futures]
+
+    def sync(self):
+        """Flush all shard files to disk in parallel."""
+        self.map(Tkvdb.sync, self.shards)
+
+    def close(self):
+        """Close all shards and stop thread pool."""
+        try:
+            for db in self.shards:
+                db.close()
+        finally:
+            executor = getattr(self, 'executor', None)
+            if executor is not None:
+                executor.shutdown()
+
+    def __enter__(self):
+        """Context manager enter."""
+        return self
+
+    def __exit__(self, *args):
+        """Context manager exit."""
+        self.close()
+
+
+class ShardedTransaction:
+    """Transaction over all shards with Transaction-like interface."""
+    def __init__(self, sdb, transactions):
+        self.sdb = sdb
+        self.transactions = transactions
+
+    @property
+    def is_started(self):
+        """Transactions are started."""
+        return self.transactions[0].is_started
+
+    @property
+    def is_changed(self):
+        """Some shard has uncommitted changes."""
+        return any(tr.is_changed for tr in self.transactions)
+
+    def shard(self, key):
+        """Return transaction of shard containing key."""
+        return self.transactions[self.sdb.shard_index(key)]
+
+    def group(self, items, key=None):
+        """Return dict of shard index to list of items.
+
+        Items are routed by key(item) or by item itself.
+        """
+        sdb = self.sdb
+        codec = sdb.key_codec
+        if sdb.boundaries is not None:
+            boundaries = sdb.boundaries
+            route = lambda k: bisect.bisect_right(boundaries, k)
+        else:
+            hash_func = sdb.hash_func
+            count = len(self.transactions)
+            route = lambda k: hash_func(k) % count
+        groups = [[] for _ in self.transactions]
+        for item in items:
+            k = item if key is None else key(item)
+            if codec is not None:
+                k = codec.encode(k)
+            groups[route(k)].append(item)
+        return {i: group for i, group in enumerate(groups) if group}
+
+    def begin(self):
+        """Start transactions of all shards."""
+        for tr in self.transactions:
+            tr.begin()
+
+    def commit(self):
+        """Commit changed shards in parallel.
+
+        Commit isn't atomic, if it fails for some shard, other shards
+        may be already committed. Unchanged shards are rolled back, all
+        shards must be started again with begin() after commit.
+        """
+        changed = [tr for tr in self.transactions if tr.is_changed]
+        for tr in self.transactions:
+            if not tr.is_changed:
+                tr.rollback()
+        if len(changed) > 1:
+            self.sdb.map(lambda tr: tr.commit(), changed)
+        else:
+            for tr in changed:
+                tr.commit()
+
+    def rollback(self):
+        """Rollback transactions of all shards."""
+        for tr in self.transactions:
+            tr.rollback()
+
+    def free(self):
+        """Free transactions of all shards."""
+        for tr in self.transactions:
+            tr.free()
+
+    def mem(self):
+        """Return total memory used by shard transactions."""
+        return sum(tr.mem() for tr in self.transactions)
+
+    def getvalue(self, key):
+        """Get value by key, raise error if it doesn't exist."""
+        return self.shard(key).getvalue(key)
+
+    def get(self, key, default=None):
+        """Get value by key with default value."""
+        return self.shard(key).get(key, default)
+
+    def put(self, key, value):
+        """Put key-value pair."""
+        self.shard(key).put(key, value)
+
+    def delete(self, key, prefix=False):
+        """Delete key, or all keys with prefix from all shards."""
+        if prefix:
+            for tr in self.transactions:
+                tr.delete(key, True)
+        else:
+            self.shard(key).delete(key)
+
+    def put_many(self, pairs):
+        """Put multiple key-value pairs.
+
+        Pairs are grouped by shard and shards are written in parallel.
+        """
+        groups = self.group(pairs, itemgetter(0))
+        self.sdb.map(lambda i, chunk: self.transactions[i].put_many(chunk),
+                     groups.keys(), groups.values())
+
+    def get_many(self, keys, default=None):
+        """Get values for multiple keys, missing keys have default."""
+        keys = list(keys)
+        result = [default] * len(keys)
+        groups = self.group(enumerate(keys), itemgetter(1))
+        for i, items in groups.items():
+            values = self.transactions[i].get_many(
+                [key for _, key in items], default
+            )
+            for (pos, _), value in zip(items, values):
+                result[pos] = value
+        return result
+
+    def delete_many(self, keys, prefix=False):
+        """Delete multiple keys (or prefixes)."""
+        keys = list(keys)
+        if prefix:
+            for tr in self.transactions:
+                tr.delete_many(keys, True)
+            return
+        for i, group in self.group(keys).items():
+            self.transactions[i].delete_many(group)
+
+    def iterate(self, method, prefix, start, stop, reverse):
+        """Return merged iterator of all shards."""
+        sdb = self.sdb
+        transactions = self.transactions
+        if sdb.boundaries is not None:
+            # Ranges of shards are ordered, so only overlapping shards
+            # are chained
+            low = start if sdb.key_codec is None or start is None \
+                else sdb.key_codec.encode(start)
+            high = stop if sdb.key_codec is None or stop is None \
+                else sdb.key_codec.encode(stop)
+            if prefix is not None:
+                prefix = _as_bytes(prefix)
+                if low is None or _as_bytes(low) < prefix:
+                    low = prefix
+                end = prefix_end(prefix)
+                if end is not None and (high is None
+                                        or _as_bytes(high) > end):
+                    high = end
+            first = 0 if low is None else sdb.route(_as_bytes(low))
+            last = (len(transactions) - 1 if high is None
+                    else sdb.route(_as_bytes(high)))
+            transactions = transactions[first:last + 1]
+            if reverse:
+                transactions = transactions[::-1]
+            return itertools.chain.from_iterable(
+                getattr(tr, method)(prefix, start, stop, reverse)
+                for tr in transactions
+            )
+
+        iterators = [getattr(tr, method)(prefix, start, stop, reverse)
+                     for tr in transactions]
+        codec = sdb.key_codec
+        if codec is None:
+            # Keys are unique across shards, so items are compared by keys
+            key = None
+        elif method == 'keys':
+            key = codec.encode
+        else:
+            key = lambda item: codec.encode(item[0])
+        return heapq.merge(*iterators, key=key, reverse=reverse)
+
+    def items(self, prefix=None, start=None, stop=None, reverse=False):
+        """Iterate over (key, value) of all shards in key order."""
+        return self.iterate('items', prefix, start, stop, reverse)
+
+    def keys(self, prefix=None, start=None, stop=None, reverse=False):
+        """Iterate over keys of all shards in key order."""
+        return self.iterate('keys', prefix, start, stop, reverse)
+
+    def values(self, prefix=None, start=None, stop=None, reverse=False):
+        """Iterate over values of all shards in key order."""
+        if self.sdb.boundaries is not None:
+            return self.iterate('values', prefix, start, stop, reverse)
+        return (value for _, value in
+                self.iterate('items', prefix, start, stop, reverse))
+
+    def __iter__(self):
+        return self.keys()
+
+    def __reversed__(self):
+        return self.keys(reverse=True)
+
+    def __getitem__(self, key):
+        """Get value by key, raise KeyError if it doesn't exist."""
+        return self.shard(key)[key]
+
+    def __setitem__(self, key, value):
+        """Put key-value pair."""
+        self.put(key, value)
+
+    def __delitem__(self, key):
+        """Delete key."""
+        self.delete(key)
+
+    def __contains__(self, key):
+        """Check if key exists."""
+        return key in self.shard(key)
+
+    def __enter__(self):
+        """Context manager enter, begins transaction."""
+        self.begin()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Context manager exit, rollback on exception."""
+        if exc_type is not None:
+            self.rollback()
+        self.free()
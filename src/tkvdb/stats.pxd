@@ -0,0 +1,66 @@
+from posix.time cimport clock_gettime, timespec, CLOCK_MONOTONIC
+
+cimport ctkvdb
+
+
+cdef enum Op:
+    OP_OPEN
+    OP_GET
+    OP_PUT
+    OP_DELETE
+    OP_COMMIT
+    OP_ROLLBACK
+    OP_SEEK
+    OP_NEXT
+    OPS_COUNT
+
+
+cdef enum:
+    # Bucket i counts durations in [2 ** (i - 1), 2 ** i) nanoseconds
+    BUCKETS = 48
+
+
+cdef struct OpStats:
+    unsigned long long count
+    unsigned long long errors
+    unsigned long long sampled
+    unsigned long long total_ns
+    unsigned long long max_ns
+    unsigned long long buckets[BUCKETS]
+
+
+cdef class Stats:
+    cdef OpStats ops[OPS_COUNT]
+    cdef readonly unsigned long long sample_rate
+    cdef readonly unsigned long long misses
+    cdef readonly unsigned long long bytes_read
+    cdef readonly unsigned long long bytes_written
+    cdef readonly size_t mem_last
+    cdef readonly size_t mem_peak
+    cdef readonly object trace_hook
+    cdef readonly double trace_threshold_us
+
+    cdef void record(self, int op, unsigned long long start, int ok,
+                     size_t key_size=*, size_t val_size=*)
+    cdef void add(self, int op, unsigned long long count)
+    cdef void track_mem(self, size_t mem)
+    cpdef dict snapshot(self)
+    cpdef reset(self)
+
+
+cdef inline unsigned long long now_ns() nogil:
+    """Return monotonic time in nanoseconds."""
+    cdef timespec ts
+    clock_gettime(CLOCK_MONOTONIC, &ts)
+    return <unsigned long long>ts.tv_sec * 1000000000 + ts.tv_nsec
+
+
+cdef inline unsigned long long stats_start(Stats stats, int op):
+    """Count operation, return start time if it is timed or 0.
+
+    Operation is timed if it is sampled or trace hook is set.
+    """
+    stats.ops[op].count += 1
+    if stats.ops[op].count % stats.sample_rate and stats.trace_hook is None:
+        return 0
+    return now_ns()
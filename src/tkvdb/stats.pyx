@@ -0,0 +1,143 @@
+"""Operation counters and latency histograms."""
+import sys
+
+from libc.string cimport memset
+
+cimport ctkvdb
+
+
+OPS = ('open', 'get', 'put', 'delete', 'commit', 'rollback', 'seek', 'next')
+
+# Histogram quantiles included into snapshot
+QUANTILES = ((50, 'p50_ns'), (90, 'p90_ns'), (99, 'p99_ns'))
+
+
+cdef inline unsigned long long bucket_bound(int bucket):
+    """Return upper bound (ns) of histogram bucket."""
+    # Shift of C int would overflow for durations over 2**31 ns
+    return (<unsigned long long>1) << bucket
+
+
+cdef class Stats:
+    """Counters of database operations with sampled latency histograms.
+
+    Every operation is counted, duration is measured for every
+    `sample_rate`-th operation of each type and added to histogram with
+    power-of-two buckets. Stats may be shared by multiple transactions
+    of the same thread or of different threads (counters are updated
+    while GIL is held). Slow operations may be reported to trace hook,
+    see set_trace_hook().
+    """
+    def __cinit__(self, unsigned long long sample_rate=1):
+        if sample_rate < 1:
+            raise ValueError('sample_rate must be positive')
+        self.sample_rate = sample_rate
+        self.reset()
+
+    cdef void record(self, int op, unsigned long long start, int ok,
+                     size_t key_size=0, size_t val_size=0):
+        """Finish operation started by stats_start()."""
+        cdef unsigned long long elapsed
+        cdef unsigned long long value
+        cdef int bucket = 0
+        if (ok != ctkvdb.TKVDB_RES.TKVDB_OK
+            and ok != ctkvdb.TKVDB_RES.TKVDB_NOT_FOUND
+            and ok != ctkvdb.TKVDB_RES.TKVDB_EMPTY):
+            self.ops[op].errors += 1
+        if start == 0:
+            return
+        elapsed = now_ns() - start
+        self.ops[op].sampled += 1
+        self.ops[op].total_ns += elapsed
+        if elapsed > self.ops[op].max_ns:
+            self.ops[op].max_ns = elapsed
+        value = elapsed
+        while value and bucket < BUCKETS - 1:
+            value >>= 1
+            bucket += 1
+        self.ops[op].buckets[bucket] += 1
+        if (self.trace_hook is not None
+            and elapsed >= self.trace_threshold_us * 1000):
+            try:
+                self.trace_hook(OPS[op], key_size, val_size, ok,
+                                elapsed / 1000.0)
+            except Exception:
+                # Operation is already done, it must not fail
+                sys.excepthook(*sys.exc_info())
+
+    def set_trace_hook(self, callback, double threshold_us=0):
+        """Call callback for every operation slower than threshold.
+
+        Callback is called as `callback(op, key_size, value_size, code,
+        duration_us)` right after operation, where `op` is operation
+        name (see snapshot()), `code` is tkvdb result code (0 is OK).
+        For commit and rollback `value_size` is transaction memory.
+        While hook is set every operation is timed. Hook must not use
+        transaction of operation, its exceptions are printed by
+        sys.excepthook. Passing None removes hook.
+        """
+        if threshold_us < 0:
+            raise ValueError('threshold_us must not be negative')
+        self.trace_hook = callback
+        self.trace_threshold_us = threshold_us
+
+    cdef void add(self, int op, unsigned long long count):
+        """Count operations done by batch C loop without timing."""
+        self.ops[op].count += count
+
+    cdef void track_mem(self, size_t mem):
+        """Record transaction memory before commit or rollback."""
+        self.mem_last = mem
+        if mem > self.mem_peak:
+            self.mem_peak = mem
+
+    cpdef dict snapshot(self):
+        """Return dict with current values of all counters.
+
+        Every operation has `count`, `errors`, `sampled` (number of
+        timed operations), `total_ns`, `mean_ns`, `max_ns`, quantiles
+        (upper bounds of histogram buckets) and `histogram` dict of
+        bucket upper bound (ns) to number of operations.
+        """
+        cdef OpStats *s
+        cdef unsigned long long seen
+        cdef int i, bucket
+        ops = {}
+        for i in range(OPS_COUNT):
+            s = &self.ops[i]
+            op = {
+                'count': s.count,
+                'errors': s.errors,
+                'sampled': s.sampled,
+                'total_ns': s.total_ns,
+                'mean_ns': s.total_ns // s.sampled if s.sampled else 0,
+                'max_ns': s.max_ns,
+                'histogram': {
+                    bucket_bound(bucket): s.buckets[bucket]
+                    for bucket in range(BUCKETS) if s.buckets[bucket]
+                },
+            }
+            for quantile, name in QUANTILES:
+                op[name] = 0
+                seen = 0
+                for bucket in range(BUCKETS):
+                    seen += s.buckets[bucket]
+                    if s.sampled and seen * 100 >= s.sampled * quantile:
+                        op[name] = bucket_bound(bucket)
+                        break
+            ops[OPS[i]] = op
+        return {
+            'ops': ops,
+            'misses': self.misses,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+            'mem_last': self.mem_last,
+            'mem_peak': self.mem_peak,
+            'sample_rate': self.sample_rate,
+        }
+
+    cpdef reset(self):
+        """Reset all counters."""
+        memset(self.ops, 0, sizeof(self.ops))
+        self.misses = self.bytes_read = self.bytes_written = 0
+        self.mem_last = self.mem_peak = 0
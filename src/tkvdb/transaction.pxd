@@ -1,8 +1,18 @@
+from cpython.pythread cimport PyThread_type_lock
+
 cimport ctkvdb
 cimport tkvdb.db as db
+from tkvdb.cache cimport ValueCache
+from tkvdb.codecs cimport Codec
 from tkvdb.cursor cimport Cursor
 from tkvdb.iterators cimport BaseIterator
 from tkvdb.params cimport Params
+from tkvdb.stats cimport Stats
+
+
+cdef class DeferredFree:
+    cdef ctkvdb.tkvdb_tr* tr
+    cdef ctkvdb.tkvdb_cursor* cursor
 
 
 cdef class Transaction:
@@ -13,16 +23,52 @@ cdef class Transaction:
     cdef readonly bint ram_only
     cdef readonly Params params
     cdef readonly db.Tkvdb db
+    cdef readonly ValueCache cache
+    cdef readonly Codec key_codec
+    cdef readonly Codec value_codec
+    cdef readonly Stats metrics
+    cdef PyThread_type_lock db_lock
+    cdef bint busy
+    cdef list views
+    cdef list buffers
+    cdef object __weakref__
 
-    cpdef Cursor cursor(self, bytes seek_key=*, seek_type=*)
+    cpdef Cursor cursor(self, seek_key=*, seek_type=*)
     cdef ctkvdb.tkvdb_tr* get_transaction(self)
+    cdef int acquire(self) except -1
+    cdef void release(self)
+    cdef int check(self) except -1
+    cdef void detach(self)
+    cdef object view(self, void *data, size_t size)
+    cdef Py_ssize_t release_views(self, DeferredFree keeper=*) except -1
+    cdef void lock_db(self) noexcept nogil
+    cdef void unlock_db(self) noexcept nogil
+    cdef ctkvdb.TKVDB_RES do_get(self, ctkvdb.tkvdb_datum *key,
+                                 ctkvdb.tkvdb_datum *val)
+    cdef ctkvdb.TKVDB_RES do_put(self, ctkvdb.tkvdb_datum *key,
+                                 ctkvdb.tkvdb_datum *val)
+    cdef ctkvdb.TKVDB_RES do_delete(self, ctkvdb.tkvdb_datum *key,
+                                    int del_pfx)
     cpdef begin(self)
     cpdef commit(self)
     cpdef rollback(self)
     cpdef free(self)
-    cpdef bytes getvalue(self, bytes key)
-    cpdef put(self, bytes key, bytes value)
-    cpdef delete(self, bytes key, bint prefix=*)
-    cpdef BaseIterator items(self)
-    cpdef BaseIterator values(self)
-    cpdef BaseIterator keys(self)
+    cdef int free_acquired(self) except -1
+    cpdef size_t mem(self)
+    cdef int find(self, key, ctkvdb.tkvdb_datum *val) except -1
+    cdef object read(self, key, int *ok)
+    cdef object decode_value(self, bytes value)
+    cpdef getvalue(self, key)
+    cpdef put(self, key, value)
+    cpdef delete(self, key, bint prefix=*)
+    cpdef put_many(self, pairs)
+    cpdef list get_many(self, keys, default=*)
+    cpdef delete_many(self, keys, bint prefix=*)
+    cpdef put_array(self, keys, values)
+    cpdef BaseIterator items(self, prefix=*, start=*,
+                             stop=*, bint reverse=*, bint copy=*)
+    cpdef BaseIterator values(self, prefix=*, start=*,
+                              stop=*, bint reverse=*, bint copy=*)
+    cpdef BaseIterator keys(self, prefix=*, start=*,
+                            stop=*, bint reverse=*, bint copy=*)
+    cpdef list partition(self, Py_ssize_t n, prefix=*, start=*, stop=*)
@@ -1,20 +1,130 @@
-from cpython.bytes cimport PyBytes_FromStringAndSize, PyBytes_AsStringAndSize
+from cpython.pyport cimport PY_SSIZE_T_MAX
+from cpython.bytes cimport PyBytes_FromStringAndSize, PyBytes_AS_STRING
+from cpython.buffer cimport (
+    PyBuffer_FillInfo, PyObject_GetBuffer, PyBuffer_Release,
+    PyBUF_C_CONTIGUOUS, PyBUF_WRITABLE
+)
+from cpython.pythread cimport (
+    PyThread_type_lock, PyThread_acquire_lock, PyThread_release_lock,
+    WAIT_LOCK
+)
 
 cimport ctkvdb
+from tkvdb.core cimport tkvdb_tr_create
+from datum cimport Datum, datum_fill, datum_release
+from tkvdb.cache cimport ValueCache
+from tkvdb.codecs cimport Codec
 from tkvdb.cursor cimport Cursor
 from tkvdb.cursor import Seek
 from tkvdb.iterators cimport KeysIterator, ItemsIterator, ValuesIterator
-from tkvdb.errors import make_error, NotFoundError, EmptyError
+from tkvdb.errors cimport Error
+from tkvdb.errors import make_error
 from tkvdb.params cimport Params
+from tkvdb.stats cimport (
+    Stats, stats_start, OP_GET, OP_PUT, OP_DELETE, OP_COMMIT, OP_ROLLBACK
+)
+
+
+cdef inline bint _is_missing(int ok):
+    """Check if tkvdb code means that key doesn't exist."""
+    return (ok == ctkvdb.TKVDB_RES.TKVDB_NOT_FOUND
+            or ok == ctkvdb.TKVDB_RES.TKVDB_EMPTY)
+
+
+cdef int _raise_batch_error(ctkvdb.TKVDB_RES ok,
+                            Py_ssize_t index) except -1:
+    """Raise error for batch operation with failed item index."""
+    cdef Error exc
+    error = make_error(ok)
+    if error is None:
+        exc = Error()
+    else:
+        exc = error()
+    exc.index = index
+    raise exc
+
+
+cdef inline bytes _cursor_key(Cursor cursor):
+    """Copy current cursor key to bytes without decoding."""
+    return PyBytes_FromStringAndSize(
+        <char *>cursor.cursor.key(cursor.cursor),
+        cursor.cursor.keysize(cursor.cursor)
+    )
+
+
+cdef Py_ssize_t _rows(Py_buffer *buffer) except -1:
+    """Return number of rows (first dimension) of array buffer."""
+    if buffer.ndim < 1:
+        raise ValueError('Array must have at least one dimension')
+    return buffer.shape[0]
+
+
+cdef class DatumBuffer:
+    """Read-only buffer over tkvdb memory, exported as memoryview.
+
+    Counts exported buffers to detect memoryviews derived from
+    original one (slices) which can't be released directly.
+    """
+    cdef char *data
+    cdef Py_ssize_t size
+    cdef Py_ssize_t exports
+    cdef list keepers
+
+    def __getbuffer__(self, Py_buffer *buffer, int flags):
+        if self.data == NULL:
+            raise ValueError('Buffer is released')
+        PyBuffer_FillInfo(buffer, self, self.data, self.size, 1, flags)
+        self.exports += 1
+
+    def __releasebuffer__(self, Py_buffer *buffer):
+        self.exports -= 1
+
+
+cdef class DeferredFree:
+    """Owner of tkvdb transaction or cursor freed while views exist.
+
+    Referenced by buffers still exported on free, so memory they point
+    to is freed only after last of them is collected.
+    """
+    def __dealloc__(self):
+        if self.cursor != NULL:
+            self.cursor.free(self.cursor)
+        if self.tr != NULL:
+            self.tr.free(self.tr)
 
 
 cdef class Transaction:
-    """Pythonic wrapper around tkvdb transaction."""
-    def __cinit__(self, db=None, ram_only=True, params=None):
+    """Pythonic wrapper around tkvdb transaction.
+
+    Optional ValueCache keeps values returned by reads, it is updated
+    by writes and cleared on begin, commit, rollback and free. Keys and
+    values are converted by `key_codec` and `value_codec` (see
+    tkvdb.codecs), by default database codecs are used. Operations are
+    counted by `metrics` (tkvdb.stats.Stats) if it is set, database
+    metrics are used by default.
+    """
+    def __cinit__(self, db=None, ram_only=True, params=None,
+                  ValueCache cache=None, Codec key_codec=None,
+                  Codec value_codec=None, Stats metrics=None):
         cdef ctkvdb.tkvdb* db_ptr = NULL # For RAM-mode
+        self.db_lock = NULL
+        self.cache = cache
+        self.key_codec = key_codec
+        self.value_codec = value_codec
+        self.metrics = metrics
         if not ram_only:
             self.db = db
+            if not self.db.is_opened:
+                raise RuntimeError('Database is closed')
             db_ptr = self.db.get_db()
+            self.db_lock = self.db.get_lock()
+            self.db.transactions.add(self)
+            if key_codec is None:
+                self.key_codec = self.db.key_codec
+            if value_codec is None:
+                self.value_codec = self.db.value_codec
+            if metrics is None:
+                self.metrics = self.db.metrics
 
         # Set params to null as default to enable params inheritance
         # from db
@@ -23,16 +133,169 @@ cdef class Transaction:
             self.params = params
             params_ptr = self.params.get_params()
 
-        self.tr = ctkvdb.tkvdb_tr_create(db_ptr, params_ptr)
+        self.tr = tkvdb_tr_create(db_ptr, params_ptr)
         self.is_initialized = True
         self.ram_only = ram_only
         self.is_started = False
+        self.busy = False
+        self.views = []
+        self.buffers = []
 
     cdef ctkvdb.tkvdb_tr* get_transaction(self):
         """Return internal tkvdb_tr pointer."""
         return self.tr
 
-    cpdef Cursor cursor(self, bytes seek_key=None, seek_type=Seek.EQ):
+    cdef int acquire(self) except -1:
+        """Mark transaction as used by C call, fail on concurrent use."""
+        self.check()
+        self.busy = True
+        return 0
+
+    cdef void release(self):
+        """Mark transaction as free after C call."""
+        self.busy = False
+
+    cdef int check(self) except -1:
+        """Fail if transaction is in use by another thread or freed."""
+        if self.busy:
+            raise RuntimeError('Transaction is used by another thread')
+        if not self.is_initialized:
+            raise RuntimeError('Transaction is freed')
+        return 0
+
+    cdef void detach(self):
+        """Forget transaction inherited by child process after fork.
+
+        Its memory is copy of parent one, it is left as is (C call of
+        parent thread may be interrupted by fork) and never used.
+        """
+        self.is_initialized = False
+        self.is_started = False
+        self.is_changed = False
+        self.busy = False
+        self.views = []
+        self.buffers = []
+
+    cdef object view(self, void *data, size_t size):
+        """Create read-only memoryview over tkvdb memory.
+
+        View is released on any change of transaction or cursor move.
+        """
+        cdef DatumBuffer buf = DatumBuffer.__new__(DatumBuffer)
+        buf.data = <char *>data
+        buf.size = size
+        result = memoryview(buf)
+        self.buffers.append(buf)
+        self.views.append(result)
+        return result
+
+    cdef Py_ssize_t release_views(self, DeferredFree keeper=None) except -1:
+        """Release all memoryviews created over tkvdb memory.
+
+        Raises BufferError if some view (or memoryview derived from
+        it) is still in use, so tkvdb memory is never accessed after
+        cursor move or transaction change. On free `keeper` is passed
+        instead: such views stay valid and keep it alive. Returns
+        number of these views.
+        """
+        cdef DatumBuffer buf
+        cdef list used = []
+        if not self.buffers:
+            return 0
+        for view in self.views:
+            view.release()
+        for buf in self.buffers:
+            if buf.exports:
+                if keeper is None:
+                    raise BufferError(
+                        'Memoryview over transaction data is still in use'
+                    )
+                if buf.keepers is None:
+                    buf.keepers = []
+                buf.keepers.append(keeper)
+                used.append(buf)
+            else:
+                buf.data = NULL
+        self.views = []
+        self.buffers = used
+        return len(used)
+
+    cdef void lock_db(self) noexcept nogil:
+        """Lock database file, it is shared by all db transactions."""
+        if self.db_lock != NULL:
+            PyThread_acquire_lock(self.db_lock, WAIT_LOCK)
+
+    cdef void unlock_db(self) noexcept nogil:
+        """Unlock database file."""
+        if self.db_lock != NULL:
+            PyThread_release_lock(self.db_lock)
+
+    cdef ctkvdb.TKVDB_RES do_get(self, ctkvdb.tkvdb_datum *key,
+                                 ctkvdb.tkvdb_datum *val):
+        """Call tkvdb get, GIL is released for db-bound transaction."""
+        cdef ctkvdb.TKVDB_RES ok
+        cdef Stats metrics = self.metrics
+        cdef unsigned long long start
+        if metrics is not None:
+            start = stats_start(metrics, OP_GET)
+        if self.db_lock == NULL:
+            ok = self.tr.get(self.tr, key, val)
+        else:
+            with nogil:
+                self.lock_db()
+                ok = self.tr.get(self.tr, key, val)
+                self.unlock_db()
+        if metrics is not None:
+            metrics.record(OP_GET, start, ok, key.size,
+                           val.size if ok == ctkvdb.TKVDB_RES.TKVDB_OK
+                           else 0)
+            if ok == ctkvdb.TKVDB_RES.TKVDB_OK:
+                metrics.bytes_read += val.size
+            elif _is_missing(ok):
+                metrics.misses += 1
+        return ok
+
+    cdef ctkvdb.TKVDB_RES do_put(self, ctkvdb.tkvdb_datum *key,
+                                 ctkvdb.tkvdb_datum *val):
+        """Call tkvdb put, GIL is released for db-bound transaction."""
+        cdef ctkvdb.TKVDB_RES ok
+        cdef Stats metrics = self.metrics
+        cdef unsigned long long start
+        if metrics is not None:
+            start = stats_start(metrics, OP_PUT)
+        if self.db_lock == NULL:
+            ok = self.tr.put(self.tr, key, val)
+        else:
+            with nogil:
+                self.lock_db()
+                ok = self.tr.put(self.tr, key, val)
+                self.unlock_db()
+        if metrics is not None:
+            metrics.record(OP_PUT, start, ok, key.size, val.size)
+            if ok == ctkvdb.TKVDB_RES.TKVDB_OK:
+                metrics.bytes_written += key.size + val.size
+        return ok
+
+    cdef ctkvdb.TKVDB_RES do_delete(self, ctkvdb.tkvdb_datum *key,
+                                    int del_pfx):
+        """Call tkvdb del, GIL is released for db-bound transaction."""
+        cdef ctkvdb.TKVDB_RES ok
+        cdef Stats metrics = self.metrics
+        cdef unsigned long long start
+        if metrics is not None:
+            start = stats_start(metrics, OP_DELETE)
+        if self.db_lock == NULL:
+            ok = self.tr.delete(self.tr, key, del_pfx)
+        else:
+            with nogil:
+                self.lock_db()
+                ok = self.tr.delete(self.tr, key, del_pfx)
+                self.unlock_db()
+        if metrics is not None:
+            metrics.record(OP_DELETE, start, ok, key.size)
+        return ok
+
+    cpdef Cursor cursor(self, seek_key=None, seek_type=Seek.EQ):
         """Create and initialize Cursor."""
         c = Cursor(self)
         if seek_key is not None:
@@ -42,107 +305,517 @@ cdef class Transaction:
     cpdef begin(self):
         """Start transaction."""
         if not self.is_started:
+            self.release_views()
+            self.acquire()
             self.is_started = True
-            self.tr.begin(self.tr)
+            if self.cache is not None:
+                self.cache.clear()
+            with nogil:
+                self.lock_db()
+                self.tr.begin(self.tr)
+                self.unlock_db()
+            self.release()
 
     cpdef commit(self):
-        """Do a commit if transaction is started (begin)."""
+        """Do a commit if transaction is started (begin).
+
+        Transaction must be started again with begin() after commit.
+        """
+        cdef ctkvdb.TKVDB_RES ok
+        cdef Stats metrics = self.metrics
+        cdef unsigned long long start
+        cdef size_t mem
         if self.is_started:
-            self.tr.commit(self.tr)
+            if self.db is not None and self.db.readonly:
+                raise PermissionError('Database is opened in read-only mode')
+            self.release_views()
+            self.acquire()
+            if metrics is not None:
+                mem = self.tr.mem(self.tr)
+                metrics.track_mem(mem)
+                start = stats_start(metrics, OP_COMMIT)
+            with nogil:
+                self.lock_db()
+                ok = self.tr.commit(self.tr)
+                self.unlock_db()
+                if ok != ctkvdb.TKVDB_RES.TKVDB_OK:
+                    # Failed commit leaves C transaction started, so
+                    # next begin() would keep stale root and changes
+                    self.tr.rollback(self.tr)
+            if metrics is not None:
+                metrics.record(OP_COMMIT, start, ok, 0, mem)
+            self.release()
+            self.is_started = False
             self.is_changed = False
+            if self.cache is not None:
+                self.cache.clear()
+            error = make_error(ok)
+            if error is not None:
+                raise error()
+            if self.db is not None:
+                self.db.on_commit()
 
     cpdef rollback(self):
         """Do a rollback if transaction is started (begin)."""
+        cdef Stats metrics = self.metrics
+        cdef unsigned long long start
+        cdef size_t mem
         if self.is_started:
-            self.tr.rollback(self.tr)
-            self.is_changed = False
-
-    cpdef free(self):
-        """Free the transaction if it is initialized."""
-        if self.is_initialized:
-            self.tr.free(self.tr)
-            self.is_initialized = False
+            self.release_views()
+            self.acquire()
+            if metrics is not None:
+                mem = self.tr.mem(self.tr)
+                metrics.track_mem(mem)
+                start = stats_start(metrics, OP_ROLLBACK)
+            with nogil:
+                self.tr.rollback(self.tr)
+            if metrics is not None:
+                metrics.record(OP_ROLLBACK, start,
+                               ctkvdb.TKVDB_RES.TKVDB_OK, 0, mem)
+            self.release()
             self.is_started = False
             self.is_changed = False
+            if self.cache is not None:
+                self.cache.clear()
 
-    cpdef bytes getvalue(self, bytes key):
-        """Wrapper for tkvdb transaction get."""
-        cdef ctkvdb.tkvdb_datum key_datum
-
-        PyBytes_AsStringAndSize(
-            key,
-            <char **>&key_datum.data,
-            <Py_ssize_t *>&key_datum.size
-        )
+    cpdef free(self):
+        """Free the transaction if it is initialized.
 
-        cdef ctkvdb.tkvdb_datum res_datum
-        ok = self.tr.get(self.tr, &key_datum, &res_datum)
-        if ok == ctkvdb.TKVDB_RES.TKVDB_OK:
-            return PyBytes_FromStringAndSize(
-                <char *>res_datum.data,
-                res_datum.size
-            )
+        If memoryviews derived from zero-copy views are still used,
+        tkvdb memory is freed after they are collected.
+        """
+        if self.is_initialized:
+            self.acquire()
+            try:
+                self.free_acquired()
+            finally:
+                self.release()
+
+    cdef int free_acquired(self) except -1:
+        """Free transaction already marked as used by acquire()."""
+        cdef DeferredFree keeper = None
+        if self.buffers:
+            keeper = DeferredFree.__new__(DeferredFree)
+            if not self.release_views(keeper):
+                keeper = None
+            self.buffers = []
+        if keeper is not None:
+            keeper.tr = self.tr
         else:
+            with nogil:
+                self.tr.free(self.tr)
+        self.is_initialized = False
+        self.is_started = False
+        self.is_changed = False
+        if self.cache is not None:
+            self.cache.clear()
+        return 0
+
+    cpdef size_t mem(self):
+        """Return size of memory used by transaction."""
+        if not self.is_initialized:
+            return 0
+        return self.tr.mem(self.tr)
+
+    def stats(self):
+        """Return snapshot of transaction metrics (empty if disabled).
+
+        Current memory of transaction is included as `mem` key.
+        """
+        if self.metrics is None:
+            return {}
+        result = self.metrics.snapshot()
+        result['mem'] = self.mem()
+        return result
+
+    cpdef getvalue(self, key):
+        """Wrapper for tkvdb transaction get."""
+        cdef int ok
+        value = self.read(key, &ok)
+        if ok != ctkvdb.TKVDB_RES.TKVDB_OK:
             error = make_error(ok)
             if error is not None:
                 raise error()
-        return None
+        return value
 
-    def get(self, bytes key, bytes default=None):
-        """Python mapping get method with default value."""
+    cdef object read(self, key, int *ok):
+        """Get decoded value by key using cache, return None on failure.
+
+        Result code is stored to `ok`.
+        """
+        cdef ctkvdb.tkvdb_datum res_datum
+        if self.key_codec is not None:
+            key = self.key_codec.c_encode(key)
+        if self.cache is not None:
+            value = self.cache.lookup(key)
+            if value is not None:
+                ok[0] = ctkvdb.TKVDB_RES.TKVDB_OK
+                return self.decode_value(value)
+        ok[0] = self.find(key, &res_datum)
+        if ok[0] != ctkvdb.TKVDB_RES.TKVDB_OK:
+            return None
+        if self.cache is None and self.value_codec is not None:
+            return self.value_codec.c_decode(<char *>res_datum.data,
+                                             res_datum.size)
+        value = PyBytes_FromStringAndSize(<char *>res_datum.data,
+                                          res_datum.size)
+        if self.cache is not None:
+            self.cache.store(key, value)
+        return self.decode_value(value)
+
+    cdef object decode_value(self, bytes value):
+        """Decode value bytes with value codec."""
+        if self.value_codec is None:
+            return value
+        return self.value_codec.c_decode(PyBytes_AS_STRING(value),
+                                         len(value))
+
+    cdef int find(self, key, ctkvdb.tkvdb_datum *val) except -1:
+        """Get value datum by key, return tkvdb code without raising."""
+        cdef Datum key_d
+        cdef ctkvdb.TKVDB_RES ok
+
+        datum_fill(&key_d, key)
         try:
-            return self.getvalue(key)
-        except (EmptyError, NotFoundError):
-            return default
+            self.acquire()
+            ok = self.do_get(&key_d.datum, val)
+            self.release()
+        finally:
+            datum_release(&key_d)
+        return ok
+
+    def get(self, key, default=None):
+        """Python mapping get method with default value."""
+        cdef int ok
+        value = self.read(key, &ok)
+        if ok == ctkvdb.TKVDB_RES.TKVDB_OK:
+            return value
+        elif not _is_missing(ok):
+            raise make_error(ok)()
+        return default
 
-    cpdef put(self, bytes key, bytes value):
+    cpdef put(self, key, value):
         """Wrapper for tkvdb transaction put."""
-        cdef ctkvdb.tkvdb_datum key_datum
-        cdef ctkvdb.tkvdb_datum val_datum
-
-        PyBytes_AsStringAndSize(
-            key,
-            <char **>&key_datum.data,
-            <Py_ssize_t *>&key_datum.size
-        )
-
-        PyBytes_AsStringAndSize(
-            value,
-            <char **>&val_datum.data,
-            <Py_ssize_t *>&val_datum.size
-        )
-
-        ok = self.tr.put(self.tr, &key_datum, &val_datum)
+        cdef Datum key_d
+        cdef Datum val_d
+
+        if self.key_codec is not None:
+            key = self.key_codec.c_encode(key)
+        if self.value_codec is not None:
+            value = self.value_codec.c_encode(value)
+        datum_fill(&key_d, key)
+        try:
+            datum_fill(&val_d, value)
+            try:
+                self.release_views()
+                self.acquire()
+                ok = self.do_put(&key_d.datum, &val_d.datum)
+                self.release()
+            finally:
+                datum_release(&val_d)
+        finally:
+            datum_release(&key_d)
         error = make_error(ok)
+        if self.cache is not None:
+            if error is None and type(value) is bytes:
+                self.cache.store(key, value)
+            else:
+                self.cache.invalidate(key)
         if error is not None:
             raise error()
         self.is_changed = True
 
-    cpdef delete(self, bytes key, bint prefix=False):
+    cpdef delete(self, key, bint prefix=False):
         """Wrapper for tkvdb transaction delete."""
-        cdef ctkvdb.tkvdb_datum key_datum
-
-        PyBytes_AsStringAndSize(key,
-                                <char **>&key_datum.data,
-                                <Py_ssize_t *>&key_datum.size)
+        cdef Datum key_d
 
         del_pfx = 0
         if prefix:
             del_pfx = 1
-        ok = self.tr.delete(self.tr, &key_datum, del_pfx)
+        elif self.key_codec is not None:
+            key = self.key_codec.c_encode(key)
+        datum_fill(&key_d, key)
+        try:
+            self.release_views()
+            self.acquire()
+            ok = self.do_delete(&key_d.datum, del_pfx)
+            self.release()
+        finally:
+            datum_release(&key_d)
+        if ok == ctkvdb.TKVDB_RES.TKVDB_OK:
+            self.is_changed = True
+        if self.cache is not None:
+            if prefix:
+                self.cache.invalidate_prefix(key)
+            else:
+                self.cache.invalidate(key)
+
+    cpdef put_many(self, pairs):
+        """Put multiple key-value pairs from iterable in one call.
+
+        Stops on first error, raised exception has `index` attribute
+        with position of the failed pair.
+        """
+        cdef Datum key_d
+        cdef Datum val_d
+        cdef ctkvdb.TKVDB_RES ok = ctkvdb.TKVDB_RES.TKVDB_OK
+        cdef Py_ssize_t i = 0
+
+        key_d.is_buffer = val_d.is_buffer = False
+        self.release_views()
+        self.acquire()
+        try:
+            for key, value in pairs:
+                if self.key_codec is not None:
+                    key = self.key_codec.c_encode(key)
+                if self.value_codec is not None:
+                    value = self.value_codec.c_encode(value)
+                datum_fill(&key_d, key)
+                datum_fill(&val_d, value)
+                if self.cache is not None:
+                    self.cache.invalidate(key)
+                ok = self.do_put(&key_d.datum, &val_d.datum)
+                datum_release(&key_d)
+                datum_release(&val_d)
+                if ok != ctkvdb.TKVDB_RES.TKVDB_OK:
+                    break
+                i += 1
+        finally:
+            datum_release(&key_d)
+            datum_release(&val_d)
+            self.release()
+
+        if i > 0:
+            self.is_changed = True
+        if ok != ctkvdb.TKVDB_RES.TKVDB_OK:
+            _raise_batch_error(ok, i)
+
+    cpdef list get_many(self, keys, default=None):
+        """Get values for multiple keys in one call.
+
+        Returns list of values in keys order, missing keys are
+        replaced by default value.
+        """
+        cdef Datum key_d
+        cdef ctkvdb.tkvdb_datum res_datum
+        cdef ctkvdb.TKVDB_RES ok
+        cdef Py_ssize_t i = 0
+        cdef list result = []
+        cdef int res
+
+        if self.cache is not None:
+            for key in keys:
+                value = self.read(key, &res)
+                if res == ctkvdb.TKVDB_RES.TKVDB_OK:
+                    result.append(value)
+                elif _is_missing(res):
+                    result.append(default)
+                else:
+                    _raise_batch_error(<ctkvdb.TKVDB_RES>res, i)
+                i += 1
+            return result
+
+        key_d.is_buffer = False
+        self.acquire()
+        try:
+            for key in keys:
+                if self.key_codec is not None:
+                    key = self.key_codec.c_encode(key)
+                datum_fill(&key_d, key)
+                ok = self.do_get(&key_d.datum, &res_datum)
+                datum_release(&key_d)
+                if (ok == ctkvdb.TKVDB_RES.TKVDB_OK
+                    and self.value_codec is not None):
+                    result.append(self.value_codec.c_decode(
+                        <char *>res_datum.data,
+                        res_datum.size
+                    ))
+                elif ok == ctkvdb.TKVDB_RES.TKVDB_OK:
+                    result.append(PyBytes_FromStringAndSize(
+                        <char *>res_datum.data,
+                        res_datum.size
+                    ))
+                elif _is_missing(ok):
+                    result.append(default)
+                else:
+                    _raise_batch_error(ok, i)
+                i += 1
+        finally:
+            datum_release(&key_d)
+            self.release()
+        return result
+
+    cpdef delete_many(self, keys, bint prefix=False):
+        """Delete multiple keys in one call.
+
+        Missing keys are skipped, other errors stop deletion and are
+        raised with `index` attribute of the failed key.
+        """
+        cdef Datum key_d
+        cdef ctkvdb.TKVDB_RES ok
+        cdef Py_ssize_t i = 0
+        cdef int del_pfx = 1 if prefix else 0
+
+        key_d.is_buffer = False
+        self.release_views()
+        self.acquire()
+        try:
+            for key in keys:
+                if not prefix and self.key_codec is not None:
+                    key = self.key_codec.c_encode(key)
+                datum_fill(&key_d, key)
+                if self.cache is not None:
+                    if prefix:
+                        self.cache.invalidate_prefix(key)
+                    else:
+                        self.cache.invalidate(key)
+                ok = self.do_delete(&key_d.datum, del_pfx)
+                datum_release(&key_d)
+                if ok == ctkvdb.TKVDB_RES.TKVDB_OK:
+                    self.is_changed = True
+                elif not _is_missing(ok):
+                    _raise_batch_error(ok, i)
+                i += 1
+        finally:
+            datum_release(&key_d)
+            self.release()
+
+    cpdef put_array(self, keys, values):
+        """Put rows of two C-contiguous arrays as key-value pairs.
+
+        Row is an item of the first dimension, so keys and values may
+        be 1-D arrays of fixed-size items (e.g. numpy 'S16' or '>u8'
+        dtype), 2-D uint8 arrays or any other buffer objects. Rows are
+        put by single C loop with GIL released, codecs are not used and
+        cache is cleared. Exception has `index` attribute of failed row.
+        """
+        cdef Py_buffer keys_buf
+        cdef Py_buffer vals_buf
+        cdef Py_ssize_t rows
+        cdef Py_ssize_t i = 0
+        cdef ctkvdb.tkvdb_datum key_d
+        cdef ctkvdb.tkvdb_datum val_d
+        cdef ctkvdb.TKVDB_RES ok = ctkvdb.TKVDB_RES.TKVDB_OK
+
+        PyObject_GetBuffer(keys, &keys_buf, PyBUF_C_CONTIGUOUS)
+        try:
+            PyObject_GetBuffer(values, &vals_buf, PyBUF_C_CONTIGUOUS)
+            try:
+                rows = _rows(&keys_buf)
+                if _rows(&vals_buf) != rows:
+                    raise ValueError(
+                        'keys and values must have same number of rows'
+                    )
+                if rows == 0:
+                    return
+                key_d.size = keys_buf.len // rows
+                val_d.size = vals_buf.len // rows
+                if self.cache is not None:
+                    self.cache.clear()
+                self.release_views()
+                self.acquire()
+                with nogil:
+                    self.lock_db()
+                    while i < rows:
+                        key_d.data = <char *>keys_buf.buf + i * key_d.size
+                        val_d.data = <char *>vals_buf.buf + i * val_d.size
+                        ok = self.tr.put(self.tr, &key_d, &val_d)
+                        if ok != ctkvdb.TKVDB_RES.TKVDB_OK:
+                            break
+                        i += 1
+                    self.unlock_db()
+                self.release()
+            finally:
+                PyBuffer_Release(&vals_buf)
+        finally:
+            PyBuffer_Release(&keys_buf)
+
+        if i > 0:
+            self.is_changed = True
+        if self.metrics is not None:
+            self.metrics.add(OP_PUT, i)
+            self.metrics.bytes_written += i * (key_d.size + val_d.size)
+        if ok != ctkvdb.TKVDB_RES.TKVDB_OK:
+            _raise_batch_error(ok, i)
+
+    def to_arrays(self, prefix=None, key_dtype=None, val_dtype=None,
+                  start=None, stop=None):
+        """Export keys and values of range to two numpy arrays.
+
+        Every key (value) must have size of `key_dtype` (`val_dtype`)
+        item, by default bytes dtype with size of the first key (value)
+        is used. Range arguments are same as in items(). Rows are
+        copied directly to arrays by C loop with GIL released, codecs
+        are not used. Requires numpy.
+        """
+        cdef BaseIterator it
+        cdef Py_buffer keys_buf
+        cdef Py_buffer vals_buf
+        cdef Py_ssize_t count
+        cdef Py_ssize_t done
 
-    def __getitem__(self, bytes key):
-        """Python mapping __getitem__."""
         try:
-            return self.getvalue(key)
-        except (EmptyError, NotFoundError):
+            import numpy
+        except ImportError:
+            raise ImportError('numpy is required for to_arrays()')
+
+        # Count rows first to allocate arrays of exact size
+        count = 0
+        it = self.keys(prefix, start, stop)
+        try:
+            if it.step():
+                if key_dtype is None:
+                    key_dtype = 'S{}'.format(it.cursor.keysize())
+                if val_dtype is None:
+                    val_dtype = 'S{}'.format(it.cursor.valsize())
+                count = 1 + it.skip(PY_SSIZE_T_MAX - 1)
+        finally:
+            it.cursor.free()
+
+        it = self.items(prefix, start, stop)
+        try:
+            key_dtype = numpy.dtype(key_dtype or 'S1')
+            val_dtype = numpy.dtype(val_dtype or 'S1')
+            keys = numpy.empty(count, key_dtype)
+            values = numpy.empty(count, val_dtype)
+            if not count:
+                return keys, values
+            PyObject_GetBuffer(keys, &keys_buf,
+                               PyBUF_C_CONTIGUOUS | PyBUF_WRITABLE)
+            try:
+                PyObject_GetBuffer(values, &vals_buf,
+                                   PyBUF_C_CONTIGUOUS | PyBUF_WRITABLE)
+                try:
+                    done = it.fill(<char *>keys_buf.buf, key_dtype.itemsize,
+                                   <char *>vals_buf.buf, val_dtype.itemsize,
+                                   count)
+                finally:
+                    PyBuffer_Release(&vals_buf)
+            finally:
+                PyBuffer_Release(&keys_buf)
+        finally:
+            it.cursor.free()
+        if done < count:
+            # Range is changed by another thread after counting
+            keys = keys[:done]
+            values = values[:done]
+        return keys, values
+
+    def __getitem__(self, key):
+        """Python mapping __getitem__."""
+        cdef int ok
+        value = self.read(key, &ok)
+        if ok == ctkvdb.TKVDB_RES.TKVDB_OK:
+            return value
+        elif _is_missing(ok):
             raise KeyError(key)
+        raise make_error(ok)()
 
-    def __setitem__(self, bytes key, bytes value):
+    def __setitem__(self, key, value):
         """Python mapping __getitem__."""
         self.put(key, value)
 
-    def __delitem__(self, bytes key):
+    def __delitem__(self, key):
         """Python mapping __delitem__."""
         self.delete(key)
 
@@ -158,28 +831,124 @@ cdef class Transaction:
         """Return reversed keys iterator."""
         return reversed(self.keys())
 
-    def __contains__(self, bytes key):
+    def __contains__(self, key):
         """Python method for 'in' operator."""
-        try:
-            self.getvalue(key)
+        cdef ctkvdb.tkvdb_datum res_datum
+        cdef int ok
+        if self.key_codec is not None:
+            key = self.key_codec.c_encode(key)
+        if self.cache is not None and key in self.cache:
             return True
-        except (EmptyError, NotFoundError):
+        ok = self.find(key, &res_datum)
+        if ok == ctkvdb.TKVDB_RES.TKVDB_OK:
+            return True
+        elif _is_missing(ok):
             return False
+        raise make_error(ok)()
 
-    cpdef BaseIterator items(self):
-        """Dict-like items iterator."""
+    cpdef BaseIterator items(self, prefix=None, start=None,
+                             stop=None, bint reverse=False,
+                             bint copy=True):
+        """Dict-like items iterator, optionally limited by range.
+
+        With copy=False iterator returns memoryviews (see Cursor.key_view).
+        """
         cursor = self.cursor()
-        return ItemsIterator(cursor)
+        return ItemsIterator(cursor, reverse, prefix, start, stop, copy)
+
+    cpdef BaseIterator keys(self, prefix=None, start=None,
+                            stop=None, bint reverse=False,
+                            bint copy=True):
+        """Dict-like keys iterator, optionally limited by range.
 
-    cpdef BaseIterator keys(self):
-        """Dict-like keys iterator."""
+        With copy=False iterator returns memoryviews (see Cursor.key_view).
+        """
         cursor = self.cursor()
-        return KeysIterator(cursor)
+        return KeysIterator(cursor, reverse, prefix, start, stop, copy)
 
-    cpdef BaseIterator values(self):
-        """Dict-like values iterator."""
+    cpdef BaseIterator values(self, prefix=None, start=None,
+                              stop=None, bint reverse=False,
+                              bint copy=True):
+        """Dict-like values iterator, optionally limited by range.
+
+        With copy=False iterator returns memoryviews (see Cursor.key_view).
+        """
         cursor = self.cursor()
-        return ValuesIterator(cursor)
+        return ValuesIterator(cursor, reverse, prefix, start, stop, copy)
+
+    def iter_chunks(self, Py_ssize_t chunk_size=1000, bint keys_only=False,
+                    prefix=None, start=None, stop=None,
+                    bint reverse=False):
+        """Generator returning lists of up to chunk_size items or keys.
+
+        Range arguments are same as in items() and keys().
+        """
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be positive')
+        if keys_only:
+            iterator = self.keys(prefix, start, stop, reverse)
+        else:
+            iterator = self.items(prefix, start, stop, reverse)
+        while True:
+            chunk = iterator.fetch(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+    cpdef list partition(self, Py_ssize_t n, prefix=None, start=None,
+                         stop=None):
+        """Split key range into up to n ranges with similar number of keys.
+
+        Returns list of (start, stop) tuples (None means unbounded),
+        which may be scanned in parallel by separate transactions or
+        processes. Range arguments are same as in keys(). Keys are
+        counted by single cursor walk with GIL released (see
+        BaseIterator.skip), every 'step' key is sampled and step is
+        doubled when there are too many samples, so range sizes
+        differ from ideal by less than 1/16 of ideal size. With key
+        codec boundaries are decoded keys and prefix can't be used.
+        """
+        cdef BaseIterator it
+        cdef list samples
+        cdef list bounds = []
+        cdef Py_ssize_t step = 1
+        cdef Py_ssize_t pos = 0
+        cdef Py_ssize_t limit = 16 * n
+        cdef Py_ssize_t moved, count, idx, i
+
+        if n < 1:
+            raise ValueError('n must be positive')
+        if self.key_codec is not None and prefix is not None:
+            raise ValueError('prefix is not supported with key codec')
+        it = self.keys(prefix, start, stop)
+        try:
+            if not it.step():
+                n = 1
+            else:
+                samples = [_cursor_key(it.cursor)]
+            while n > 1:
+                moved = it.skip(step)
+                pos += moved
+                if moved < step:
+                    break
+                samples.append(_cursor_key(it.cursor))
+                if len(samples) > 2 * limit:
+                    samples = samples[::2]
+                    step *= 2
+        finally:
+            it.cursor.free()
+
+        count = pos + 1
+        for i in range(1, n):
+            idx = min((i * count // n + step // 2) // step, len(samples) - 1)
+            if idx > 0 and (not bounds or samples[idx] > bounds[-1]):
+                bounds.append(samples[idx])
+        if self.key_codec is None:
+            edges = [it.start] + bounds + [it.stop]
+        else:
+            edges = [start] + [self.key_codec.decode(b)
+                               for b in bounds] + [stop]
+        return list(zip(edges[:-1], edges[1:]))
 
     def __enter__(self):
         """Context manager enter."""
@@ -0,0 +1,249 @@
+"""Background group commit of writes from multiple threads.
+
+Transaction can't be shared by threads, so every producer would need
+own transaction and commit. GroupWriter collects writes of all
+producers in queue, single background thread applies them to one
+transaction and commits them together.
+"""
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from tkvdb.db import Durability
+from tkvdb.errors import EnomemError
+
+# Queued operations
+PUT = 0
+DELETE = 1
+FLUSH = 2
+STOP = 3
+
+
+class GroupWriter:
+    """Queue of writes committed by background thread in batches.
+
+    Batch is committed when it has `batch_size` operations or when
+    `max_delay` seconds passed since its first operation (or when
+    queue is empty with max_delay=0). Futures returned by submit
+    methods are resolved after commit and fsync of database file
+    (with `sync` set to False just after commit). `queue_size` limits
+    number of queued operations (submit blocks if queue is full, async
+    methods wait for free space in executor thread), `params` are
+    transaction params.
+    """
+    def __init__(self, db, batch_size=1000, max_delay=0.01, sync=True,
+                 queue_size=0, params=None):
+        if batch_size < 1:
+            raise ValueError('batch_size must be positive')
+        if max_delay < 0:
+            raise ValueError('max_delay must not be negative')
+        self.db = db
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.sync = sync
+        self.params = params
+        self.queue = queue.Queue(queue_size)
+        self.closed = False
+        self.lock = threading.Lock()
+        self.writes = 0
+        self.commits = 0
+        self.errors = 0
+        self.max_batch = 0
+        self.thread = threading.Thread(target=self.run, name='tkvdb-writer',
+                                       daemon=True)
+        self.thread.start()
+
+    def put(self, op, key=None, value=None, block=True):
+        """Add operation to queue, return its future.
+
+        With `block` set to False queue.Full is raised if queue is full.
+        """
+        future = Future()
+        with self.lock:
+            if self.closed:
+                raise RuntimeError('Writer is closed')
+            if op == STOP:
+                self.closed = True
+        self.queue.put((op, key, value, future), block)
+        return future
+
+    async def put_async(self, op, key=None, value=None):
+        """Add operation to queue from asyncio task, wait for commit.
+
+        If queue is full, waiting for free space is done in default
+        executor, so event loop isn't blocked.
+        """
+        try:
+            future = self.put(op, key, value, block=False)
+        except queue.Full:
+            loop = asyncio.get_event_loop()
+            future = await loop.run_in_executor(None, self.put, op, key,
+                                                value)
+        return await asyncio.wrap_future(future)
+
+    def submit(self, key, value):
+        """Queue put of key-value pair, return Future."""
+        return self.put(PUT, key, value)
+
+    def submit_delete(self, key, prefix=False):
+        """Queue delete of key (or prefix), return Future."""
+        return self.put(DELETE, key, prefix)
+
+    def submit_async(self, key, value):
+        """Queue put from asyncio task, return awaitable."""
+        return self.put_async(PUT, key, value)
+
+    def submit_delete_async(self, key, prefix=False):
+        """Queue delete from asyncio task, return awaitable."""
+        return self.put_async(DELETE, key, prefix)
+
+    def flush(self, timeout=None):
+        """Wait until all previously submitted writes are committed."""
+        self.put(FLUSH).result(timeout)
+
+    def close(self, timeout=None):
+        """Commit queued writes and stop background thread."""
+        with self.lock:
+            closed = self.closed
+        if not closed:
+            self.put(STOP)
+        if self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+
+    def stats(self):
+        """Return dict with writer counters."""
+        return {
+            'queued': self.queue.qsize(),
+            'writes': self.writes,
+            'commits': self.commits,
+            'errors': self.errors,
+            'max_batch': self.max_batch,
+        }
+
+    def apply(self, tr, op, key, value):
+        """Apply operation to transaction."""
+        if op == PUT:
+            tr.put(key, value)
+        else:
+            tr.delete(key, value)
+
+    def run(self):
+        """Background thread loop."""
+        tr = None
+        stop = False
+        while not stop:
+            op, key, value, future = item = self.queue.get()
+            batch = []
+            ready = []
+            deadline = time.monotonic() + self.max_delay
+            try:
+                if tr is None or not tr.is_initialized:
+                    # Transaction is freed when database file is replaced
+                    tr = self.db.transaction(self.params)
+                tr.begin()
+                while True:
+                    if op == STOP:
+                        stop = True
+                        ready.append(future)
+                    elif op == FLUSH:
+                        ready.append(future)
+                    elif future.set_running_or_notify_cancel():
+                        self.write(tr, item, batch)
+                    if stop or len(batch) >= self.batch_size:
+                        break
+                    timeout = deadline - time.monotonic()
+                    try:
+                        if timeout > 0:
+                            item = self.queue.get(timeout=timeout)
+                        else:
+                            item = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    op, key, value, future = item
+                self.commit(tr, batch)
+            except BaseException as e:
+                # Database is closed or commit failed, writes are lost
+                self.errors += len(batch)
+                for f in batch:
+                    f.set_exception(e)
+                for f in ready:
+                    f.set_exception(e)
+                if not future.done():
+                    # Operation wasn't applied yet
+                    future.set_exception(e)
+                if tr is not None:
+                    tr.free()
+                    tr = None
+                if stop or not self.db.is_opened:
+                    break
+                continue
+            for f in batch:
+                f.set_result(None)
+            for f in ready:
+                f.set_result(None)
+        if tr is not None:
+            tr.free()
+        with self.lock:
+            self.closed = True
+        # Fail operations queued after database was closed
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item[3].set_running_or_notify_cancel():
+                item[3].set_exception(RuntimeError('Writer is closed'))
+
+    def write(self, tr, item, batch):
+        """Apply queued operation, commit batch if transaction is full."""
+        op, key, value, future = item
+        try:
+            self.apply(tr, op, key, value)
+        except EnomemError:
+            if not batch:
+                self.errors += 1
+                future.set_exception(EnomemError())
+                return
+            # Transaction memory is full, commit batch and retry
+            try:
+                self.commit(tr, batch)
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            for f in batch:
+                f.set_result(None)
+            del batch[:]
+            tr.begin()
+            try:
+                self.apply(tr, op, key, value)
+            except Exception as e:
+                self.errors += 1
+                future.set_exception(e)
+                return
+        except Exception as e:
+            self.errors += 1
+            future.set_exception(e)
+            return
+        batch.append(future)
+
+    def commit(self, tr, batch):
+        """Commit transaction and sync database file."""
+        if not batch:
+            tr.rollback()
+            return
+        tr.commit()
+        if self.sync and self.db.durability != Durability.COMMIT:
+            self.db.sync()
+        self.writes += len(batch)
+        self.commits += 1
+        self.max_batch = max(self.max_batch, len(batch))
+
+    def __enter__(self):
+        """Context manager enter."""
+        return self
+
+    def __exit__(self, *args):
+        """Context manager exit, commits queued writes."""
+        self.close()
@@ -0,0 +1,123 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+
+from tkvdb.aio import AsyncTkvdb
+
+
+class TestAsync(unittest.TestCase):
+    """Test asyncio interface."""
+    def setUp(self):
+        """Create temporary file for db and event loop."""
+        self.dbfile = tempfile.NamedTemporaryFile(delete=False)
+        self.path = self.dbfile.name
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        """Remove tempfile and close event loop."""
+        self.loop.close()
+        self.dbfile.close()
+        os.unlink(self.path)
+
+    def run_async(self, coro):
+        """Run coroutine in test loop."""
+        return self.loop.run_until_complete(coro)
+
+    def test_transaction(self):
+        """Test basic async transaction methods."""
+        async def run():
+            async with AsyncTkvdb(self.path) as db:
+                async with db.transaction() as tr:
+                    await tr.put(b'key-1', b'value-1')
+                    await tr.put_many([(b'key-2', b'value-2'),
+                                       (b'key-3', b'value-3')])
+                    await tr.commit()
+                    await db.sync()
+                async with db.transaction() as tr:
+                    self.assertEqual(await tr.getvalue(b'key-1'), b'value-1')
+                    self.assertEqual(await tr.get(b'missing'), None)
+                    self.assertTrue(await tr.contains(b'key-2'))
+                    self.assertEqual(
+                        await tr.get_many([b'key-3', b'missing'], b''),
+                        [b'value-3', b'']
+                    )
+                    await tr.delete_many([b'key-1'])
+                    await tr.delete(b'key-2')
+                    self.assertFalse(await tr.contains(b'key-2'))
+                    await tr.rollback()
+            self.assertFalse(db.is_opened)
+        self.run_async(run())
+
+    def test_iterators(self):
+        """Test async chunked iterators."""
+        data = [(b'key-%03d' % i, b'value') for i in range(250)]
+
+        async def run():
+            async with AsyncTkvdb(self.path) as db:
+                async with db.transaction() as tr:
+                    await tr.put_many(data)
+                    chunks = []
+                    async for chunk in tr.iter_chunks(100):
+                        chunks.append(chunk)
+                    self.assertEqual([len(c) for c in chunks],
+                                     [100, 100, 50])
+                    items = []
+                    async for item in tr.items(chunk_size=30):
+                        items.append(item)
+                    self.assertEqual(items, data)
+                    keys = []
+                    async for key in tr.keys(prefix=b'key-01',
+                                             reverse=True):
+                        keys.append(key)
+                    self.assertEqual(keys, [b'key-%03d' % i
+                                            for i in range(19, 9, -1)])
+        self.run_async(run())
+
+    def test_order(self):
+        """Test that scan is queued after pending write."""
+        data = [(b'key-%03d' % i, b'value') for i in range(100)]
+        writing = threading.Event()
+        resume = threading.Event()
+
+        def pairs():
+            yield data[0]
+            # Worker is inside of put_many() until resumed
+            writing.set()
+            resume.wait(10)
+            for pair in data[1:]:
+                yield pair
+
+        async def scan(tr):
+            result = []
+            async for chunk in tr.iter_chunks(10, keys_only=True):
+                result.extend(chunk)
+            return result
+
+        async def run():
+            async with AsyncTkvdb(self.path) as db:
+                async with db.transaction() as tr:
+                    write = asyncio.ensure_future(tr.put_many(pairs()))
+                    await self.loop.run_in_executor(None, writing.wait, 10)
+                    keys = asyncio.ensure_future(scan(tr))
+                    await asyncio.sleep(0.01)
+                    self.assertFalse(keys.done())
+                    resume.set()
+                    await write
+                    self.assertEqual(await keys, [k for k, v in data])
+        self.run_async(run())
+
+    def test_worker(self):
+        """Test that calls are executed in worker thread."""
+        async def run():
+            async with AsyncTkvdb(self.path) as db:
+                thread = await db.run(threading.current_thread)
+                self.assertNotEqual(thread, threading.current_thread())
+                self.assertEqual(await db.run(threading.current_thread),
+                                 thread)
+        self.run_async(run())
+
+
+if __name__ == '__main__':
+    unittest.main()
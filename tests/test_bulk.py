@@ -0,0 +1,121 @@
+import unittest
+
+import os
+
+from tkvdb import Tkvdb, bulkload
+from tkvdb.bulk import BulkWriter
+from tkvdb.params import Params, Param
+from .base import TestMixin
+
+
+class TestBulkWriter(TestMixin, unittest.TestCase):
+    """Test bulk writer with automatic commits."""
+    def test_mem(self):
+        """Test transaction memory accounting."""
+        with self.db.transaction() as tr:
+            self.assertEqual(tr.mem(), 0)
+            tr[b'key'] = b'value' * 100
+            mem = tr.mem()
+            self.assertTrue(mem >= 500)
+            tr.commit()
+            self.assertEqual(tr.mem(), 0)
+            # Transaction may be reused after commit
+            self.assertFalse(tr.is_started)
+            tr.begin()
+            tr[b'key-2'] = b'value'
+            tr.commit()
+        with self.db.transaction() as tr:
+            self.assertEqual(list(tr), [b'key', b'key-2'])
+
+    def test_flush(self):
+        """Test commits at memory limit."""
+        flushes = []
+        data = [(b'key-%04d' % i, b'value' * 20) for i in range(1000)]
+        with BulkWriter(self.db, mem_limit=16 * 1024,
+                        on_flush=flushes.append) as writer:
+            writer.put_many(data)
+            self.assertTrue(writer.flushes > 1)
+            self.assertEqual(writer.flushes, len(flushes))
+        self.assertEqual(sum(f.records for f in flushes), len(data))
+        self.assertEqual(sum(f.bytes for f in flushes),
+                         sum(len(k) + len(v) for k, v in data))
+        self.assertEqual(writer.total_records, len(data))
+        for stats in flushes[:-1]:
+            self.assertTrue(stats.mem >= 16 * 1024)
+
+        with self.db.transaction() as tr:
+            self.assertEqual(list(tr.items()), data)
+
+    def test_abort(self):
+        """Test dropping unflushed data on exception."""
+        with self.assertRaises(ValueError):
+            with BulkWriter(self.db) as writer:
+                writer.put(b'key', b'value')
+                raise ValueError()
+        with self.db.transaction() as tr:
+            self.assertEqual(list(tr), [])
+
+    def test_tr_limit(self):
+        """Test flush on ENOMEM when transaction memory is limited."""
+        params = Params({Param.TrDynalloc: 0, Param.TrLimit: 64 * 1024})
+        with BulkWriter(self.db, mem_limit=1024 * 1024,
+                        params=params) as writer:
+            for i in range(1000):
+                writer.put(b'key-%04d' % i, b'value' * 20)
+            self.assertTrue(writer.flushes > 1)
+        with self.db.transaction() as tr:
+            self.assertEqual(len(list(tr)), 1000)
+
+        # Chunks are split at ENOMEM
+        with BulkWriter(self.db, mem_limit=1024 * 1024,
+                        params=params) as writer:
+            writer.put_many(((b'chunk-%04d' % i, b'value' * 20)
+                             for i in range(1000)), chunk_size=300)
+            self.assertTrue(writer.flushes > 1)
+        self.assertEqual(writer.total_records, 1000)
+        with self.db.transaction() as tr:
+            self.assertEqual(len(list(tr.keys(prefix=b'chunk-'))), 1000)
+
+    def test_bulkload(self):
+        """Test loading of new database from sorted pairs."""
+        self.db.close()
+        os.unlink(self.path)
+        data = [(b'key-%06d' % i, b'value') for i in range(10000)]
+        params = Params({Param.TrDynalloc: 0, Param.TrLimit: 256 * 1024})
+        flushes = []
+        stats = bulkload(self.path, iter(data), params,
+                         on_flush=flushes.append)
+        self.assertEqual(stats.records, 10000)
+        self.assertEqual(stats.bytes, 10000 * 15)
+        self.assertTrue(stats.commits > 1)
+        self.assertEqual(stats.commits, len(flushes))
+        self.assertTrue(stats.seconds > 0)
+        self.assertTrue(stats.records_per_second > 0)
+        with Tkvdb(self.path) as db:
+            with db.transaction() as tr:
+                self.assertEqual(list(tr.items()), data)
+
+        with self.assertRaises(FileExistsError):
+            bulkload(self.path, data)
+        stats = bulkload(self.path, data[:10], overwrite=True)
+        self.assertEqual((stats.records, stats.commits), (10, 1))
+
+        # Failed load keeps previous database
+        with self.assertRaises(ValueError):
+            bulkload(self.path, data[:10] + data[5:6], overwrite=True,
+                     chunk_size=3)
+        with Tkvdb(self.path) as db:
+            with db.transaction() as tr:
+                self.assertEqual(list(tr.items()), data[:10])
+        prefix = '.{}.'.format(os.path.basename(self.path))
+        self.assertEqual([f for f in os.listdir(os.path.dirname(self.path))
+                          if f.startswith(prefix)], [])
+        # Unsorted data may be loaded without check
+        stats = bulkload(self.path, data[10:20] + data[:10],
+                         check_order=False, overwrite=True)
+        self.assertEqual(stats.records, 20)
+        self.db = Tkvdb(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+
+from tkvdb import ValueCache
+from tkvdb.errors import NotFoundError
+from tkvdb.transaction import Transaction
+from .base import TestMixin
+
+
+class TestCache(TestMixin, unittest.TestCase):
+    """Test transaction value cache."""
+    def test_init(self):
+        """Test cache limits."""
+        with self.assertRaises(ValueError):
+            ValueCache()
+        with self.assertRaises(ValueError):
+            ValueCache(max_entries=-1)
+        cache = ValueCache(max_entries=10, max_bytes=100)
+        self.assertEqual(cache.max_entries, 10)
+        self.assertEqual(cache.max_bytes, 100)
+        self.assertEqual(len(cache), 0)
+
+    def test_read(self):
+        """Test cached reads and counters."""
+        data = self.create_data('cache')
+        cache = ValueCache(max_entries=100)
+        with self.db.transaction(cache=cache) as tr:
+            self.assertIs(tr.cache, cache)
+            self.assertEqual(tr.getvalue(b'cache-1'), data[b'cache-1'])
+            self.assertEqual(cache.stats(), {
+                'hits': 0, 'misses': 1, 'evictions': 0, 'entries': 1,
+                'bytes': len(b'cache-1') + len(data[b'cache-1']),
+            })
+            value = tr.getvalue(b'cache-1')
+            self.assertIs(tr[b'cache-1'], value)
+            self.assertIs(tr.get(bytearray(b'cache-1')), value)
+            self.assertEqual(cache.hits, 3)
+            self.assertIn(b'cache-1', tr)
+            self.assertEqual(tr.get_many([b'cache-1', b'cache-2', b'no']),
+                             [value, data[b'cache-2'], None])
+            self.assertIn(b'cache-2', cache)
+            self.assertNotIn(b'no', cache)
+            with self.assertRaises(NotFoundError):
+                tr.getvalue(b'no')
+            self.assertEqual(cache.misses, 4)
+            cache.reset_stats()
+            self.assertEqual((cache.hits, cache.misses), (0, 0))
+            self.assertEqual(len(cache), 2)
+        self.assertEqual(len(cache), 0)
+
+    def test_writes(self):
+        """Test that cache is updated by writes."""
+        self.create_data('cache')
+        self.create_data('other')
+        cache = ValueCache(max_entries=100)
+        with self.db.transaction(cache=cache) as tr:
+            tr.get_many([b'cache-1', b'cache-2', b'cache-3', b'other-1'])
+            tr[b'cache-1'] = b'new'
+            self.assertEqual(tr[b'cache-1'], b'new')
+            tr[b'cache-1'] = bytearray(b'buffer')
+            self.assertNotIn(b'cache-1', cache)
+            self.assertEqual(tr[b'cache-1'], b'buffer')
+            del tr[b'cache-1']
+            self.assertNotIn(b'cache-1', cache)
+            self.assertIsNone(tr.get(b'cache-1'))
+
+            tr.put_many([(b'cache-2', b'many')])
+            self.assertEqual(tr[b'cache-2'], b'many')
+            tr.delete_many([b'cache-2'])
+            self.assertIsNone(tr.get(b'cache-2'))
+
+            tr.delete(b'cache', prefix=True)
+            self.assertIsNone(tr.get(b'cache-3'))
+            self.assertIn(b'other-1', cache)
+            tr.delete_many([b'other'], prefix=True)
+            self.assertIsNone(tr.get(b'other-1'))
+
+            tr.rollback()
+            self.assertEqual(len(cache), 0)
+            tr.begin()
+            self.assertEqual(tr[b'cache-3'], b'cache-val-3')
+
+    def test_limits(self):
+        """Test cache eviction."""
+        self.create_data('cache', num=10)
+        cache = ValueCache(max_entries=3)
+        with self.db.transaction(cache=cache) as tr:
+            for i in range(5):
+                tr.get('cache-{}'.format(i).encode())
+            self.assertEqual(len(cache), 3)
+            self.assertEqual(cache.evictions, 2)
+            tr.get(b'cache-2')
+            tr.get(b'cache-5')
+            self.assertIn(b'cache-2', cache)
+            self.assertNotIn(b'cache-3', cache)
+
+        # Key and value size of every item is 18 bytes
+        cache = ValueCache(max_bytes=40)
+        with self.db.transaction(cache=cache) as tr:
+            for i in range(5):
+                tr.get('cache-{}'.format(i).encode())
+            self.assertEqual(len(cache), 2)
+            self.assertEqual(cache.nbytes, 36)
+            self.assertEqual(cache.evictions, 3)
+            tr[b'cache-4'] = b'x' * 100
+            self.assertNotIn(b'cache-4', cache)
+            self.assertEqual(cache.nbytes, 18)
+
+    def test_ram(self):
+        """Test cache of RAM-only transaction."""
+        cache = ValueCache(max_entries=10)
+        with Transaction(cache=cache) as tr:
+            tr[b'key'] = b'value'
+            self.assertEqual(tr[b'key'], b'value')
+            self.assertEqual(cache.hits, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
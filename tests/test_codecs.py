@@ -0,0 +1,197 @@
+import unittest
+
+from tkvdb import Tkvdb, ValueCache
+from tkvdb.bulk import BulkWriter
+from tkvdb.codecs import (
+    Codec, BytesCodec, IntCodec, StrCodec, StructCodec, TupleCodec
+)
+from tkvdb.cursor import Seek
+from tkvdb.transaction import Transaction
+from .base import TestMixin
+
+
+class JsonCodec(Codec):
+    """Custom Python codec."""
+    def encode(self, obj):
+        return repr(obj).encode()
+
+    def decode(self, data):
+        return eval(data.decode())
+
+
+class CountingCodec(JsonCodec):
+    """Custom codec counting encoded objects."""
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, obj):
+        self.encoded += 1
+        return super().encode(obj)
+
+
+class TestCodecs(TestMixin, unittest.TestCase):
+    """Test key and value codecs."""
+    def test_int(self):
+        """Test integer codec."""
+        codec = IntCodec()
+        self.assertEqual(codec.size, 8)
+        self.assertEqual(codec.encode(1), b'\x00' * 7 + b'\x01')
+        self.assertEqual(codec.decode(b'\xff' * 8), 2 ** 64 - 1)
+        with self.assertRaises(OverflowError):
+            codec.encode(-1)
+        with self.assertRaises(ValueError):
+            codec.decode(b'\x00')
+        with self.assertRaises(TypeError):
+            codec.encode('1')
+
+        codec = IntCodec(2)
+        self.assertEqual(codec.encode(258), b'\x01\x02')
+        with self.assertRaises(OverflowError):
+            codec.encode(65536)
+        with self.assertRaises(ValueError):
+            IntCodec(9)
+
+        for size in (1, 3, 8):
+            codec = IntCodec(size, signed=True)
+            low = -2 ** (size * 8 - 1)
+            high = 2 ** (size * 8 - 1) - 1
+            values = [low, low + 1, -2, -1, 0, 1, 2, high - 1, high]
+            encoded = [codec.encode(v) for v in values]
+            self.assertEqual(sorted(encoded), encoded)
+            self.assertEqual([codec.decode(e) for e in encoded], values)
+            with self.assertRaises(OverflowError):
+                codec.encode(high + 1)
+            with self.assertRaises(OverflowError):
+                codec.encode(low - 1)
+
+    def test_str_struct(self):
+        """Test string and struct codecs."""
+        codec = StrCodec()
+        self.assertEqual(codec.size, 0)
+        self.assertEqual(codec.encode('ключ'), 'ключ'.encode('utf-8'))
+        self.assertEqual(codec.decode(bytearray('ключ'.encode())), 'ключ')
+        with self.assertRaises(TypeError):
+            codec.encode(b'bytes')
+
+        codec = StructCodec('Hi')
+        self.assertEqual(codec.size, 6)
+        self.assertEqual(codec.encode((1, -1)), b'\x00\x01\xff\xff\xff\xff')
+        self.assertEqual(codec.decode(codec.encode((1, -1))), (1, -1))
+        self.assertEqual(StructCodec('<H').encode((1,)), b'\x01\x00')
+        self.assertEqual(BytesCodec().decode(b'raw'), b'raw')
+
+    def test_tuple(self):
+        """Test tuple codec."""
+        codec = TupleCodec(StrCodec(), IntCodec(4), BytesCodec())
+        self.assertEqual(codec.size, 0)
+        self.assertEqual(TupleCodec(IntCodec(2), IntCodec(4)).size, 6)
+        values = [
+            ('', 0, b''), ('a', 1, b'z'), ('a\x00', 0, b'\x00\x00'),
+            ('a\x00b', 5, b'\x00'), ('ab', 0, b''), ('b', 2, b'\xff'),
+        ]
+        encoded = [codec.encode(v) for v in values]
+        self.assertEqual(sorted(encoded), encoded)
+        self.assertEqual([codec.decode(e) for e in encoded], values)
+        with self.assertRaises(ValueError):
+            codec.encode(('a', 1))
+        with self.assertRaises(ValueError):
+            codec.decode(b'abc')
+        with self.assertRaises(ValueError):
+            TupleCodec()
+
+    def test_transaction(self):
+        """Test transaction with codecs."""
+        with self.db.transaction(key_codec=IntCodec(4),
+                                 value_codec=StrCodec()) as tr:
+            tr.put_many((i, 'value-{}'.format(i)) for i in range(20))
+            tr[100] = 'hundred'
+            self.assertEqual(tr.getvalue(5), 'value-5')
+            self.assertEqual(tr[100], 'hundred')
+            self.assertEqual(tr.get(1000, 'default'), 'default')
+            self.assertIn(7, tr)
+            self.assertNotIn(70, tr)
+            self.assertEqual(tr.get_many([1, 50, 2]),
+                             ['value-1', None, 'value-2'])
+            del tr[100]
+            tr.delete_many([18, 19])
+            self.assertEqual(list(tr.keys(start=15)), [15, 16, 17])
+            self.assertEqual(list(tr.values(start=3, stop=5)),
+                             ['value-3', 'value-4'])
+            self.assertEqual(list(reversed(tr.items(stop=2))),
+                             [(1, 'value-1'), (0, 'value-0')])
+            self.assertEqual(list(tr.keys(stop=3, copy=False)), [0, 1, 2])
+            self.assertEqual(tr.iter_chunks(3).__next__(),
+                             [(0, 'value-0'), (1, 'value-1'),
+                              (2, 'value-2')])
+            # Prefix is raw bytes
+            self.assertEqual(len(list(tr.keys(prefix=b'\x00'))), 18)
+            self.assertEqual(tr.partition(2), [(None, 9), (9, None)])
+            with self.assertRaises(ValueError):
+                tr.partition(2, prefix=b'\x00')
+
+            with tr.cursor(4, Seek.GE) as c:
+                self.assertEqual(c.key(), 4)
+                self.assertEqual(c.val(), 'value-4')
+                self.assertEqual(c.key_view(), b'\x00\x00\x00\x04')
+            tr.commit()
+
+        with self.db.transaction() as tr:
+            self.assertEqual(tr.getvalue(b'\x00\x00\x00\x01'), b'value-1')
+
+    def test_db_codecs(self):
+        """Test database default codecs."""
+        key_codec = TupleCodec(StrCodec(), IntCodec(2))
+        with Tkvdb(self.path, key_codec=key_codec,
+                   value_codec=JsonCodec()) as db:
+            self.assertIs(db.key_codec, key_codec)
+            with db.transaction(cache=ValueCache(max_entries=10)) as tr:
+                self.assertIs(tr.key_codec, key_codec)
+                tr[('user', 1)] = {'name': 'first'}
+                tr[('user', 2)] = [1, 2]
+                tr[('other', 1)] = None
+                self.assertEqual(tr[('user', 1)], {'name': 'first'})
+                self.assertEqual(tr[('user', 1)], {'name': 'first'})
+                self.assertEqual(tr.cache.hits, 2)
+                self.assertIsNone(tr.getvalue(('other', 1)))
+                self.assertEqual(list(tr.keys(prefix=b'user\x00\x00')),
+                                 [('user', 1), ('user', 2)])
+                tr.commit()
+
+            with db.transaction(key_codec=BytesCodec(),
+                                value_codec=BytesCodec()) as tr:
+                self.assertEqual(tr[b'user\x00\x00\x00\x02'], b'[1, 2]')
+
+            with BulkWriter(db) as writer:
+                writer.put(('bulk', 1), 'value')
+            self.assertEqual(writer.total_bytes, 8 + len(b"'value'"))
+
+    def test_bulk_encode(self):
+        """Test that bulk writer encodes every object once."""
+        codec = CountingCodec()
+        with Tkvdb(self.path, key_codec=codec, value_codec=codec) as db:
+            with BulkWriter(db) as writer:
+                writer.put(1, 'one')
+                writer.put_many([(i, 'value') for i in range(2, 12)],
+                                chunk_size=4)
+                writer.delete(5)
+            self.assertEqual(codec.encoded, 23)
+            self.assertEqual(writer.total_bytes,
+                             len(b"1'one'") + 10 * len(b"'value'")
+                             + sum(len(str(i)) for i in range(2, 12))
+                             + len(b'5'))
+            with db.transaction() as tr:
+                self.assertEqual(tr[1], 'one')
+                self.assertNotIn(5, tr)
+                self.assertEqual(len(list(tr)), 10)
+
+    def test_ram(self):
+        """Test codecs of RAM-only transaction."""
+        with Transaction(key_codec=StrCodec(),
+                         value_codec=IntCodec(signed=True)) as tr:
+            tr['b'] = -5
+            tr['a'] = 5
+            self.assertEqual(dict(tr.items()), {'a': 5, 'b': -5})
+
+
+if __name__ == '__main__':
+    unittest.main()
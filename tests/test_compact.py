@@ -0,0 +1,130 @@
+import os
+import tempfile
+import unittest
+
+from tkvdb import Tkvdb
+from tkvdb.errors import EnomemError
+from tkvdb.params import Params, Param
+from .base import TestMixin
+
+
+class TestCompact(TestMixin, unittest.TestCase):
+    """Test database compaction."""
+    def churn(self, rounds=20):
+        """Create data and overwrite it by multiple commits."""
+        for i in range(rounds):
+            with self.db.transaction() as tr:
+                for j in range(100):
+                    tr[b'key-%03d' % j] = b'value-%03d-%03d' % (j, i)
+                del tr[b'key-%03d' % i]
+                tr.commit()
+        with self.db.transaction() as tr:
+            return list(tr.items())
+
+    def test_in_place(self):
+        """Test compaction with file replacement."""
+        items = self.churn()
+        old_size = os.path.getsize(self.path)
+        calls = []
+        tr = self.db.transaction()
+        stats = self.db.compact(progress=lambda *args: calls.append(args))
+        self.assertFalse(tr.is_initialized)
+        self.assertEqual(stats.records, len(items))
+        self.assertEqual(stats.old_size, old_size)
+        self.assertEqual(stats.new_size, os.path.getsize(self.path))
+        self.assertEqual(stats.saved, stats.old_size - stats.new_size)
+        self.assertGreater(stats.saved, 0)
+        self.assertEqual(calls[-1][0], len(items))
+        self.assertEqual(calls[-1][1],
+                         sum(len(k) + len(v) for k, v in items))
+        # No temporary files are left
+        directory = os.path.dirname(self.path)
+        self.assertFalse([f for f in os.listdir(directory)
+                          if f.endswith('.compact')])
+
+        with self.db.transaction() as tr:
+            self.assertEqual(list(tr.items()), items)
+            tr[b'new'] = b'value'
+            tr.commit()
+        self.db.close()
+        with Tkvdb(self.path) as db:
+            with db.transaction() as tr:
+                self.assertEqual(len(list(tr.items())), len(items) + 1)
+
+    def test_dest_path(self):
+        """Test compaction into other file."""
+        items = self.churn(5)
+        old_size = os.path.getsize(self.path)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'copy.tkvdb')
+            with Tkvdb(self.path, readonly=True) as db:
+                stats = db.compact(path, mem_limit=2048)
+            self.assertEqual(os.path.getsize(self.path), old_size)
+            self.assertEqual(stats.new_size, os.path.getsize(path))
+            with Tkvdb(path) as db:
+                with db.transaction() as tr:
+                    self.assertEqual(list(tr.items()), items)
+            with self.assertRaises(FileExistsError):
+                self.db.compact(path)
+
+        params = Params({Param.TrDynalloc: 0, Param.TrLimit: 64})
+        with Tkvdb(self.path, params) as db:
+            with self.assertRaises(EnomemError):
+                db.compact()
+        self.assertEqual(os.path.getsize(self.path), old_size)
+
+    def test_background(self):
+        """Test compaction in background thread."""
+        items = self.churn(5)
+        future = self.db.compact(background=True)
+        self.assertEqual(future.result(10).records, len(items))
+        with self.db.transaction() as tr:
+            self.assertEqual(list(tr.items()), items)
+
+    def test_modified(self):
+        """Test that modified database isn't replaced."""
+        items = self.churn(5)
+        size = os.path.getsize(self.path)
+
+        def progress(records, nbytes):
+            with self.db.transaction() as tr:
+                tr[b'concurrent'] = b'value'
+                tr.commit()
+
+        with self.assertRaises(RuntimeError):
+            self.db.compact(progress=progress)
+        self.assertGreater(os.path.getsize(self.path), size)
+        with self.db.transaction() as tr:
+            self.assertEqual(len(list(tr.items())), len(items) + 1)
+
+        self.db.close()
+        with self.assertRaises(RuntimeError):
+            self.db.compact()
+        with Tkvdb(self.path, readonly=True) as db:
+            with self.assertRaises(PermissionError):
+                db.compact()
+
+    def test_empty(self):
+        """Test compaction of empty database."""
+        stats = self.db.compact()
+        self.assertEqual(stats.records, 0)
+        with self.db.transaction() as tr:
+            self.assertEqual(list(tr.items()), [])
+
+    def test_mode(self):
+        """Test that compaction keeps mode of database file."""
+        self.churn(3)
+        os.chmod(self.path, 0o644)
+        self.db.compact()
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o644)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dest = os.path.join(tmpdir, 'dest.tkvdb')
+            with open(dest, 'wb'):
+                pass
+            os.chmod(dest, 0o640)
+            self.db.compact(dest)
+            self.assertEqual(os.stat(dest).st_mode & 0o777, 0o640)
+
+
+if __name__ == '__main__':
+    unittest.main()
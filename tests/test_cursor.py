@@ -127,6 +127,67 @@ class TestCursor(TestMixin, unittest.TestCase):
                 self.assertEqual(set(keys), set(values.keys()))
                 self.assertEqual(set(vals), set(values.values()))
 
+    def test_views(self):
+        """Test zero-copy key and value views."""
+        with self.db.transaction() as tr:
+            tr[b'key1'] = b'value1'
+            tr[b'key2'] = b'value2'
+            with tr.cursor() as c:
+                c.first()
+                key, val = c.key_view(), c.val_view()
+                self.assertTrue(key.readonly)
+                self.assertEqual(key, b'key1')
+                self.assertEqual(bytes(val[:5]), b'value')
+                # Views are released after cursor move
+                c.next()
+                with self.assertRaises(ValueError):
+                    key.tobytes()
+                with self.assertRaises(ValueError):
+                    bytes(val)
+                val = c.val_view()
+                self.assertEqual(val, b'value2')
+                tr[b'key3'] = b'value3'
+                with self.assertRaises(ValueError):
+                    bytes(val)
+                # Derived views block cursor until they are deleted
+                c.first()
+                part = c.val_view()[:5]
+                with self.assertRaises(BufferError):
+                    c.next()
+                self.assertEqual(part, b'value')
+                del part
+                c.next()
+                self.assertEqual(c.key(), b'key2')
+
+    def test_views_free(self):
+        """Test that derived views don't block free and close."""
+        with self.db.transaction() as tr:
+            tr[b'key1'] = b'value1'
+            tr.commit()
+        tr = self.db.transaction()
+        tr.begin()
+        c = tr.cursor()
+        c.first()
+        key, val = c.key_view()[1:], c.val_view()[1:]
+        c.free()
+        self.assertFalse(c.is_initialized)
+        self.assertEqual(key, b'ey1')
+        # Database close frees transaction, memory stays valid
+        self.db.close()
+        self.assertFalse(tr.is_initialized)
+        self.assertEqual(val, b'alue1')
+        del key, val, c, tr
+
+        # Views and objects collected in any order
+        self.db = Tkvdb(self.path)
+        tr = self.db.transaction()
+        tr.begin()
+        c = tr.cursor()
+        c.first()
+        part = c.val_view()[:5]
+        del c, tr
+        self.assertEqual(part, b'value')
+
     def test_seek_eq(self):
         """Test cursor seek iteration with Seek.EQ."""
         values = self.create_data('seek')
@@ -1,8 +1,10 @@
 import unittest
 import tempfile
+import time
 import os
+from unittest import mock
 
-from tkvdb import Tkvdb
+from tkvdb import Tkvdb, Durability
 
 
 class TestDB(unittest.TestCase):
@@ -44,6 +46,65 @@ class TestDB(unittest.TestCase):
             self.assertEqual(db.path, self.path)
         # Not really a good test for closing
 
+    def commit(self, db, num=1):
+        """Do num commits to database."""
+        for i in range(num):
+            with db.transaction() as tr:
+                tr[str(i).encode()] = b'value'
+                tr.commit()
+
+    def test_sync(self):
+        """Test database sync."""
+        with Tkvdb(self.path) as db:
+            self.assertEqual(db.durability, Durability.NEVER)
+            with mock.patch('os.fsync') as fsync:
+                self.commit(db)
+                self.assertEqual(fsync.call_count, 0)
+                db.sync()
+                self.assertEqual(fsync.call_count, 1)
+        with self.assertRaises(RuntimeError):
+            db.sync()
+
+    def test_durability_commit(self):
+        """Test sync on every commit."""
+        with mock.patch('os.fsync') as fsync:
+            with Tkvdb(self.path, durability=Durability.COMMIT) as db:
+                self.commit(db, 3)
+                self.assertEqual(fsync.call_count, 3)
+            self.assertEqual(fsync.call_count, 3)
+
+    def test_durability_group(self):
+        """Test background sync after N commits or interval."""
+        with self.assertRaises(ValueError):
+            Tkvdb(self.path, durability=Durability.GROUP)
+
+        with mock.patch('os.fsync') as fsync:
+            with Tkvdb(self.path, durability=Durability.GROUP,
+                       sync_every=5) as db:
+                self.commit(db, 4)
+                time.sleep(0.05)
+                self.assertEqual(fsync.call_count, 0)
+                self.commit(db, 1)
+                for i in range(100):
+                    if fsync.call_count:
+                        break
+                    time.sleep(0.01)
+                self.assertEqual(fsync.call_count, 1)
+                self.commit(db, 2)
+            # Pending commits are synced on close
+            self.assertEqual(fsync.call_count, 2)
+
+        with mock.patch('os.fsync') as fsync:
+            with Tkvdb(self.path, durability=Durability.GROUP,
+                       sync_interval=10) as db:
+                self.commit(db)
+                for i in range(100):
+                    if fsync.call_count:
+                        break
+                    time.sleep(0.01)
+                self.assertEqual(fsync.call_count, 1)
+            self.assertEqual(fsync.call_count, 1)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,136 @@
+import io
+import os
+import tempfile
+import unittest
+
+from tkvdb import Tkvdb, restore
+from tkvdb.codecs import IntCodec
+from tkvdb.dump import dump
+from tkvdb.errors import EnomemError
+from tkvdb.params import Params, Param
+from tkvdb.transaction import Transaction
+from .base import TestMixin
+
+
+class TestDump(TestMixin, unittest.TestCase):
+    """Test dump and restore."""
+    def setUp(self):
+        super().setUp()
+        self.target = tempfile.NamedTemporaryFile(delete=False)
+        self.target.close()
+        os.unlink(self.target.name)
+
+    def tearDown(self):
+        if os.path.exists(self.target.name):
+            os.unlink(self.target.name)
+        super().tearDown()
+
+    def restored(self, *args, **kwargs):
+        """Return items of restored database."""
+        with Tkvdb(self.target.name, *args, **kwargs) as db:
+            with db.transaction() as tr:
+                return list(tr.items())
+
+    def test_round_trip(self):
+        """Test dump and restore with compression."""
+        data = self.create_data('dump', num=1000)
+        data.update(self.create_data('other', num=10))
+        with self.db.transaction() as tr:
+            tr[b'empty'] = b''
+            tr.commit()
+        items = sorted(data.items()) + [(b'empty', b'')]
+        items.sort()
+
+        for compress in (None, 'zlib', 'bz2', 'lzma'):
+            stream = io.BytesIO()
+            self.assertEqual(self.db.dump(stream, compress=compress,
+                                          block_size=4096), len(items))
+            stream.seek(0)
+            self.assertEqual(restore(stream, self.target.name,
+                                     overwrite=True), len(items))
+            self.assertEqual(self.restored(), items)
+
+        stream = io.BytesIO()
+        self.assertEqual(self.db.dump(stream, prefix=b'other'), 10)
+        stream.seek(0)
+        with self.assertRaises(FileExistsError):
+            restore(stream, self.target.name)
+        stream.seek(0)
+        restore(stream, self.target.name, overwrite=True)
+        self.assertEqual(self.restored(),
+                         [i for i in items if i[0].startswith(b'other')])
+
+        with self.assertRaises(ValueError):
+            self.db.dump(io.BytesIO(), compress='gzip')
+        with self.assertRaises(ValueError):
+            self.db.dump(io.BytesIO(), block_size=0)
+
+    def test_large_records(self):
+        """Test records larger than block."""
+        with Transaction(key_codec=IntCodec(4)) as tr:
+            for i in range(10):
+                tr[i] = bytes([i]) * (i * 100)
+            stream = io.BytesIO()
+            self.assertEqual(dump(tr, stream, block_size=250), 10)
+        stream.seek(0)
+        restore(stream, self.target.name)
+        self.assertEqual(
+            self.restored(key_codec=IntCodec(4)),
+            [(i, bytes([i]) * (i * 100)) for i in range(10)]
+        )
+
+    def test_empty(self):
+        """Test empty dump."""
+        stream = io.BytesIO()
+        self.assertEqual(self.db.dump(stream), 0)
+        stream.seek(0)
+        self.assertEqual(restore(stream, self.target.name), 0)
+        self.assertEqual(self.restored(), [])
+
+    def test_limits(self):
+        """Test restore with transaction memory limits."""
+        self.create_data('dump', num=1000)
+        stream = io.BytesIO()
+        self.db.dump(stream, block_size=1024)
+        params = Params({Param.TrDynalloc: 0, Param.TrLimit: 16 * 1024})
+        for kwargs in ({'params': params}, {'mem_limit': 4096}):
+            stream.seek(0)
+            self.assertEqual(restore(stream, self.target.name,
+                                     overwrite=True, **kwargs), 1000)
+            self.assertEqual(len(self.restored()), 1000)
+
+        params = Params({Param.TrDynalloc: 0, Param.TrLimit: 64})
+        stream.seek(0)
+        with self.assertRaises(EnomemError):
+            restore(stream, self.target.name, params, overwrite=True)
+        # Failed restore keeps previous database
+        self.assertEqual(len(self.restored()), 1000)
+
+    def test_corrupted(self):
+        """Test errors of malformed dump."""
+        self.create_data('dump', num=100)
+        stream = io.BytesIO()
+        self.db.dump(stream)
+        data = stream.getvalue()
+
+        broken = bytearray(data)
+        broken[-40] ^= 1
+        for value in (b'', b'NOTADUMP' + data[8:], bytes(broken),
+                      data[:-10], data[:-28]):
+            with self.assertRaises(ValueError):
+                restore(io.BytesIO(value), self.target.name)
+            self.assertFalse(os.path.exists(self.target.name))
+
+        # Existing database isn't replaced by truncated dump
+        restore(io.BytesIO(data), self.target.name)
+        with self.assertRaises(ValueError):
+            restore(io.BytesIO(data[:-28]), self.target.name,
+                    overwrite=True)
+        self.assertEqual(len(self.restored()), 100)
+        prefix = '.{}.'.format(os.path.basename(self.target.name))
+        self.assertEqual([f for f in os.listdir(os.path.dirname(self.path))
+                          if f.startswith(prefix)], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -33,6 +33,127 @@ class TestIterators(TestMixin, unittest.TestCase):
                 self.assertTrue(value in data.values())
                 self.assertEqual(tr[key], data[key])
 
+    def test_transaction_empty(self):
+        """Test iterators over empty transaction."""
+        with self.db.transaction() as tr:
+            self.assertEqual(list(tr), [])
+            self.assertEqual(list(reversed(tr.items())), [])
+
+    def test_transaction_prefix(self):
+        """Test transaction iterators limited by prefix."""
+        self.create_data('a', num=3)
+        data = self.create_data('b', num=12)
+        self.create_data('c', num=3)
+        with self.db.transaction() as tr:
+            self.assertEqual(list(tr.keys(prefix=b'b-')), sorted(data))
+            self.assertEqual(list(tr.keys(prefix=b'b-1')),
+                             [b'b-1', b'b-10', b'b-11'])
+            self.assertEqual(list(tr.items(prefix=b'b-1', reverse=True)),
+                             [(b'b-11', data[b'b-11']),
+                              (b'b-10', data[b'b-10']),
+                              (b'b-1', data[b'b-1'])])
+            self.assertEqual(list(reversed(tr.values(prefix=b'b-1'))),
+                             [data[b'b-11'], data[b'b-10'], data[b'b-1']])
+            self.assertEqual(list(tr.keys(prefix=b'missing')), [])
+            self.assertEqual(list(tr.keys(prefix=b'')), list(tr.keys()))
+
+    def test_transaction_range(self):
+        """Test transaction iterators limited by start and stop keys."""
+        with self.db.transaction() as tr:
+            for i in range(10):
+                tr[str(i).encode('utf-8')] = b'value'
+            tr.commit()
+
+        with self.db.transaction() as tr:
+            self.assertEqual(list(tr.keys(start=b'3', stop=b'6')),
+                             [b'3', b'4', b'5'])
+            self.assertEqual(list(tr.keys(start=b'35', stop=b'55')),
+                             [b'4', b'5'])
+            self.assertEqual(list(tr.keys(start=b'3', stop=b'6',
+                                          reverse=True)),
+                             [b'5', b'4', b'3'])
+            self.assertEqual(list(tr.keys(start=b'8')), [b'8', b'9'])
+            self.assertEqual(list(tr.keys(stop=b'2')), [b'0', b'1'])
+            self.assertEqual(list(tr.keys(stop=b'2', reverse=True)),
+                             [b'1', b'0'])
+            self.assertEqual(list(tr.keys(start=b'a')), [])
+            self.assertEqual(list(tr.keys(stop=b'0')), [])
+            self.assertEqual(list(tr.keys(start=b'6', stop=b'3')), [])
+            # Prefix and range are combined
+            self.assertEqual(list(tr.keys(prefix=b'5', start=b'3')), [b'5'])
+
+    def test_transaction_chunks(self):
+        """Test transaction chunked iteration."""
+        data = self.create_data('chunks', num=25)
+        with self.db.transaction() as tr:
+            chunks = list(tr.iter_chunks(10))
+            self.assertEqual([len(c) for c in chunks], [10, 10, 5])
+            self.assertEqual(sum(chunks, []), sorted(data.items()))
+
+            chunks = list(tr.iter_chunks(10, keys_only=True, reverse=True,
+                                         prefix=b'chunks-1'))
+            self.assertEqual(chunks, [[b'chunks-19', b'chunks-18',
+                                       b'chunks-17', b'chunks-16',
+                                       b'chunks-15', b'chunks-14',
+                                       b'chunks-13', b'chunks-12',
+                                       b'chunks-11', b'chunks-10'],
+                                      [b'chunks-1']])
+            with self.assertRaises(ValueError):
+                list(tr.iter_chunks(0))
+
+    def test_cursor_fetch(self):
+        """Test cursor fetch continuing from current position."""
+        data = self.create_data('fetch', num=10)
+        keys = sorted(data)
+        with self.db.transaction() as tr:
+            with tr.cursor() as c:
+                self.assertEqual(c.fetch(4, keys_only=True), keys[:4])
+                self.assertEqual(next(iter(c)), keys[4])
+                self.assertEqual(c.fetch(4),
+                                 [(k, data[k]) for k in keys[5:9]])
+                self.assertEqual(c.fetch(4), [(keys[9], data[keys[9]])])
+                self.assertEqual(c.fetch(4), [])
+
+    def test_skip(self):
+        """Test skipping of iterator values."""
+        self.create_data('a', 10)
+        self.create_data('b', 10)
+        with self.db.transaction() as tr:
+            it = tr.keys(prefix=b'a')
+            self.assertEqual(it.skip(0), 0)
+            self.assertEqual(it.skip(3), 3)
+            self.assertEqual(next(it), b'a-3')
+            self.assertEqual(it.skip(100), 6)
+            self.assertEqual(list(it), [])
+            self.assertEqual(it.skip(1), 0)
+
+            it = reversed(tr.keys(start=b'a-5', stop=b'b'))
+            self.assertEqual(it.skip(2), 2)
+            self.assertEqual(list(it), [b'a-7', b'a-6', b'a-5'])
+
+            it = tr.items(start=b'b-8')
+            self.assertEqual(it.skip(2), 2)
+            self.assertEqual(list(it), [])
+
+    def test_transaction_views(self):
+        """Test iterators returning memoryviews."""
+        data = self.create_data('views-transaction')
+        with self.db.transaction() as tr:
+            views = []
+            for key, value in tr.items(copy=False):
+                self.assertIsInstance(key, memoryview)
+                self.assertEqual(data[bytes(key)], bytes(value))
+                views.append(value)
+            # Each step releases previous views
+            for value in views:
+                with self.assertRaises(ValueError):
+                    bytes(value)
+            self.assertEqual([bytes(k) for k in tr.keys(copy=False)],
+                             sorted(data))
+            with tr.cursor() as c:
+                values = [bytes(v) for v in c.values(copy=False)]
+                self.assertEqual(values, [data[k] for k in sorted(data)])
+
     def test_cursor_keys(self):
         """Test cursor keys iterator."""
         keys = self.create_data('keys-cursor')
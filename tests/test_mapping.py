@@ -58,6 +58,17 @@ class TestMapping(TestMixin, unittest.TestCase):
             self.assertTrue(b'key2' in tr)
             self.assertFalse(b'key3' in tr)
 
+    def test_not_started(self):
+        """Test that only missing keys are handled by mapping methods."""
+        tr = self.db.transaction()
+        with self.assertRaises(NotStartedError):
+            tr.get(b'key')
+        with self.assertRaises(NotStartedError):
+            b'key' in tr
+        with self.assertRaises(NotStartedError):
+            tr[b'key']
+        tr.free()
+
 
 if __name__ == '__main__':
     unittest.main()
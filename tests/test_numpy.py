@@ -0,0 +1,89 @@
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from tkvdb.errors import EnomemError
+from tkvdb.params import Params, Param
+from tkvdb.transaction import Transaction
+from .base import TestMixin
+
+
+class TestArrays(TestMixin, unittest.TestCase):
+    """Test array import and export."""
+    def test_put_array_buffer(self):
+        """Test put_array with plain buffer objects."""
+        keys = memoryview(b'k1k2k3').cast('B', (3, 2))
+        values = memoryview(b'aaabbbccc').cast('B', (3, 3))
+        with self.db.transaction() as tr:
+            tr.put_array(keys, values)
+            self.assertEqual(list(tr.items()), [(b'k1', b'aaa'),
+                                                (b'k2', b'bbb'),
+                                                (b'k3', b'ccc')])
+            with self.assertRaises(ValueError):
+                tr.put_array(keys, b'ab')
+            with self.assertRaises(TypeError):
+                tr.put_array(keys, None)
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_numpy(self):
+        """Test numpy arrays round trip."""
+        keys = numpy.arange(1000, dtype='>u8')[::-1].copy()
+        values = numpy.zeros(1000, dtype=[('a', '<i4'), ('b', '<f8')])
+        values['a'] = numpy.arange(1000)
+        values['b'] = numpy.arange(1000) / 2
+        with self.db.transaction() as tr:
+            tr.put_array(keys, values)
+            tr.commit()
+
+        with self.db.transaction() as tr:
+            out_keys, out_values = tr.to_arrays(key_dtype='>u8',
+                                                val_dtype=values.dtype)
+            self.assertEqual(out_keys.dtype, numpy.dtype('>u8'))
+            self.assertTrue((out_keys == numpy.arange(1000)).all())
+            self.assertTrue((out_values == values[::-1]).all())
+
+            # Default dtypes are bytes of first item size
+            out_keys, out_values = tr.to_arrays(
+                start=(10).to_bytes(8, 'big'), stop=(13).to_bytes(8, 'big')
+            )
+            self.assertEqual(out_keys.dtype, numpy.dtype('S8'))
+            self.assertEqual(out_values.dtype, numpy.dtype('S12'))
+            self.assertEqual(out_keys.tolist(),
+                             [i.to_bytes(8, 'big') for i in (10, 11, 12)])
+
+            out_keys, out_values = tr.to_arrays(prefix=b'\xff')
+            self.assertEqual((len(out_keys), len(out_values)), (0, 0))
+
+            with self.assertRaises(ValueError):
+                tr.to_arrays(key_dtype='>u4')
+            with self.assertRaises(ValueError):
+                tr.to_arrays(val_dtype='S4')
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_numpy_2d(self):
+        """Test 2-D byte arrays and errors."""
+        keys = numpy.frombuffer(b'abcdef', dtype='u1').reshape(3, 2)
+        with Transaction() as tr:
+            tr.put_array(keys, numpy.ones((3, 5), dtype='u1'))
+            out_keys, out_values = tr.to_arrays(key_dtype=('u1', 2),
+                                                val_dtype=('u1', 5))
+            self.assertEqual(out_keys.shape, (3, 2))
+            self.assertTrue((out_keys == keys).all())
+            self.assertTrue((out_values == 1).all())
+            with self.assertRaises(ValueError):
+                tr.put_array(numpy.ones((4, 4))[:, ::2], keys)
+
+        params = Params({Param.TrDynalloc: 0, Param.TrLimit: 4096})
+        with Transaction(params=params) as tr:
+            keys = numpy.arange(1000, dtype='>u4')
+            with self.assertRaises(EnomemError) as ctx:
+                tr.put_array(keys, numpy.zeros(1000, dtype='S16'))
+            self.assertGreater(ctx.exception.index, 0)
+            self.assertEqual(len(list(tr.keys())), ctx.exception.index)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+import os
+import threading
+import unittest
+
+from tkvdb import Tkvdb
+from tkvdb.parallel import parallel_scan, split_range
+from .base import TestMixin
+
+
+def count_items(iterator):
+    """Count items in sub-range."""
+    return sum(1 for item in iterator)
+
+
+def collect_keys(iterator):
+    """Return all keys of sub-range."""
+    return list(iterator)
+
+
+class TestParallel(TestMixin, unittest.TestCase):
+    """Test read-only handles, fork handling and parallel scans."""
+    def test_readonly(self):
+        """Test read-only database."""
+        data = self.create_data('readonly')
+        with Tkvdb(self.path, readonly=True) as db:
+            self.assertTrue(db.readonly)
+            with db.transaction() as tr:
+                self.assertEqual(dict(tr.items()), data)
+                tr[b'key'] = b'value'
+                with self.assertRaises(PermissionError):
+                    tr.commit()
+        self.assertFalse(self.db.readonly)
+        with self.assertRaises(FileNotFoundError):
+            Tkvdb(self.path + '-missing', readonly=True)
+
+    def test_close_frees_transactions(self):
+        """Test that transactions are freed on database close."""
+        self.create_data('close', num=3)
+        db = Tkvdb(self.path)
+        tr = db.transaction()
+        tr.begin()
+        db.close()
+        self.assertFalse(tr.is_initialized)
+        with self.assertRaises(RuntimeError):
+            tr.get(b'close-1')
+        with self.assertRaises(RuntimeError):
+            db.transaction()
+
+    def test_close_busy(self):
+        """Test that close fails without freeing if transaction is used."""
+        other = self.db.transaction()
+        other.begin()
+        tr = self.db.transaction()
+        tr.begin()
+        started = threading.Event()
+        proceed = threading.Event()
+
+        def pairs():
+            yield b'key-1', b'value'
+            started.set()
+            proceed.wait(10)
+            yield b'key-2', b'value'
+
+        # put_many() keeps transaction used while it iterates pairs
+        thread = threading.Thread(target=tr.put_many, args=(pairs(),))
+        thread.start()
+        self.assertTrue(started.wait(10))
+        try:
+            with self.assertRaises(RuntimeError):
+                self.db.close()
+            with self.assertRaises(RuntimeError):
+                self.db.replace_file(self.path + '-missing')
+            self.assertTrue(self.db.is_opened)
+            self.assertTrue(other.is_initialized)
+        finally:
+            proceed.set()
+            thread.join()
+        self.assertEqual(tr[b'key-2'], b'value')
+        self.db.close()
+        self.assertFalse(tr.is_initialized)
+        self.assertFalse(other.is_initialized)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'requires fork')
+    def test_fork(self):
+        """Test database reopening in child process."""
+        data = self.create_data('fork')
+        tr = self.db.transaction()
+        tr.begin()
+        pool = self.db.transaction_pool(size=1)
+        with pool.transaction():
+            pass
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                # Parent transactions are detached in child right after
+                # fork, pool doesn't reuse them
+                if hasattr(os, 'register_at_fork'):
+                    if tr.is_initialized:
+                        code = 2
+                        return
+                    with pool.transaction() as pool_tr:
+                        if pool_tr.get(b'fork-1') != data[b'fork-1']:
+                            code = 3
+                            return
+                    if pool.stats()['reused'] != 0:
+                        code = 4
+                        return
+                with self.db.transaction() as child_tr:
+                    if dict(child_tr.items()) != data:
+                        return
+                try:
+                    tr.get(b'fork-1')
+                    code = 5
+                    return
+                except RuntimeError:
+                    pass
+                code = 0
+            finally:
+                os._exit(code)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.WEXITSTATUS(status), 0)
+        # Parent is not affected
+        self.assertEqual(dict(tr.items()), data)
+        with pool.transaction() as pool_tr:
+            self.assertEqual(pool_tr.get(b'fork-1'), data[b'fork-1'])
+        self.assertEqual(pool.stats()['reused'], 1)
+        pool.close()
+        tr.free()
+
+    def test_split_range(self):
+        """Test key range splitting."""
+        self.assertEqual(split_range(n=1), [(None, None)])
+        self.assertEqual(split_range(n=4), [(None, b'@'), (b'@', b'\x80'),
+                                            (b'\x80', b'\xc0'),
+                                            (b'\xc0', None)])
+        ranges = split_range(b'a', b'b', 3)
+        self.assertEqual(len(ranges), 3)
+        self.assertEqual(ranges[0][0], b'a')
+        self.assertEqual(ranges[-1][1], b'b')
+        for (a, b), (c, d) in zip(ranges, ranges[1:]):
+            self.assertEqual(b, c)
+            self.assertTrue(a < b)
+        # Too narrow range can't be split
+        self.assertEqual(split_range(b'a', b'a\x00', 4), [(b'a', b'a\x00')])
+
+    def test_parallel_scan(self):
+        """Test scanning in multiple processes."""
+        data = self.create_data('scan', num=100)
+        self.create_data('other', num=10)
+        counts = parallel_scan(self.path, count_items, processes=3)
+        self.assertEqual(len(counts), 3)
+        self.assertEqual(sum(counts), 110)
+        self.assertTrue(all(30 <= c <= 40 for c in counts))
+        counts = parallel_scan(self.path, count_items, processes=3,
+                               balanced=False)
+        self.assertEqual(sum(counts), 110)
+        keys = parallel_scan(self.path, collect_keys, prefix=b'scan-',
+                             processes=4, keys_only=True)
+        self.assertEqual([k for part in keys for k in part], sorted(data))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import threading
+import unittest
+
+from tkvdb.cursor import Seek
+from tkvdb.errors import NotFoundError
+from tkvdb.pool import TransactionPool
+from .base import TestMixin
+
+
+class TestPool(TestMixin, unittest.TestCase):
+    """Test pool of transactions and cursors."""
+    def test_reuse(self):
+        """Test that released transactions are reused and rolled back."""
+        data = self.create_data('pool')
+        pool = self.db.transaction_pool(size=2)
+        with pool.transaction() as tr:
+            self.assertTrue(tr.is_started)
+            self.assertEqual(dict(tr.items()), data)
+            tr[b'uncommitted'] = b'value'
+        with pool.transaction() as other:
+            self.assertIs(other, tr)
+            self.assertIsNone(other.get(b'uncommitted'))
+            other[b'committed'] = b'value'
+            other.commit()
+        with pool.transaction() as tr:
+            self.assertEqual(tr[b'committed'], b'value')
+        self.assertEqual(pool.stats(), {
+            'size': 2, 'idle': 1, 'in_use': 0,
+            'created': 1, 'reused': 2, 'evicted': 0,
+        })
+
+        with self.assertRaises(ZeroDivisionError):
+            with pool.transaction() as tr:
+                tr[b'key'] = b'value'
+                1 / 0
+        with pool.transaction() as tr:
+            self.assertNotIn(b'key', tr)
+        with self.assertRaises(ValueError):
+            pool.release(self.db.transaction())
+
+        pool.close()
+        self.assertFalse(tr.is_initialized)
+        with self.assertRaises(RuntimeError):
+            pool.acquire()
+        with self.assertRaises(ValueError):
+            TransactionPool(self.db, size=0)
+
+    def test_bounded(self):
+        """Test waiting for released transaction."""
+        pool = self.db.transaction_pool(size=2)
+        first = pool.acquire()
+        second = pool.acquire()
+        self.assertIsNot(first, second)
+        with self.assertRaises(TimeoutError):
+            pool.acquire(timeout=0.01)
+
+        result = []
+        thread = threading.Thread(
+            target=lambda: result.append(pool.acquire(timeout=10))
+        )
+        thread.start()
+        pool.release(first)
+        thread.join()
+        self.assertIs(result[0], first)
+
+        # Discarded transaction frees place for new one
+        pool.discard(second)
+        self.assertFalse(second.is_initialized)
+        third = pool.acquire(timeout=0)
+        self.assertIsNot(third, second)
+        self.assertEqual(pool.stats()['created'], 3)
+        pool.release(result[0])
+        pool.release(third)
+        pool.close()
+
+    def test_eviction(self):
+        """Test freeing of idle transactions."""
+        pool = TransactionPool(self.db, size=4, idle_timeout=30)
+        old = pool.acquire()
+        new = pool.acquire()
+        pool.release(old)
+        pool.release(new)
+        pool.evict(pool.idle[0].released + 30)
+        self.assertFalse(old.is_initialized)
+        self.assertTrue(new.is_initialized)
+        self.assertEqual(pool.stats()['evicted'], 1)
+
+        pool.idle_timeout = 0
+        with pool.transaction() as tr:
+            self.assertIsNot(tr, new)
+        self.assertEqual(pool.stats()['evicted'], 2)
+
+        # Transactions freed by database reopen aren't reused
+        self.db.reopen()
+        self.assertFalse(tr.is_initialized)
+        pool.idle_timeout = None
+        with pool.transaction() as other:
+            self.assertIsNot(other, tr)
+            self.assertTrue(other.is_started)
+        pool.close()
+
+    def test_cursors(self):
+        """Test reuse of cursors."""
+        self.create_data('cursor', num=5)
+        with self.db.transaction_pool() as pool:
+            with pool.transaction() as tr:
+                with pool.cursor(tr, b'cursor-2', Seek.EQ) as c:
+                    self.assertEqual(c.key(), b'cursor-2')
+                    c.next()
+                    self.assertEqual(c.key(), b'cursor-3')
+                with pool.cursor(tr) as other:
+                    self.assertIs(other, c)
+                    other.first()
+                    self.assertEqual(other.key(), b'cursor-0')
+                    self.assertEqual(list(other.keys()),
+                                     [b'cursor-%d' % i for i in range(1, 5)])
+                with self.assertRaises(NotFoundError):
+                    pool.acquire_cursor(tr, b'missing')
+                self.assertIs(pool.acquire_cursor(tr), c)
+                pool.release_cursor(c)
+            with pool.transaction() as tr:
+                c = pool.acquire_cursor(tr, b'cursor-4', Seek.EQ)
+                self.assertEqual(c.val(), b'cursor-val-4')
+            # Cursor released after transaction is just freed
+            pool.release_cursor(c)
+            self.assertFalse(c.is_initialized)
+            with self.assertRaises(ValueError):
+                pool.acquire_cursor(tr)
+
+    def test_cursor_reset(self):
+        """Test that reused cursor doesn't keep rolled back position."""
+        self.create_data('cursor', num=3)
+        with self.db.transaction_pool(size=1) as pool:
+            with pool.transaction() as tr:
+                tr.put(b'k00', b'value')
+                with pool.cursor(tr, b'k00', Seek.EQ) as c:
+                    self.assertEqual(c.key(), b'k00')
+            with pool.transaction() as tr:
+                with pool.cursor(tr) as other:
+                    self.assertIs(other, c)
+                    self.assertFalse(other.is_started)
+                    self.assertEqual(other.key(), b'')
+                    self.assertEqual(other.valsize(), 0)
+                    self.assertEqual(list(other.keys()),
+                                     [b'cursor-%d' % i for i in range(3)])
+
+
+if __name__ == '__main__':
+    unittest.main()
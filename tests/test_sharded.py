@@ -0,0 +1,177 @@
+import os
+import tempfile
+import unittest
+
+from tkvdb import Tkvdb
+from tkvdb.codecs import IntCodec
+from tkvdb.errors import NotFoundError
+from tkvdb.sharded import ShardedTkvdb
+
+
+class TestSharded(unittest.TestCase):
+    """Test database sharded into multiple files."""
+    def setUp(self):
+        """Create temporary directory for shards."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.paths = [os.path.join(self.tmpdir.name, 'shard-{}'.format(i))
+                      for i in range(4)]
+
+    def tearDown(self):
+        """Remove shards."""
+        self.tmpdir.cleanup()
+
+    def fill(self, sdb, num=100):
+        """Put keys to sharded database, return sorted items."""
+        items = [(b'key-%03d' % i, b'val-%03d' % i) for i in range(num)]
+        with sdb.transaction() as tr:
+            tr.put_many(items)
+            tr.commit()
+        return items
+
+    def check_routing(self, sdb):
+        """Check mapping interface and ordered iteration."""
+        items = self.fill(sdb)
+        with sdb.transaction() as tr:
+            self.assertEqual(list(tr.items()), items)
+            self.assertEqual(list(tr.items(reverse=True)), items[::-1])
+            self.assertEqual(list(tr), [k for k, _ in items])
+            self.assertEqual(list(reversed(tr)), [k for k, _ in items][::-1])
+            self.assertEqual(list(tr.values()), [v for _, v in items])
+            self.assertEqual(list(tr.keys(b'key-01')),
+                             [b'key-%03d' % i for i in range(10, 20)])
+            self.assertEqual(list(tr.keys(start=b'key-095')),
+                             [b'key-%03d' % i for i in range(95, 100)])
+            self.assertEqual(list(tr.keys(start=b'key-010', stop=b'key-013',
+                                          reverse=True)),
+                             [b'key-012', b'key-011', b'key-010'])
+            self.assertEqual(list(tr.keys(b'key-05', stop=b'key-053')),
+                             [b'key-050', b'key-051', b'key-052'])
+            self.assertEqual(list(tr.keys(b'missing')), [])
+
+            self.assertEqual(tr[b'key-042'], b'val-042')
+            self.assertEqual(tr.getvalue(b'key-007'), b'val-007')
+            self.assertIsNone(tr.get(b'missing'))
+            self.assertIn(b'key-001', tr)
+            self.assertNotIn(b'missing', tr)
+            with self.assertRaises(KeyError):
+                tr[b'missing']
+            with self.assertRaises(NotFoundError):
+                tr.getvalue(b'missing')
+            self.assertEqual(tr.get_many([b'key-003', b'no', b'key-099'], 0),
+                             [b'val-003', 0, b'val-099'])
+
+            tr.delete(b'key-09', prefix=True)
+            tr.delete_many([b'key-08'], prefix=True)
+            self.assertTrue(tr.is_changed)
+            self.assertEqual(list(tr.items()), items[:80])
+            tr.rollback()
+
+            tr.begin()
+            tr[b'new'] = b'value'
+            del tr[b'key-000']
+            tr.delete_many([b'key-001', b'key-002'])
+            tr.commit()
+            self.assertFalse(tr.is_changed)
+            self.assertFalse(tr.is_started)
+
+        expected = items[3:] + [(b'new', b'value')]
+        sdb.close()
+        # Every key is stored only in one shard
+        found = []
+        for path in self.paths:
+            with Tkvdb(path) as db:
+                with db.transaction() as tr:
+                    found.extend(tr.items())
+        self.assertEqual(sorted(found), expected)
+        return found
+
+    def test_hash(self):
+        """Test routing by hash."""
+        with ShardedTkvdb(self.paths) as sdb:
+            self.assertEqual(sdb.paths, self.paths)
+            found = self.check_routing(sdb)
+        # Keys are distributed over all shards
+        shards = {sdb.route(k) for k, _ in found}
+        self.assertEqual(shards, set(range(4)))
+
+        with ShardedTkvdb(self.paths, hash_func=lambda key: 0) as sdb:
+            self.assertEqual(sdb.shard_index(b'key-050'), 0)
+            with sdb.transaction() as tr:
+                self.assertIsNone(tr.get(b'key-050'))
+
+    def test_empty_shards(self):
+        """Test missing keys in fresh shards."""
+        with ShardedTkvdb(self.paths[:3]) as sdb:
+            with sdb.transaction() as tr:
+                for key in (b'a', b'b', b'c'):
+                    with self.assertRaises(KeyError):
+                        tr[key]
+                    self.assertNotIn(key, tr)
+                    self.assertIsNone(tr.get(key))
+
+    def test_boundaries(self):
+        """Test routing by key ranges."""
+        boundaries = [b'key-025', b'key-050', b'key-075']
+        with ShardedTkvdb(self.paths, boundaries=boundaries) as sdb:
+            self.assertEqual(sdb.shard_index(b'key-024'), 0)
+            self.assertEqual(sdb.shard_index(b'key-025'), 1)
+            self.assertEqual(sdb.shard_index(b'new'), 3)
+            self.check_routing(sdb)
+        with Tkvdb(self.paths[1]) as db:
+            with db.transaction() as tr:
+                self.assertEqual(list(tr.keys()),
+                                 [b'key-%03d' % i for i in range(25, 50)])
+
+        with self.assertRaises(ValueError):
+            ShardedTkvdb(self.paths, boundaries=[b'a', b'b'])
+        with self.assertRaises(ValueError):
+            ShardedTkvdb(self.paths, boundaries=[b'a', b'c', b'b'])
+        with self.assertRaises(ValueError):
+            ShardedTkvdb([])
+
+    def test_codecs(self):
+        """Test routing and ordering of encoded keys."""
+        codec = IntCodec(signed=True)
+        for boundaries in (None, [codec.encode(i) for i in (-5, 0, 5)]):
+            with ShardedTkvdb(self.paths, boundaries=boundaries,
+                              key_codec=IntCodec(signed=True)) as sdb:
+                with sdb.transaction() as tr:
+                    for i in range(-10, 10):
+                        tr[i] = b'value'
+                    self.assertEqual(list(tr.keys()), list(range(-10, 10)))
+                    self.assertEqual(list(tr.keys(start=-3, stop=7,
+                                                  reverse=True)),
+                                     list(range(6, -4, -1)))
+                    tr.rollback()
+
+    def test_commit(self):
+        """Test parallel commit and rollback of shards."""
+        with ShardedTkvdb(self.paths) as sdb:
+            tr = sdb.transaction()
+            tr.begin()
+            tr.put_many((b'key-%d' % i, b'value') for i in range(1000))
+            self.assertGreater(tr.mem(), 0)
+            with sdb.transaction() as other:
+                self.assertIsNone(other.get(b'key-1'))
+            tr.commit()
+            tr.begin()
+            tr[b'key-1'] = b'changed'
+            tr.rollback()
+            tr.free()
+            sdb.sync()
+            with sdb.transaction() as tr:
+                self.assertEqual(len(list(tr.keys())), 1000)
+                self.assertEqual(tr[b'key-1'], b'value')
+
+            # Exception in context manager does rollback
+            with self.assertRaises(ZeroDivisionError):
+                with sdb.transaction() as tr:
+                    tr[b'key-1'] = b'changed'
+                    1 / 0
+            with sdb.transaction() as tr:
+                self.assertEqual(tr[b'key-1'], b'value')
+        self.assertFalse(sdb.is_opened)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,190 @@
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+from tkvdb import Tkvdb
+from tkvdb.cursor import Seek
+from tkvdb.stats import Stats
+from tkvdb.transaction import Transaction
+from .base import TestMixin
+
+
+class TestStats(TestMixin, unittest.TestCase):
+    """Test operation counters."""
+    def test_disabled(self):
+        """Test that stats are disabled by default."""
+        self.assertIsNone(self.db.metrics)
+        self.assertEqual(self.db.stats(), {})
+        with self.db.transaction() as tr:
+            tr[b'key'] = b'value'
+            self.assertIsNone(tr.metrics)
+            self.assertEqual(tr.stats(), {})
+        with self.assertRaises(ValueError):
+            Stats(0)
+
+    def test_counters(self):
+        """Test counters of database operations."""
+        tr = self.db.transaction()
+        self.db.enable_stats()
+        self.assertIs(tr.metrics, self.db.metrics)
+        tr.begin()
+        tr[b'key-1'] = b'value'
+        tr.put_many([(b'key-2', b'val'), (b'key-3', b'v')])
+        self.assertEqual(tr[b'key-1'], b'value')
+        self.assertIsNone(tr.get(b'missing'))
+        self.assertEqual(tr.get_many([b'key-2', b'no']), [b'val', None])
+        del tr[b'key-3']
+        stats = tr.stats()
+        self.assertGreater(stats['mem'], 0)
+        tr.commit()
+        tr.begin()
+        self.assertEqual(list(tr.keys()), [b'key-1', b'key-2'])
+        with tr.cursor(b'key-1', Seek.EQ) as c:
+            c.next()
+        tr.rollback()
+        tr.free()
+
+        stats = self.db.stats()
+        ops = stats['ops']
+        self.assertEqual(ops['put']['count'], 3)
+        self.assertEqual(ops['get']['count'], 4)
+        self.assertEqual(ops['delete']['count'], 1)
+        self.assertEqual(ops['commit']['count'], 1)
+        self.assertEqual(ops['rollback']['count'], 1)
+        self.assertEqual(ops['seek']['count'], 2)
+        self.assertEqual(ops['next']['count'], 3)
+        self.assertEqual(ops['open']['count'], 0)
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['bytes_written'], 10 + 8 + 6)
+        self.assertEqual(stats['bytes_read'], 5 + 3)
+        self.assertGreater(stats['mem_peak'], 0)
+
+        get = ops['get']
+        self.assertEqual(get['errors'], 0)
+        self.assertEqual(get['sampled'], 4)
+        self.assertEqual(sum(get['histogram'].values()), 4)
+        self.assertLessEqual(get['max_ns'], max(get['histogram']))
+        self.assertLessEqual(get['p50_ns'], get['p99_ns'])
+        self.assertGreater(get['total_ns'], 0)
+
+        self.assertEqual(self.db.reset_stats(), stats)
+        self.assertEqual(self.db.stats()['ops']['get']['count'], 0)
+        self.db.disable_stats()
+        self.assertEqual(self.db.stats(), {})
+
+    def test_sampling(self):
+        """Test sampled timing and batch operations."""
+        with Tkvdb(self.path, stats=True) as db:
+            self.assertEqual(db.stats()['ops']['open']['count'], 1)
+            db.enable_stats(sample_rate=10)
+            with db.transaction() as tr:
+                for i in range(100):
+                    tr[b'key-%02d' % i] = b'value'
+                self.assertEqual(tr.keys().skip(200), 100)
+                metrics = Stats()
+                with db.transaction(metrics=metrics) as other:
+                    other.get(b'key')
+                self.assertEqual(metrics.snapshot()['ops']['get']['count'],
+                                 1)
+            ops = db.stats()['ops']
+            self.assertEqual(ops['put']['count'], 100)
+            self.assertEqual(ops['put']['sampled'], 10)
+            self.assertEqual(ops['get']['count'], 0)
+            self.assertGreaterEqual(ops['next']['count'], 99)
+
+    def test_trace_hook(self):
+        """Test trace hook for slow operations."""
+        calls = []
+
+        def hook(*args):
+            calls.append(args)
+
+        self.db.set_trace_hook(None)
+        self.assertIsNone(self.db.metrics)
+        self.db.set_trace_hook(hook)
+        self.assertIs(self.db.metrics.trace_hook, hook)
+        with self.db.transaction() as tr:
+            tr[b'key'] = b'value'
+            tr.get(b'key')
+            tr.get(b'missing')
+            del tr[b'key']
+            tr.commit()
+        self.assertEqual([c[:4] for c in calls[:4]], [
+            ('put', 3, 5, 0), ('get', 3, 5, 0), ('get', 7, 0, 4),
+            ('delete', 3, 0, 0),
+        ])
+        self.assertEqual(calls[4][0], 'commit')
+        self.assertGreater(calls[4][2], 0)
+        self.assertTrue(all(c[4] >= 0 for c in calls))
+
+        del calls[:]
+        self.db.set_trace_hook(hook, threshold_us=10 ** 9)
+        with self.db.transaction() as tr:
+            tr[b'key'] = b'value'
+            with tr.cursor() as c:
+                c.first()
+        self.assertEqual(calls, [])
+        with self.assertRaises(ValueError):
+            self.db.set_trace_hook(hook, -1)
+
+        # Exceptions of hook don't break operations
+        self.db.set_trace_hook(lambda *args: 1 / 0)
+        with mock.patch('sys.excepthook') as excepthook:
+            with self.db.transaction() as tr:
+                tr[b'key'] = b'value'
+                self.assertEqual(tr[b'key'], b'value')
+        self.assertEqual(excepthook.call_count, 2)
+        self.assertIs(excepthook.call_args[0][0], ZeroDivisionError)
+
+        self.db.set_trace_hook(None)
+        self.assertIsNone(self.db.metrics.trace_hook)
+        self.assertEqual(self.db.stats()['ops']['put']['sampled'], 3)
+
+    def test_long_duration(self):
+        """Test histogram of operation slower than 2**31 ns."""
+        self.db.enable_stats()
+        tr = self.db.transaction()
+        tr.begin()
+        for i in range(100000):
+            tr[b'key-%08d' % i] = b'value'
+        go = threading.Event()
+
+        def hold_gil():
+            # Busy loop keeps GIL, commit can't return until it ends
+            go.wait()
+            deadline = time.monotonic() + 2.3
+            while time.monotonic() < deadline:
+                pass
+
+        thread = threading.Thread(target=hold_gil)
+        thread.start()
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(10)
+        try:
+            go.set()
+            tr.commit()
+        finally:
+            sys.setswitchinterval(interval)
+            thread.join()
+        tr.free()
+
+        commit = self.db.stats()['ops']['commit']
+        self.assertGreater(commit['max_ns'], 2 ** 31)
+        self.assertEqual(commit['histogram'], {2 ** 32: 1})
+        self.assertEqual(commit['p99_ns'], 2 ** 32)
+
+    def test_ram(self):
+        """Test stats of RAM-only transaction."""
+        metrics = Stats()
+        with Transaction(metrics=metrics) as tr:
+            tr[b'key'] = b'value'
+            self.assertEqual(tr.getvalue(b'key'), b'value')
+            self.assertEqual(tr.stats()['ops']['put']['count'], 1)
+        self.assertEqual(metrics.bytes_written, 8)
+        self.assertEqual(metrics.bytes_read, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
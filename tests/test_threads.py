@@ -0,0 +1,58 @@
+import threading
+import unittest
+
+from tkvdb import Tkvdb
+from tkvdb.transaction import Transaction
+from .base import TestMixin
+
+
+class TestThreads(TestMixin, unittest.TestCase):
+    """Test transactions used from multiple threads."""
+    def run_threads(self, target, num=4):
+        """Run target function in multiple threads, re-raise errors."""
+        errors = []
+
+        def wrapper(n):
+            try:
+                target(n)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=wrapper, args=(n,))
+                   for n in range(num)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if errors:
+            raise errors[0]
+
+    def test_shared_db_read(self):
+        """Test reading through separate transactions of same db."""
+        data = self.create_data('threads', num=100)
+
+        def read(n):
+            for i in range(20):
+                with self.db.transaction() as tr:
+                    self.assertEqual(tr.get_many(list(data.keys())),
+                                     list(data.values()))
+                    self.assertEqual(list(tr.keys()), sorted(data.keys()))
+
+        self.run_threads(read)
+
+    def test_ram_commit(self):
+        """Test RAM-only transactions in multiple threads."""
+        def write(n):
+            with Transaction() as tr:
+                for i in range(1000):
+                    key = '{}-{}'.format(n, i).encode('utf-8')
+                    tr.put(key, key)
+                first = '{}-0'.format(n).encode('utf-8')
+                self.assertEqual(tr.getvalue(first), first)
+                tr.commit()
+
+        self.run_threads(write)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,10 @@
+import array
 import unittest
 
 from tkvdb import Tkvdb
-from tkvdb.errors import NotStartedError, EmptyError, NotFoundError
+from tkvdb.errors import (
+    NotStartedError, EmptyError, NotFoundError, ModifiedError
+)
 from .base import TestMixin
 
 
@@ -87,6 +90,26 @@ class TestTransaction(TestMixin, unittest.TestCase):
             self.assertEqual(tr.getvalue(b'put-reopen-1'), b'value-1')
             self.assertEqual(tr.getvalue(b'put-reopen-2'), b'value-2')
 
+    def test_commit_modified(self):
+        """Test retry of commit after concurrent commit."""
+        with self.db.transaction() as tr1, self.db.transaction() as tr2:
+            tr2.put(b'second', b'value')
+            tr1.put(b'first', b'value')
+            tr1.commit()
+            with self.assertRaises(ModifiedError):
+                tr2.commit()
+            self.assertFalse(tr2.is_started)
+            # Transaction is reset and sees other commit after begin
+            tr2.begin()
+            self.assertEqual(tr2.getvalue(b'first'), b'value')
+            self.assertNotIn(b'second', tr2)
+            tr2.put(b'second', b'value')
+            tr2.commit()
+
+        with self.db.transaction() as tr:
+            self.assertEqual(dict(tr.items()),
+                             {b'first': b'value', b'second': b'value'})
+
     def test_rollback(self):
         """Test transaction rollback."""
         with self.db.transaction() as tr:
@@ -137,12 +160,136 @@ class TestTransaction(TestMixin, unittest.TestCase):
         with self.db.transaction() as tr:
             self.assertEqual(tr.getvalue(b'to-delete-1'), b'value')
             self.assertEqual(tr.getvalue(b'to-delete-2'), b'value')
+            self.assertFalse(tr.is_changed)
             tr.delete(b'to-delete', prefix=True)
+            self.assertTrue(tr.is_changed)
             with self.assertRaises(NotFoundError):
                 tr.getvalue(b'to-delete-1')
                 tr.getvalue(b'to-delete-2')
             self.assertEqual(tr.getvalue(b'other-prefix'), b'value')
 
+    def test_buffer_objects(self):
+        """Test keys and values passed as buffer protocol objects."""
+        with self.db.transaction() as tr:
+            buf = bytearray(b'key-1')
+            tr.put(buf, memoryview(b'value-1'))
+            buf[-1:] = b'2'
+            tr[buf] = array.array('B', b'value-2')
+            self.assertEqual(tr[b'key-1'], b'value-1')
+            self.assertEqual(tr.get(memoryview(b'key-2')), b'value-2')
+            self.assertTrue(bytearray(b'key-2') in tr)
+            tr.put_many([(memoryview(b'xkey-3')[1:], bytearray(b'value-3'))])
+            self.assertEqual(tr.get_many([bytearray(b'key-3')]),
+                             [b'value-3'])
+            with tr.cursor(seek_key=bytearray(b'key-2')) as c:
+                self.assertEqual(c.val(), b'value-2')
+            self.assertEqual(list(tr.keys(start=bytearray(b'key-2'))),
+                             [b'key-2', b'key-3'])
+            del tr[bytearray(b'key-1')]
+            tr.delete_many([memoryview(b'key-2')])
+            self.assertEqual(list(tr), [b'key-3'])
+            with self.assertRaises(TypeError):
+                tr.put('key', b'value')
+            with self.assertRaises(TypeError):
+                tr.get(1)
+            tr.rollback()
+
+    def test_put_many(self):
+        """Test transaction batch put."""
+        pairs = [(b'many-1', b'value-1'), (b'many-2', b'value-2')]
+        with self.db.transaction() as tr:
+            tr.put_many(pairs)
+            self.assertTrue(tr.is_changed)
+            # Iterators are accepted too
+            tr.put_many((k + b'-gen', v) for k, v in pairs)
+            tr.commit()
+
+        with self.db.transaction() as tr:
+            self.assertEqual(tr.getvalue(b'many-1'), b'value-1')
+            self.assertEqual(tr.getvalue(b'many-2-gen'), b'value-2')
+
+    def test_put_many_error(self):
+        """Test transaction batch put error reporting."""
+        tr = self.db.transaction()
+        with self.assertRaises(NotStartedError) as ctx:
+            tr.put_many([(b'key', b'value')])
+        self.assertEqual(ctx.exception.index, 0)
+
+        with self.db.transaction() as tr:
+            with self.assertRaises(TypeError):
+                tr.put_many([(b'key', b'value'), ('key', b'value')])
+            tr.rollback()
+
+    def test_get_many(self):
+        """Test transaction batch get."""
+        with self.db.transaction() as tr:
+            self.assertEqual(tr.get_many([b'key-1']), [None])
+            tr.put_many([(b'key-1', b'value-1'), (b'key-2', b'value-2')])
+            self.assertEqual(
+                tr.get_many([b'key-1', b'missing', b'key-2']),
+                [b'value-1', None, b'value-2']
+            )
+            self.assertEqual(
+                tr.get_many(iter([b'missing']), default=b'default'),
+                [b'default']
+            )
+            tr.rollback()
+
+    def test_delete_many(self):
+        """Test transaction batch delete."""
+        with self.db.transaction() as tr:
+            tr.put_many([(b'del-1', b'value'), (b'del-2', b'value'),
+                         (b'pfx-1', b'value'), (b'pfx-2', b'value'),
+                         (b'other', b'value')])
+            tr.commit()
+
+        with self.db.transaction() as tr:
+            tr.delete_many([b'del-1', b'missing', b'del-2'])
+            tr.commit()
+
+        with self.db.transaction() as tr:
+            self.assertEqual(tr.get_many([b'del-1', b'del-2']), [None] * 2)
+            tr.delete_many([b'pfx'], prefix=True)
+            self.assertEqual(tr.get_many([b'pfx-1', b'pfx-2']), [None] * 2)
+            self.assertEqual(tr.getvalue(b'other'), b'value')
+
+    def test_partition(self):
+        """Test splitting of key range into balanced ranges."""
+        keys = ['{:05d}'.format(i * i).encode() for i in range(3000)]
+        with self.db.transaction() as tr:
+            self.assertEqual(tr.partition(4), [(None, None)])
+            tr.put_many((k, b'value') for k in keys)
+            tr.commit()
+            tr.begin()
+            with self.assertRaises(ValueError):
+                tr.partition(0)
+            self.assertEqual(tr.partition(1), [(None, None)])
+
+            ranges = tr.partition(7)
+            self.assertEqual(len(ranges), 7)
+            self.assertEqual(ranges[0][0], None)
+            self.assertEqual(ranges[-1][1], None)
+            counts = []
+            for (start, stop), (next_start, _) in zip(ranges, ranges[1:]):
+                self.assertEqual(stop, next_start)
+            for start, stop in ranges:
+                counts.append(sum(1 for k in tr.keys(start=start,
+                                                     stop=stop)))
+            self.assertEqual(sum(counts), len(keys))
+            self.assertTrue(all(abs(c - 3000 / 7) <= 3000 / 7 / 16
+                                for c in counts), counts)
+
+            ranges = tr.partition(3, prefix=b'1')
+            self.assertEqual(ranges[0][0], b'1')
+            self.assertEqual(ranges[-1][1], b'2')
+            self.assertEqual(
+                [k for start, stop in ranges
+                 for k in tr.keys(start=start, stop=stop)],
+                sorted(k for k in keys if k.startswith(b'1'))
+            )
+            # Less keys than ranges
+            self.assertEqual(len(tr.partition(10, start=sorted(keys)[-2])), 2)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,191 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest import mock
+
+from tkvdb import Tkvdb
+from tkvdb.errors import EnomemError
+from tkvdb.params import Params, Param
+from tkvdb.writer import GroupWriter
+from .base import TestMixin
+
+
+class TestWriter(TestMixin, unittest.TestCase):
+    """Test background group commit writer."""
+    def items(self, db=None):
+        """Return all committed items."""
+        with (db or self.db).transaction() as tr:
+            return dict(tr.items())
+
+    def test_submit(self):
+        """Test writes from multiple threads."""
+        writer = self.db.writer(batch_size=100, max_delay=1)
+        futures = []
+
+        def produce(n):
+            for i in range(50):
+                futures.append(writer.submit(b'key-%d-%02d' % (n, i),
+                                             b'value'))
+
+        threads = [threading.Thread(target=produce, args=(n,))
+                   for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for future in futures:
+            self.assertIsNone(future.result(10))
+        items = self.items()
+        self.assertEqual(len(items), 200)
+
+        writer.submit_delete(b'key-0-00').result(10)
+        writer.submit_delete(b'key-1-00')
+        writer.flush(10)
+        self.assertEqual(len(self.items()), 198)
+
+        stats = writer.stats()
+        self.assertEqual(stats['writes'], 202)
+        # Writes are grouped by batch size
+        self.assertLessEqual(stats['commits'], 5)
+        self.assertEqual(stats['max_batch'], 100)
+        writer.close()
+        with self.assertRaises(RuntimeError):
+            writer.submit(b'key', b'value')
+        with self.assertRaises(ValueError):
+            GroupWriter(self.db, batch_size=0)
+
+    def test_durable(self):
+        """Test that futures are resolved after sync."""
+        with mock.patch('os.fsync') as fsync:
+            with self.db.writer(max_delay=0) as writer:
+                writer.submit(b'key', b'value').result(10)
+                self.assertEqual(fsync.call_count, 1)
+            with self.db.writer(sync=False) as writer:
+                writer.submit(b'other', b'value').result(10)
+            self.assertEqual(fsync.call_count, 1)
+        with Tkvdb(self.path) as db:
+            self.assertEqual(self.items(db),
+                             {b'key': b'value', b'other': b'value'})
+
+    def test_errors(self):
+        """Test failed operations and commits."""
+        with self.db.writer(max_delay=0.1) as writer:
+            bad = writer.submit(1, b'value')
+            good = writer.submit(b'key', b'value')
+            with self.assertRaises(TypeError):
+                bad.result(10)
+            self.assertIsNone(good.result(10))
+            self.assertEqual(writer.stats()['errors'], 1)
+
+        # Batch is committed when transaction memory is full
+        params = Params({Param.TrDynalloc: 0, Param.TrLimit: 65536})
+        with self.db.writer(batch_size=1000, max_delay=1,
+                            params=params) as writer:
+            futures = [writer.submit(b'key-%03d' % i, b'x' * 1000)
+                       for i in range(100)]
+            big = writer.submit(b'big', b'x' * 131072)
+        self.assertTrue(all(f.result(10) is None for f in futures))
+        with self.assertRaises(EnomemError):
+            big.result(10)
+        self.assertGreater(writer.stats()['commits'], 1)
+        self.assertEqual(len(self.items()), 101)
+
+        # Database is closed under writer
+        writer = self.db.writer(max_delay=0)
+        writer.submit(b'key', b'value').result(10)
+        self.db.close()
+        with self.assertRaises(RuntimeError):
+            writer.submit(b'key', b'value').result(10)
+        writer.close(10)
+        self.assertFalse(writer.thread.is_alive())
+
+    def test_close_database(self):
+        """Test compaction and database close with active writer."""
+        writer = self.db.writer(max_delay=0)
+        writer.submit(b'key', b'value').result(10)
+        # Transaction of writer is freed, writer creates new one
+        self.db.compact()
+        writer.submit(b'after', b'compact').result(10)
+        self.assertEqual(len(self.items()), 2)
+
+        stop = threading.Event()
+        futures = []
+
+        def produce():
+            i = 0
+            while not stop.is_set():
+                try:
+                    futures.append(writer.submit(b'key-%06d' % i, b'value'))
+                except RuntimeError:
+                    return
+                i += 1
+
+        thread = threading.Thread(target=produce)
+        thread.start()
+        try:
+            while len(futures) < 100:
+                time.sleep(0.01)
+            # Writer is closed first, its queued writes are committed
+            self.db.close()
+            self.assertFalse(self.db.is_opened)
+            self.assertFalse(writer.thread.is_alive())
+        finally:
+            stop.set()
+            thread.join()
+        self.assertTrue(all(f.exception(10) is None for f in futures))
+        with Tkvdb(self.path) as db:
+            self.assertEqual(len(self.items(db)), len(futures) + 2)
+
+    def test_asyncio(self):
+        """Test submitting from asyncio tasks."""
+        writer = self.db.writer(max_delay=0.01)
+
+        async def produce():
+            await asyncio.gather(*[
+                writer.submit_async(b'key-%02d' % i, b'value')
+                for i in range(20)
+            ])
+            await writer.submit_delete_async(b'key-00')
+
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(produce())
+        finally:
+            loop.close()
+        writer.close()
+        self.assertEqual(len(self.items()), 19)
+
+    def test_asyncio_full_queue(self):
+        """Test that full queue doesn't block event loop."""
+        synced = threading.Event()
+        with mock.patch('os.fsync', side_effect=lambda fd: synced.wait(10)):
+            writer = self.db.writer(max_delay=0, queue_size=1)
+            first = writer.submit(b'key-0', b'value')
+            while not first.running():
+                time.sleep(0.001)
+            # Writer thread waits for fsync, queue becomes full
+            writer.submit(b'key-1', b'value')
+
+            async def produce():
+                start = time.monotonic()
+                task = asyncio.ensure_future(
+                    writer.submit_async(b'key-2', b'value')
+                )
+                await asyncio.sleep(0.05)
+                self.assertLess(time.monotonic() - start, 5)
+                self.assertFalse(task.done())
+                synced.set()
+                await task
+
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(produce())
+            finally:
+                loop.close()
+            writer.close()
+        self.assertEqual(len(self.items()), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()